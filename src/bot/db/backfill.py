@@ -0,0 +1,201 @@
+# ============================================================
+# 🧱 $im backfill from channel history
+# ============================================================
+"""
+Rebuilds mudae.db from the $im responses already in channel history.
+
+    history pagers (≤ BACKFILL_CONCURRENCY channels at once)
+        → bounded queue (BACKFILL_QUEUE_SIZE messages, back-pressure)
+        → one writer: parse a batch in a worker thread, then bulk upsert in
+          ONE transaction, then checkpoint the last committed message ID
+
+Several channels are paged at once, so writes from different channels interleave.
+Each update therefore carries its message time. It is written only if the
+stored row was not updated after that message, by a newer $im, a live roll or a
+$top scrape. last_updated and rank_history get the message time, not the time
+of the backfill.
+discord.py already waits out 429s; the pagers also pause briefly every
+BACKFILL_PAUSE_EVERY messages so a long backfill never saturates the bucket
+the live bot shares. A restarted backfill resumes after the checkpointed ID.
+"""
+import os
+import time
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+import discord
+
+from src.bot.config import DB_PATH
+from src.bot.db.crud import bulk_upsert_dated_im
+from src.bot.parsers.im_parser import extract_im_update
+from src.bot.utils.character import Character
+from src.bot.utils.checkpoint import read_json, write_json_atomic
+
+logger = logging.getLogger("mudae-helper.backfill")
+
+BACKFILL_BATCH_SIZE = int(os.getenv("BACKFILL_BATCH_SIZE", 200))
+BACKFILL_QUEUE_SIZE = int(os.getenv("BACKFILL_QUEUE_SIZE", 1000))
+BACKFILL_CONCURRENCY = int(os.getenv("BACKFILL_CONCURRENCY", 2))
+BACKFILL_PAUSE_EVERY = 500
+BACKFILL_PAUSE_SECONDS = 1.0
+# Flush a partial batch if nothing new arrived for this long
+BACKFILL_IDLE_FLUSH_SECONDS = 2.0
+
+CHECKPOINT_DIR = Path(DB_PATH).parent
+
+# (channel_id, message_id, embed or None, message unix time) — None marks "scanned up to here"
+QueueItem = Tuple[int, int, Optional[discord.Embed], float]
+
+
+@dataclass
+class BackfillStats:
+    started: float = field(default_factory=time.perf_counter)
+    scanned: int = 0
+    mudae_embeds: int = 0
+    im_updates: int = 0
+    new: int = 0
+    updated: int = 0
+    stale: int = 0
+    batches: int = 0
+    write_seconds: float = 0.0
+    done: bool = False
+    error: Optional[str] = None
+
+    @property
+    def elapsed(self) -> float:
+        return max(1e-9, time.perf_counter() - self.started)
+
+    def summary(self) -> str:
+        return (f"scanned {self.scanned:,} msgs ({self.scanned / self.elapsed:,.0f}/s), "
+                f"{self.mudae_embeds:,} Mudae embeds, {self.im_updates:,} $im rows "
+                f"→ {self.new:,} new / {self.updated:,} updated / {self.stale:,} older than stored in {self.batches} batches "
+                f"({self.write_seconds:.1f}s writing, {self.elapsed:.0f}s total)")
+
+
+def checkpoint_path(channel_id: int) -> Path:
+    return CHECKPOINT_DIR / f"backfill_{channel_id}.json"
+
+
+def load_checkpoint(channel_id: int) -> Optional[int]:
+    data = read_json(checkpoint_path(channel_id))
+    return int(data["last_message_id"]) if data and data.get("last_message_id") else None
+
+
+def is_mudae_message(message: discord.Message) -> bool:
+    return bool(message.embeds) and "mudae" in (getattr(message.author, "name", "") or "").lower()
+
+
+def _parse_batch(embeds: Iterable[Tuple[discord.Embed, float]]) -> List[Tuple[Character, float]]:
+    """Runs in a worker thread — parse_im_embed is pure."""
+    out = []
+    for embed, ts in embeds:
+        try:
+            update = extract_im_update(embed)
+        except Exception as e:
+            logger.debug(f"Unparseable embed skipped: {e}")
+            continue
+        if update:
+            out.append((update, ts))
+    return out
+
+
+async def _page_channel(channel, queue: asyncio.Queue, sem: asyncio.Semaphore,
+                        stats: BackfillStats, resume: bool, limit: Optional[int]):
+    after_id = load_checkpoint(channel.id) if resume else None
+    after = discord.Object(id=after_id) if after_id else None
+    async with sem:
+        logger.info(f"Backfill paging #{getattr(channel, 'name', channel.id)} after={after_id}")
+        last_id = None
+        since_pause = 0
+        async for message in channel.history(limit=limit, after=after, oldest_first=True):
+            stats.scanned += 1
+            last_id = message.id
+            if is_mudae_message(message):
+                stats.mudae_embeds += 1
+                await queue.put((channel.id, message.id, message.embeds[0], message.created_at.timestamp()))
+            since_pause += 1
+            if since_pause >= BACKFILL_PAUSE_EVERY:
+                since_pause = 0
+                await asyncio.sleep(BACKFILL_PAUSE_SECONDS)
+        if last_id is not None:
+            await queue.put((channel.id, last_id, None, 0.0))
+
+
+async def _write_batch(batch: List[QueueItem], stats: BackfillStats):
+    embeds = [(embed, ts) for _, _, embed, ts in batch if embed is not None]
+    updates = await asyncio.to_thread(_parse_batch, embeds) if embeds else []
+
+    t0 = time.perf_counter()
+    if updates:
+        new, updated, stale = await bulk_upsert_dated_im(updates, data_source="im_backfill")
+        stats.new += new
+        stats.updated += updated
+        stats.stale += stale
+    stats.write_seconds += time.perf_counter() - t0
+    stats.im_updates += len(updates)
+    stats.batches += 1
+
+    # Items for one channel arrive in ID order, so the last one is the high-water mark
+    latest: Dict[int, int] = {}
+    for channel_id, message_id, _, _ in batch:
+        latest[channel_id] = message_id
+    for channel_id, message_id in latest.items():
+        await asyncio.to_thread(
+            write_json_atomic, checkpoint_path(channel_id),
+            {"last_message_id": message_id, "updated_at": int(time.time())},
+        )
+
+
+async def run_backfill(channels, resume: bool = True, limit: Optional[int] = None,
+                       on_progress: Optional[Callable[[BackfillStats], Awaitable[None]]] = None) -> BackfillStats:
+    """Backfill from `channels` (TextChannel-likes). Cancel the task to stop; progress is kept."""
+    stats = BackfillStats()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=BACKFILL_QUEUE_SIZE)
+    sem = asyncio.Semaphore(BACKFILL_CONCURRENCY)
+    pagers = [asyncio.create_task(_page_channel(ch, queue, sem, stats, resume, limit)) for ch in channels]
+    pagers_done = asyncio.gather(*pagers, return_exceptions=True)
+
+    try:
+        batch: List[QueueItem] = []
+        while True:
+            if pagers_done.done() and queue.empty():
+                break
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout=BACKFILL_IDLE_FLUSH_SECONDS)
+                batch.append(item)
+            except asyncio.TimeoutError:
+                pass
+            else:
+                if len(batch) < BACKFILL_BATCH_SIZE and not (pagers_done.done() and queue.empty()):
+                    continue
+            if batch:
+                await _write_batch(batch, stats)
+                batch = []
+                if on_progress:
+                    await on_progress(stats)
+        if batch:
+            await _write_batch(batch, stats)
+        for result in await pagers_done:
+            if isinstance(result, BaseException):
+                raise result  # e.g. missing Read Message History permission
+        stats.done = True
+    except asyncio.CancelledError:
+        stats.error = "cancelled"
+        raise
+    except Exception as e:
+        stats.error = str(e)
+        logger.error(f"Backfill failed: {e}")
+    finally:
+        for task in pagers:
+            task.cancel()
+        await asyncio.gather(*pagers, return_exceptions=True)
+        if on_progress:
+            try:
+                await on_progress(stats)
+            except Exception:
+                pass
+        logger.info(f"Backfill {'complete' if stats.done else 'stopped'}: {stats.summary()}")
+    return stats
@@ -0,0 +1,91 @@
+# src/bot/db/backfill_cog.py
+import time
+import asyncio
+import logging
+from typing import Optional
+
+import discord
+from discord.ext import commands
+
+from src.bot.config import OWNER_IDS
+from src.bot.db.backfill import BackfillStats, checkpoint_path, run_backfill
+
+logger = logging.getLogger("mudae-helper.backfill")
+
+PROGRESS_EDIT_SECONDS = 5.0
+
+
+class BackfillCog(commands.Cog):
+    """Owner commands: backfill mudae.db from $im responses in channel history."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.task: Optional[asyncio.Task] = None
+        self.stats: Optional[BackfillStats] = None
+
+    def cog_unload(self):
+        if self.task and not self.task.done():
+            self.task.cancel()
+
+    @commands.command(name="backfill")
+    async def backfill(self, ctx, *channels: discord.TextChannel):
+        """
+        Re-import $im results from history. Usage: !backfill [#channel ...]
+        Defaults to the current channel; resumes from the last checkpoint
+        (!backfill_reset starts over).
+        """
+        if ctx.author.id not in OWNER_IDS:
+            await ctx.send("🚫 Only the owner can run a backfill.")
+            return
+        if self.task and not self.task.done():
+            await ctx.send(f"⏳ Backfill already running — {self.stats.summary() if self.stats else 'starting'}")
+            return
+
+        targets = list(channels) or [ctx.channel]
+        names = ", ".join(f"#{getattr(c, 'name', c.id)}" for c in targets)
+        status = await ctx.send(f"🧱 Backfill starting for {names}…")
+        last_edit = 0.0
+
+        async def on_progress(stats: BackfillStats):
+            nonlocal last_edit
+            self.stats = stats
+            finished = stats.done or stats.error
+            if not finished and time.monotonic() - last_edit < PROGRESS_EDIT_SECONDS:
+                return
+            last_edit = time.monotonic()
+            icon = "✅" if stats.done else ("⚠️" if stats.error else "🧱")
+            suffix = f" — {stats.error}" if stats.error else ""
+            try:
+                await status.edit(content=f"{icon} Backfill {names}: {stats.summary()}{suffix}")
+            except discord.HTTPException as e:
+                logger.debug(f"Progress edit failed: {e}")
+
+        self.task = asyncio.create_task(run_backfill(targets, resume=True, on_progress=on_progress))
+
+    @commands.command(name="backfill_stop")
+    async def backfill_stop(self, ctx):
+        """Stop a running backfill (progress up to the last batch is kept)."""
+        if ctx.author.id not in OWNER_IDS:
+            await ctx.send("🚫 Only the owner can stop a backfill.")
+            return
+        if not self.task or self.task.done():
+            await ctx.send("📭 No backfill running.")
+            return
+        self.task.cancel()
+        await ctx.send("🛑 Backfill stopping — rerun `!backfill` to resume.")
+
+    @commands.command(name="backfill_reset")
+    async def backfill_reset(self, ctx, *channels: discord.TextChannel):
+        """Forget the resume checkpoint so the next !backfill starts from the beginning."""
+        if ctx.author.id not in OWNER_IDS:
+            await ctx.send("🚫 Only the owner can reset backfill progress.")
+            return
+        for channel in list(channels) or [ctx.channel]:
+            path = checkpoint_path(channel.id)
+            if path.exists():
+                path.unlink()
+        await ctx.send("♻️ Backfill checkpoint cleared.")
+
+
+async def setup(bot):
+    await bot.add_cog(BackfillCog(bot))
@@ -0,0 +1,218 @@
+# ============================================================
+# 💾 Online backups for mudae.db
+# ============================================================
+"""
+Snapshots of the live database via SQLite's online backup API.
+
+The copy runs in a worker thread and moves BACKUP_PAGES_PER_STEP pages per
+step. The progress callback sleeps BACKUP_STEP_SLEEP after every step but the
+last, so the source is only locked for one small step at a time. $im writes and roll reads keep going while a backup runs. The
+event loop never waits on the copy.
+
+Snapshots go to data/backups/ as mudae-<UTC timestamp>-<label>.db. Only the
+newest BACKUP_KEEP are kept. The "pre-restore" safety copies taken by
+restore_backup are rotated on their own (BACKUP_KEEP_PRE_RESTORE), so
+scheduled backups never push out the last copy from before a restore.
+"""
+import os
+import time
+import sqlite3
+import asyncio
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+from src.bot.config import DB_PATH
+from src.bot.db.database import reset_db_state
+from src.bot.db.series_rank import close_series_conn
+
+logger = logging.getLogger("mudae-helper.backup")
+
+BACKUP_DIR = Path(os.getenv("BACKUP_DIR", str(Path(DB_PATH).parent / "backups")))
+BACKUP_KEEP = int(os.getenv("BACKUP_KEEP", 10))
+BACKUP_KEEP_PRE_RESTORE = int(os.getenv("BACKUP_KEEP_PRE_RESTORE", 3))
+PRE_RESTORE_LABEL = "pre-restore"
+BACKUP_INTERVAL_HOURS = float(os.getenv("BACKUP_INTERVAL_HOURS", 6))
+BACKUP_PAGES_PER_STEP = int(os.getenv("BACKUP_PAGES_PER_STEP", 64))
+BACKUP_STEP_SLEEP = float(os.getenv("BACKUP_STEP_SLEEP", 0.005))  # seconds between steps — lets waiting writers in
+
+
+class BackupResult(NamedTuple):
+    path: Path
+    pages: int
+    steps: int
+    seconds: float
+    longest_step_ms: float
+    size_bytes: int
+    integrity: str
+
+    def summary(self) -> str:
+        return (f"{self.path.name} — {self.size_bytes / 1024:.0f} KiB, {self.pages} pages in "
+                f"{self.steps} steps, {self.seconds * 1000:.0f} ms (longest step {self.longest_step_ms:.1f} ms), "
+                f"integrity: {self.integrity}")
+
+
+# ============================================================
+# 🔧 Blocking helpers (run in a worker thread)
+# ============================================================
+
+def _copy_stepwise(src: sqlite3.Connection, dst: sqlite3.Connection):
+    """Backup src → dst in small steps. Returns (pages, steps, longest_step_ms)."""
+    state = {"steps": 0, "pages": 0, "last": time.perf_counter(), "longest": 0.0}
+
+    def progress(status, remaining, total):
+        # backup(sleep=...) only sleeps on BUSY/LOCKED, so the pause between
+        # steps happens here. The step is timed from the end of the last pause.
+        state["longest"] = max(state["longest"], time.perf_counter() - state["last"])
+        state["steps"] += 1
+        state["pages"] = total
+        if remaining:
+            time.sleep(BACKUP_STEP_SLEEP)
+        state["last"] = time.perf_counter()
+
+    src.backup(dst, pages=BACKUP_PAGES_PER_STEP, progress=progress)
+    return state["pages"], state["steps"], state["longest"] * 1000
+
+
+def integrity_check(path) -> str:
+    """'ok' or the first problem PRAGMA integrity_check reports."""
+    conn = sqlite3.connect(f"file:{Path(path).resolve()}?mode=ro", uri=True)
+    try:
+        rows = conn.execute("PRAGMA integrity_check").fetchall()
+    finally:
+        conn.close()
+    return "ok" if rows == [("ok",)] else "; ".join(r[0] for r in rows[:5])
+
+
+def _backup_blocking(label: str) -> BackupResult:
+    BACKUP_DIR.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+    final_path = BACKUP_DIR / f"mudae-{stamp}-{label}.db"
+    tmp_path = final_path.with_suffix(".db.part")
+
+    t0 = time.perf_counter()
+    src = sqlite3.connect(DB_PATH)
+    dst = sqlite3.connect(tmp_path)
+    try:
+        pages, steps, longest = _copy_stepwise(src, dst)
+        # Snapshot is a single self-contained file (no -wal / -shm next to it)
+        dst.execute("PRAGMA journal_mode = DELETE")
+    finally:
+        dst.close()
+        src.close()
+    integrity = integrity_check(tmp_path)
+    if integrity != "ok":
+        tmp_path.unlink(missing_ok=True)
+        raise ValueError(f"Snapshot of {DB_PATH} failed integrity check: {integrity}")
+    os.replace(tmp_path, final_path)
+    elapsed = time.perf_counter() - t0
+
+    return BackupResult(final_path, pages, steps, elapsed, longest, final_path.stat().st_size, integrity)
+
+
+def list_backups() -> List[Path]:
+    """Newest first."""
+    if not BACKUP_DIR.exists():
+        return []
+    return sorted(BACKUP_DIR.glob("mudae-*.db"), key=lambda p: p.name, reverse=True)
+
+
+def rotate_backups(keep: int = BACKUP_KEEP, keep_pre_restore: int = BACKUP_KEEP_PRE_RESTORE) -> List[Path]:
+    """Delete all but the newest `keep` snapshots and `keep_pre_restore` safety copies. Returns what was removed."""
+    backups = list_backups()
+    pre_restore = [p for p in backups if p.stem.endswith(f"-{PRE_RESTORE_LABEL}")]
+    regular = [p for p in backups if p not in pre_restore]
+    removed = []
+    for old in regular[keep:] + pre_restore[keep_pre_restore:]:
+        try:
+            old.unlink()
+            removed.append(old)
+        except OSError as e:
+            logger.warning(f"Could not remove old backup {old}: {e}")
+    return removed
+
+
+def _resolve_backup(name: str) -> Optional[Path]:
+    """Accept a file name from list_backups(), or 'latest'."""
+    backups = list_backups()
+    if name == "latest":
+        return backups[0] if backups else None
+    candidate = BACKUP_DIR / Path(name).name
+    return candidate if candidate in backups else None
+
+
+def _restore_blocking(backup_path: Path) -> BackupResult:
+    t0 = time.perf_counter()
+    integrity = integrity_check(backup_path)
+    if integrity != "ok":
+        raise ValueError(f"{backup_path.name} failed integrity check: {integrity}")
+
+    # Copy INTO the live file through SQLite so open connections see a consistent DB
+    src = sqlite3.connect(f"file:{backup_path.resolve()}?mode=ro", uri=True)
+    dst = sqlite3.connect(DB_PATH)
+    try:
+        pages, steps, longest = _copy_stepwise(src, dst)
+    finally:
+        dst.close()
+        src.close()
+    live_integrity = integrity_check(DB_PATH)
+    elapsed = time.perf_counter() - t0
+    return BackupResult(Path(DB_PATH), pages, steps, elapsed, longest, Path(DB_PATH).stat().st_size, live_integrity)
+
+
+# ============================================================
+# ⚡ Async API
+# ============================================================
+
+_backup_lock: Optional[asyncio.Lock] = None
+
+
+def _lock() -> asyncio.Lock:
+    global _backup_lock
+    if _backup_lock is None:
+        _backup_lock = asyncio.Lock()
+    return _backup_lock
+
+
+async def backup_now(label: str = "manual") -> BackupResult:
+    """Snapshot mudae.db, then rotate old snapshots. Raises ValueError if the snapshot is corrupt."""
+    async with _lock():
+        result = await asyncio.to_thread(_backup_blocking, label)
+        removed = await asyncio.to_thread(rotate_backups)
+    logger.info(f"💾 Backup {result.summary()}" + (f" | rotated out {len(removed)}" if removed else ""))
+    return result
+
+
+async def restore_backup(name: str) -> BackupResult:
+    """
+    Verify a snapshot, take a 'pre-restore' snapshot of the live DB, then copy
+    the snapshot over the live DB. Raises FileNotFoundError / ValueError.
+    """
+    backup_path = _resolve_backup(name)
+    if backup_path is None:
+        raise FileNotFoundError(f"No backup named {name!r} in {BACKUP_DIR}")
+    async with _lock():
+        safety = await asyncio.to_thread(_backup_blocking, PRE_RESTORE_LABEL)
+        result = await asyncio.to_thread(_restore_blocking, backup_path)
+        # The restored file may predate migrations, and cached connections saw the old one
+        await reset_db_state()
+        await close_series_conn()
+    logger.info(f"♻️ Restored {backup_path.name} (safety copy {safety.path.name}) in {result.seconds * 1000:.0f} ms, integrity: {result.integrity}")
+    return result
+
+
+# ============================================================
+# 🧪 CLI
+# ============================================================
+if __name__ == "__main__":
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) > 2 and sys.argv[1] == "restore":
+        print(asyncio.run(restore_backup(sys.argv[2])).summary())
+    elif len(sys.argv) > 1 and sys.argv[1] == "list":
+        for p in list_backups():
+            print(p.name)
+    else:
+        print(asyncio.run(backup_now("cli")).summary())
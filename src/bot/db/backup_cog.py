@@ -0,0 +1,124 @@
+# src/bot/db/backup_cog.py
+import logging
+
+from discord.ext import commands, tasks
+
+from src.bot.config import OWNER_IDS
+from src.bot.db.backup import (
+    BACKUP_DIR, BACKUP_INTERVAL_HOURS, BACKUP_KEEP, backup_now, list_backups, restore_backup,
+)
+from src.bot.db.dedupe import run_dedupe
+
+logger = logging.getLogger("mudae-helper.backup")
+
+
+class BackupCog(commands.Cog):
+    """Scheduled mudae.db snapshots + owner commands (backup_now / backups / restore / dedupe)."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.last_result = None
+        if BACKUP_INTERVAL_HOURS > 0:
+            self.scheduled_backup.change_interval(hours=BACKUP_INTERVAL_HOURS)
+            self.scheduled_backup.start()
+        print(f"[💾] BackupCog loaded | every {BACKUP_INTERVAL_HOURS}h, keep {BACKUP_KEEP} → {BACKUP_DIR}")
+
+    def cog_unload(self):
+        self.scheduled_backup.cancel()
+
+    @tasks.loop(hours=6)
+    async def scheduled_backup(self):
+        try:
+            self.last_result = await backup_now("scheduled")
+            print(f"[💾] Scheduled backup: {self.last_result.summary()}")
+        except Exception as e:
+            logger.error(f"Scheduled backup failed: {e}")
+
+    @scheduled_backup.before_loop
+    async def _before_scheduled_backup(self):
+        await self.bot.wait_until_ready()
+
+    # ============================================================
+    # 🧰 Owner commands
+    # ============================================================
+    @commands.command(name="backup_now")
+    async def backup_now_cmd(self, ctx):
+        """Take a snapshot of mudae.db right now."""
+        if ctx.author.id not in OWNER_IDS:
+            await ctx.send("🚫 Only the owner can run backups.")
+            return
+        try:
+            self.last_result = await backup_now("manual")
+        except Exception as e:
+            await ctx.send(f"❌ Backup failed: {e}")
+            return
+        await ctx.send(f"💾 Backup done: {self.last_result.summary()}")
+
+    @commands.command(name="backups")
+    async def list_backups_cmd(self, ctx):
+        """List available snapshots (newest first)."""
+        if ctx.author.id not in OWNER_IDS:
+            await ctx.send("🚫 Only the owner can list backups.")
+            return
+        backups = list_backups()
+        if not backups:
+            await ctx.send("📭 No backups yet.")
+            return
+        lines = [f"`{p.name}` — {p.stat().st_size / 1024:.0f} KiB" for p in backups]
+        await ctx.send("🗄️ **Backups:**\n" + "\n".join(lines))
+
+    @commands.command(name="restore")
+    async def restore_cmd(self, ctx, name: str = "latest"):
+        """Verify a snapshot and restore it over mudae.db (a pre-restore snapshot is taken first)."""
+        if ctx.author.id not in OWNER_IDS:
+            await ctx.send("🚫 Only the owner can restore backups.")
+            return
+        await ctx.send(f"♻️ Restoring `{name}`…")
+        try:
+            result = await restore_backup(name)
+        except (FileNotFoundError, ValueError) as e:
+            await ctx.send(f"❌ {e}")
+            return
+        except Exception as e:
+            logger.error(f"Restore failed: {e}")
+            await ctx.send(f"❌ Restore failed: {e}")
+            return
+        await ctx.send(
+            f"✅ Restored in {result.seconds * 1000:.0f} ms "
+            f"({result.pages} pages, longest step {result.longest_step_ms:.1f} ms) — live DB integrity: {result.integrity}"
+        )
+
+    @commands.command(name="dedupe")
+    async def dedupe_cmd(self, ctx, mode: str = "check"):
+        """
+        Find duplicate characters / series spelling variants. Usage: !dedupe [check|apply]
+        `apply` takes a pre-dedupe snapshot, then merges in one transaction.
+        """
+        if ctx.author.id not in OWNER_IDS:
+            await ctx.send("🚫 Only the owner can run dedupe.")
+            return
+        apply = mode.lower() == "apply"
+        try:
+            if apply:
+                safety = await backup_now("pre-dedupe")
+                await ctx.send(f"💾 Safety snapshot `{safety.path.name}` taken — merging…")
+            report = await run_dedupe(apply=apply)
+        except Exception as e:
+            logger.error(f"Dedupe failed: {e}")
+            await ctx.send(f"❌ Dedupe failed: {e}")
+            return
+
+        lines = [f"{'✅' if report.applied else '🧹'} {report.summary()}"]
+        for group in report.duplicate_samples[:5]:
+            lines.append("🔁 " + " | ".join(f"{n} ({s})" for n, s in group))
+        for group in report.collision_samples[:5]:
+            lines.append("⚠️ " + " | ".join(f"{n} ({s})" for n, s in group))
+        for canonical, others in report.variant_samples[:5]:
+            lines.append(f"📚 {', '.join(others)} → {canonical}")
+        if not apply and (report.duplicate_clusters or report.series_variants):
+            lines.append("Run `!dedupe apply` to merge.")
+        await ctx.send("\n".join(lines)[:1990])
+
+
+async def setup(bot):
+    await bot.add_cog(BackupCog(bot))
@@ -1,13 +1,24 @@
 # src/bot/db/crud.py
-import aiosqlite
 import logging
-from typing import Optional
+from typing import List, Optional, Sequence, Tuple
 
-from src.bot.db.database import get_conn
-from src.bot.utils.normalization import normalize_text
+from src.bot.db import database
+from src.bot.db.database import get_conn, ensure_schema, get_read_conn
+from src.bot.db.rank_history import get_history_recorder
+from src.bot.db.refresh_planner import touch_refresh_due
+from src.bot.utils.character import CHARACTER_COLUMNS, Character, character_row_factory
+from src.bot.utils.normalization import normalize_text, normalize_series_loose
 
 logger = logging.getLogger("mudae-helper.db.crud")
 
+_SNAPSHOT_SQL = "SELECT id, claim_rank, like_rank, kakera_value FROM characters WHERE name_normalized = ?;"
+_RETURNING = " RETURNING id, claim_rank, like_rank, kakera_value, times_seen;"
+
+
+def _snapshot(row):
+    """(claim_rank, like_rank, kakera_value); kakera 0 is the column default = unknown."""
+    return (row[1], row[2], row[3] or None) if row else None
+
 
 # ============================================================
 # UPSERT for $top imports
@@ -19,27 +30,30 @@ async def upsert_character(
     claim_rank: Optional[int] = None,
     like_rank: Optional[int] = None,
     data_source: str = "top",
-) -> None:
+) -> bool:
     """
     Upsert for imported characters (e.g., from $top files).
     Matches strictly on name_normalized only.
+    Returns False if the DB write failed (an empty name is skipped, not failed).
     """
     name_norm = normalize_text(name_display)
 
     if not name_norm:
         logger.warning("Skipping upsert: empty normalized name")
-        return
+        return True
 
     sql = """
     INSERT INTO characters (
-        name_display, name_normalized, series_display,
+        name_display, name_normalized, series_display, series_key,
         kakera_value, claim_rank, like_rank, times_seen, data_source
     )
-    VALUES (?, ?, ?, ?, ?, ?, 1, ?)
+    VALUES (?, ?, ?, ?, ?, ?, ?, 1, ?)
     ON CONFLICT(name_normalized)
     DO UPDATE SET
         name_display = excluded.name_display,
         series_display = COALESCE(NULLIF(excluded.series_display, ''), characters.series_display),
+        series_key = CASE WHEN excluded.series_display != ''
+                          THEN excluded.series_key ELSE characters.series_key END,
         kakera_value = CASE
             WHEN excluded.kakera_value IS NOT NULL
                  AND (characters.kakera_value IS NULL OR excluded.kakera_value > characters.kakera_value)
@@ -49,42 +63,84 @@ async def upsert_character(
         like_rank  = COALESCE(excluded.like_rank, characters.like_rank),
         times_seen = characters.times_seen + 1,
         data_source = excluded.data_source,
-        last_updated = CURRENT_TIMESTAMP;
-    """
+        last_updated = CURRENT_TIMESTAMP
+    """ + _RETURNING
 
+    conn = None
     try:
+        await ensure_schema()
         conn = await get_conn()
-        await conn.execute(
+        cursor = await conn.execute(_SNAPSHOT_SQL, (name_norm,))
+        before = _snapshot(await cursor.fetchone())
+        cursor = await conn.execute(
             sql,
             (
                 name_display,
                 name_norm,
                 series_display,
+                normalize_series_loose(series_display),
                 kakera_value,
                 claim_rank,
                 like_rank,
                 data_source,
             ),
         )
+        after = (await cursor.fetchall())[0]
+        await touch_refresh_due(conn, after[0], after[1], after[2], after[4])
         await conn.commit()
         await conn.close()
+        get_history_recorder().record(after[0], before, _snapshot(after), data_source)
         logger.debug(f"Upserted (TOP): {name_display} | {series_display}")
+        return True
     except Exception as e:
         logger.error(f"DB error in upsert_character: {e}")
+        if conn is not None:
+            await conn.close()
+        return False
 
 
 # ============================================================
 # UPSERT for $im updates (overwrites most recent info)
 # ============================================================
+# A None field, or a missing series, keeps the stored value (_DATED_IM_SQL
+# below applies the same rules to $im results from the past).
+_IM_UPSERT_SQL = """
+INSERT INTO characters (
+    name_display, name_normalized, series_display, series_key,
+    kakera_value, claim_rank, like_rank, times_seen, data_source
+)
+VALUES (?, ?, ?, ?, ?, ?, ?, 1, ?)
+ON CONFLICT(name_normalized)
+DO UPDATE SET
+    name_display = excluded.name_display,
+    series_display = CASE WHEN excluded.series_key != 'unknown'
+                          THEN excluded.series_display ELSE characters.series_display END,
+    series_key = CASE WHEN excluded.series_key != 'unknown'
+                      THEN excluded.series_key ELSE characters.series_key END,
+    kakera_value = COALESCE(excluded.kakera_value, characters.kakera_value),
+    claim_rank = COALESCE(excluded.claim_rank, characters.claim_rank),
+    like_rank = COALESCE(excluded.like_rank, characters.like_rank),
+    times_seen = characters.times_seen + 1,
+    data_source = excluded.data_source,
+    last_updated = CURRENT_TIMESTAMP
+""" + _RETURNING
+
+
+def _im_series(series_display: Optional[str]) -> Tuple[str, str]:
+    """(series_display, series_key) to write. A missing series is the column default 'Unknown' / 'unknown'."""
+    series = (series_display or "").strip()
+    return (series, normalize_series_loose(series)) if series else ("Unknown", "unknown")
+
+
 async def upsert_character_from_im(
     name_display: str,
     series_display: str,
-    kakera_value: Optional[int],
-    claim_rank: Optional[int],
-    like_rank: Optional[int],
+    kakera_value: Optional[int] = None,
+    claim_rank: Optional[int] = None,
+    like_rank: Optional[int] = None,
 ) -> str:
     """
-    Overwrites or inserts by name_normalized only.
+    Overwrites or inserts by name_normalized only; a None field (or missing series) keeps the stored value.
     Returns "new", "update", or "skip" for logging.
     """
     name_norm = normalize_text(name_display)
@@ -93,56 +149,129 @@ async def upsert_character_from_im(
         logger.warning("Skipping IM upsert: empty normalized name")
         return "skip"
 
+    await ensure_schema()
     conn = await get_conn()
 
     # Check existence by normalized name only
-    cursor = await conn.execute(
-        "SELECT id FROM characters WHERE name_normalized = ?;",
-        (name_norm,),
-    )
+    cursor = await conn.execute(_SNAPSHOT_SQL, (name_norm,))
     existing = await cursor.fetchone()
 
-    sql = """
-    INSERT INTO characters (
-        name_display, name_normalized, series_display,
-        kakera_value, claim_rank, like_rank, times_seen, data_source
-    )
-    VALUES (?, ?, ?, ?, ?, ?, 1, 'im')
-    ON CONFLICT(name_normalized)
-    DO UPDATE SET
-        name_display = excluded.name_display,
-        series_display = excluded.series_display,
-        kakera_value = excluded.kakera_value,
-        claim_rank = excluded.claim_rank,
-        like_rank = excluded.like_rank,
-        times_seen = characters.times_seen + 1,
-        data_source = 'im',
-        last_updated = CURRENT_TIMESTAMP;
-    """
-
-    await conn.execute(
-        sql,
+    cursor = await conn.execute(
+        _IM_UPSERT_SQL,
         (
             name_display,
             name_norm,
-            series_display,
+            *_im_series(series_display),
             kakera_value,
             claim_rank,
             like_rank,
+            "im",
         ),
     )
+    after = (await cursor.fetchall())[0]
+    await touch_refresh_due(conn, after[0], after[1], after[2], after[4])
     await conn.commit()
     await conn.close()
+    get_history_recorder().record(after[0], _snapshot(existing), _snapshot(after), "im")
 
     # Return clear status for external logging
     if existing:
         return "update"
     else:
         return "new"
+
+
+# ============================================================
+# DATED UPSERT for $im results read from the past (backfill, archive reparse)
+# ============================================================
+# Like _IM_UPSERT_SQL, but the row is written as of the message time (the
+# datetime(?, 'unixepoch') parameter), and a row updated more recently than
+# that is left alone. RETURNING then yields nothing. The last parameter is
+# added to times_seen.
+_DATED_IM_SQL = """
+INSERT INTO characters (
+    name_display, name_normalized, series_display, series_key,
+    kakera_value, claim_rank, like_rank, times_seen, data_source, last_updated
+)
+VALUES (?, ?, ?, ?, ?, ?, ?, 1, ?, datetime(?, 'unixepoch'))
+ON CONFLICT(name_normalized)
+DO UPDATE SET
+    name_display = excluded.name_display,
+    series_display = CASE WHEN excluded.series_key != 'unknown'
+                          THEN excluded.series_display ELSE characters.series_display END,
+    series_key = CASE WHEN excluded.series_key != 'unknown'
+                      THEN excluded.series_key ELSE characters.series_key END,
+    kakera_value = COALESCE(excluded.kakera_value, characters.kakera_value),
+    claim_rank = COALESCE(excluded.claim_rank, characters.claim_rank),
+    like_rank = COALESCE(excluded.like_rank, characters.like_rank),
+    times_seen = characters.times_seen + ?,
+    data_source = excluded.data_source,
+    last_updated = excluded.last_updated
+WHERE characters.last_updated IS NULL OR characters.last_updated <= excluded.last_updated
+""" + _RETURNING
+
+
+async def bulk_upsert_dated_im(rows: Sequence[Tuple[Character, float]], data_source: str,
+                               count_seen: bool = True) -> Tuple[int, int, int]:
+    """
+    Apply (Character, message unix time) pairs from channel history / the
+    embed archive in ONE transaction. A row already updated after that time (a newer
+    $im, a $top scrape, another channel) is skipped, so write order does not
+    matter. Written rows get last_updated, refresh_due_at and rank_history
+    stamped at the message time. count_seen=False leaves times_seen alone on
+    existing rows (re-reading data that was already counted).
+    Returns (new, updated, skipped).
+    """
+    if not rows:
+        return 0, 0, 0
+    await ensure_schema()
+    history = []
+    new = updated = skipped = 0
+    conn = await get_conn()
+    try:
+        # IMMEDIATE: take the write lock up front. A deferred transaction that
+        # reads first fails with "database is locked" (no busy wait) if another
+        # connection commits before its first write.
+        await conn.execute("BEGIN IMMEDIATE")
+        for row, ts in rows:
+            name_norm = normalize_text(row.name_display)
+            if not name_norm:
+                continue
+            cursor = await conn.execute(_SNAPSHOT_SQL, (name_norm,))
+            existing = await cursor.fetchone()
+            cursor = await conn.execute(_DATED_IM_SQL, (
+                row.name_display, name_norm, *_im_series(row.series_display),
+                row.kakera_value, row.claim_rank, row.like_rank, data_source, ts,
+                1 if count_seen else 0,
+            ))
+            written = await cursor.fetchall()
+            if not written:
+                skipped += 1
+                continue
+            after = written[0]
+            await touch_refresh_due(conn, after[0], after[1], after[2], after[4], last_updated_ts=ts)
+            history.append((after[0], _snapshot(existing), _snapshot(after), ts))
+            if existing:
+                updated += 1
+            else:
+                new += 1
+        await conn.commit()
+    except Exception:
+        await conn.rollback()
+        raise
+    finally:
+        await conn.close()
+
+    recorder = get_history_recorder()
+    for character_id, before, after, ts in history:
+        recorder.record(character_id, before, after, data_source, recorded_at=ts)
+    return new, updated, skipped
+
+
 # ============================================================
 # READ-ONLY FETCH for rolls (no overwriting)
 # ============================================================
-async def get_character_info(name_display: str, series_display: str) -> Optional[dict]:
+async def get_character_info(name_display: str, series_display: str) -> Optional[Character]:
     """
     Fetch existing character data by normalized name + series (case-insensitive).
     Used by the roll handler — never writes or updates.
@@ -156,50 +285,43 @@ async def get_character_info(name_display: str, series_display: str) -> Optional
 
     conn = await get_conn()
     cursor = await conn.execute(
-        """
-        SELECT name_display, series_display, kakera_value, claim_rank, like_rank
+        f"""
+        SELECT {CHARACTER_COLUMNS}
         FROM characters
         WHERE name_normalized = ? AND LOWER(series_display) = LOWER(?)
         LIMIT 1;
         """,
         (name_norm, (series_display or "").lower()),
     )
+    cursor.row_factory = character_row_factory
     row = await cursor.fetchone()
     await conn.close()
 
     if not row:
         logger.debug(f"[MISS] Character not found in DB: {name_display} | {series_display}")
         return None
-
-    return {
-        "name_display": row[0],
-        "series_display": row[1],
-        "kakera_value": row[2],
-        "claim_rank": row[3],
-        "like_rank": row[4],
-    }
+    return row
 
 # ============================================================
 # READ helper — get character info from DB (by name)
 # ============================================================
-async def get_character_info(name_display: str, series_display: str):
+async def get_character_info(name_display: str, series_display: str) -> Optional[Character]:
     """
     Lookup existing character info by normalized name (case-insensitive).
-    Returns dict with kakera_value, claim_rank, like_rank, and computed meta_rank.
+    Returns a Character with kakera_value, claim_rank, like_rank, and computed meta_rank.
     """
     name_norm = normalize_text(name_display)
     if not name_norm:
         return None
 
     conn = await get_conn()
-    conn.row_factory = aiosqlite.Row
+    conn.row_factory = character_row_factory
     cursor = await conn.execute(
-        """
-        SELECT name_display, series_display, kakera_value,
-               claim_rank, like_rank,
+        f"""
+        SELECT {CHARACTER_COLUMNS},
                CASE
                    WHEN claim_rank IS NOT NULL AND like_rank IS NOT NULL
-                        THEN (claim_rank + like_rank) / 2.0
+                        THEN (claim_rank + like_rank) / 2
                    WHEN claim_rank IS NOT NULL THEN claim_rank
                    WHEN like_rank  IS NOT NULL THEN like_rank
                    ELSE NULL
@@ -213,4 +335,93 @@ async def get_character_info(name_display: str, series_display: str):
     row = await cursor.fetchone()
     await conn.close()
 
-    return dict(row) if row else None
+    return row
+
+
+# ============================================================
+# READ helper — character + series tier in one indexed query
+# ============================================================
+# The rolls arrive as a VALUES CTE q(idx, name_key, series_key) that is
+# LEFT JOINed to characters, so a name that isn't in the DB still returns a row.
+# The tier comes from the attached series_db.series_rank: first by the roll's
+# own series key, then by the DB row's series key. Each lookup is an indexed
+# subquery that takes the highest series_score row when a key appears twice.
+# Columns follow Character's field order, then q.idx (see _indexed_character).
+_RESOLVE_COLUMNS = """
+        c.name_display, c.series_display, c.kakera_value,
+        c.claim_rank, c.like_rank,
+        CASE
+            WHEN c.claim_rank IS NOT NULL AND c.like_rank IS NOT NULL
+                 THEN (c.claim_rank + c.like_rank) / 2
+            ELSE COALESCE(c.claim_rank, c.like_rank)
+        END AS meta_rank
+"""
+
+_RESOLVE_SQL_TIERED = f"""
+    SELECT {_RESOLVE_COLUMNS},
+        COALESCE(
+            (SELECT s.tier FROM series_db.series_rank s
+              WHERE s.series_key = q.series_key ORDER BY s.series_score DESC LIMIT 1),
+            (SELECT s.tier FROM series_db.series_rank s
+              WHERE s.series_key = c.series_key ORDER BY s.series_score DESC LIMIT 1),
+            'Unknown'
+        ) AS series_tier,
+        q.idx
+    FROM q
+    LEFT JOIN characters c ON c.name_normalized = q.name_key
+"""
+
+_RESOLVE_SQL_UNTIERED = f"""
+    SELECT {_RESOLVE_COLUMNS}, 'Unknown' AS series_tier, q.idx
+    FROM q
+    LEFT JOIN characters c ON c.name_normalized = q.name_key
+"""
+
+# 3 bound parameters per row; stays far below SQLITE_MAX_VARIABLE_NUMBER
+RESOLVE_BATCH_SIZE = 250
+
+
+def _indexed_character(cursor, row) -> Tuple[int, Character]:
+    """Row factory for the resolve queries: (q.idx, Character)."""
+    return row[7], Character(*row[:7])
+
+
+async def resolve_characters(pairs: Sequence[Tuple[str, str]]) -> List[Optional[Character]]:
+    """
+    Resolve many (name_display, series_display) rolls at once.
+    Returns one entry per input, in order: a Character with kakera_value,
+    claim_rank, like_rank, meta_rank and series_tier, or None when the name is
+    unknown and its series is unranked. Both lookups are index hits (UNIQUE
+    name_normalized, idx_series_rank_key), so a batch never scans either table.
+    """
+    results: List[Optional[Character]] = [None] * len(pairs)
+    rows = []
+    for i, (name, series) in enumerate(pairs):
+        name_key = normalize_text(name or "")
+        if name_key:
+            rows.append((i, name_key, normalize_series_loose(series or "")))
+    if not rows:
+        return results
+
+    conn = await get_read_conn()
+    sql = _RESOLVE_SQL_TIERED if database.series_attached else _RESOLVE_SQL_UNTIERED
+
+    for start in range(0, len(rows), RESOLVE_BATCH_SIZE):
+        chunk = rows[start:start + RESOLVE_BATCH_SIZE]
+        values = ", ".join("(?, ?, ?)" for _ in chunk)
+        params = [p for row in chunk for p in row]
+        cursor = await conn.execute(
+            f"WITH q(idx, name_key, series_key) AS (VALUES {values}) {sql}", params
+        )
+        cursor.row_factory = _indexed_character
+        for idx, character in await cursor.fetchall():
+            if character.name_display is None and character.series_tier == "Unknown":
+                continue
+            results[idx] = character
+        await cursor.close()
+    return results
+
+
+async def resolve_character(name_display: str, series_display: str) -> Optional[Character]:
+    """Single-roll form of resolve_characters()."""
+    return (await resolve_characters([(name_display, series_display)]))[0]
@@ -1,13 +1,17 @@
 # src/bot/db/database.py
+import asyncio
+import sqlite3
 import aiosqlite
 from pathlib import Path
 import logging
 import sys
+from typing import Optional
 
 # Ensure root path (Mudae_v3/src)
 sys.path.append(str(Path(__file__).resolve().parents[2]))
 
 from bot.config import DB_PATH  # ✅ fixed universal import
+from src.bot.utils.normalization import normalize_series_loose
 
 logger = logging.getLogger("mudae-helper.db")
 
@@ -74,3 +78,168 @@ async def init_db():
     await conn.commit()
     await conn.close()
     logger.info("✅ Initialized DB: ensured tables and view exist.")
+
+
+# ------------------------------------------------------------
+# Schema migrations (idempotent)
+# ------------------------------------------------------------
+def ensure_character_series_key(conn: sqlite3.Connection):
+    """
+    Add characters.series_key (normalize_series_loose of series_display) so
+    characters can be joined to series.db's series_rank.series_key.
+    """
+    cols = {row[1] for row in conn.execute("PRAGMA table_info(characters)")}
+    if not cols:
+        return
+    if "series_key" not in cols:
+        conn.execute("ALTER TABLE characters ADD COLUMN series_key TEXT")
+    missing = conn.execute("SELECT id, series_display FROM characters WHERE series_key IS NULL").fetchall()
+    if missing:
+        conn.executemany(
+            "UPDATE characters SET series_key = ? WHERE id = ?",
+            [(normalize_series_loose(series), cid) for cid, series in missing],
+        )
+        logger.info(f"Backfilled series_key for {len(missing)} characters")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_chars_series_key ON characters(series_key)")
+    conn.commit()
+
+
+def ensure_rank_history(conn: sqlite3.Connection):
+    """
+    Append-only history of rank / kakera changes (see src/bot/db/rank_history.py).
+    One row per changed field: field code, new value, delta vs. the previous value
+    (NULL for a character's first observation), unix timestamp.
+    """
+    conn.executescript("""
+    CREATE TABLE IF NOT EXISTS rank_history (
+        id INTEGER PRIMARY KEY,
+        character_id INTEGER NOT NULL,
+        recorded_at INTEGER NOT NULL,
+        field INTEGER NOT NULL,
+        value INTEGER,
+        delta INTEGER,
+        data_source TEXT
+    );
+    -- Trend queries: range scan over one field + time window, covering (no table reads)
+    CREATE INDEX IF NOT EXISTS idx_rank_history_trend
+        ON rank_history(field, recorded_at, character_id, delta);
+    -- Per-character timelines
+    CREATE INDEX IF NOT EXISTS idx_rank_history_char
+        ON rank_history(character_id, recorded_at);
+    """)
+    conn.commit()
+
+
+def ensure_refresh_due(conn: sqlite3.Connection):
+    """
+    Add characters.refresh_due_at (see src/bot/db/refresh_planner.py), index it,
+    and compute it for rows that don't have one yet.
+    """
+    from src.bot.db.refresh_planner import compute_refresh_due, parse_sqlite_timestamp
+
+    cols = {row[1] for row in conn.execute("PRAGMA table_info(characters)")}
+    if not cols:
+        return
+    if "refresh_due_at" not in cols:
+        conn.execute("ALTER TABLE characters ADD COLUMN refresh_due_at INTEGER")
+    missing = conn.execute(
+        "SELECT id, last_updated, claim_rank, like_rank, times_seen FROM characters WHERE refresh_due_at IS NULL"
+    ).fetchall()
+    if missing:
+        conn.executemany(
+            "UPDATE characters SET refresh_due_at = ? WHERE id = ?",
+            [(compute_refresh_due(parse_sqlite_timestamp(ts), claim, like, seen), cid)
+             for cid, ts, claim, like, seen in missing],
+        )
+        logger.info(f"Computed refresh_due_at for {len(missing)} characters")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_chars_refresh_due ON characters(refresh_due_at)")
+    conn.commit()
+
+
+def ensure_wishlist(conn: sqlite3.Connection):
+    """
+    Characters / series the owners are chasing (see src/bot/db/wishlist.py).
+    `pattern` is the normalized form matched against rolls, unique per kind.
+    """
+    conn.executescript("""
+    CREATE TABLE IF NOT EXISTS wishlist (
+        id INTEGER PRIMARY KEY,
+        kind TEXT NOT NULL CHECK (kind IN ('character', 'series')),
+        pattern TEXT NOT NULL,
+        display TEXT NOT NULL,
+        added_by INTEGER,
+        added_at INTEGER NOT NULL,
+        UNIQUE (kind, pattern)
+    );
+    """)
+    conn.commit()
+
+
+def _migrate_mudae_db():
+    Path(DB_PATH).parent.mkdir(parents=True, exist_ok=True)
+    with sqlite3.connect(DB_PATH) as conn:
+        ensure_character_series_key(conn)
+        ensure_rank_history(conn)
+        ensure_refresh_due(conn)
+        ensure_wishlist(conn)
+
+
+_schema_ready = False
+
+
+async def ensure_schema():
+    """Run the idempotent migrations once per process (off the event loop)."""
+    global _schema_ready
+    if not _schema_ready:
+        await asyncio.to_thread(_migrate_mudae_db)
+        _schema_ready = True
+
+
+# ------------------------------------------------------------
+# Shared read connection (series.db attached as `series_db`)
+# ------------------------------------------------------------
+_read_conn: Optional[aiosqlite.Connection] = None
+_read_conn_lock: Optional[asyncio.Lock] = None
+series_attached = False
+
+
+async def get_read_conn() -> aiosqlite.Connection:
+    """
+    Long-lived connection for roll lookups. series.db is ATTACHed so one query
+    can return a character's ranks together with its series tier.
+    """
+    global _read_conn, _read_conn_lock, series_attached
+    if _read_conn is not None:
+        return _read_conn
+    if _read_conn_lock is None:
+        _read_conn_lock = asyncio.Lock()
+    async with _read_conn_lock:
+        if _read_conn is None:
+            from src.bot.db.series_rank import SERIES_DB_PATH, _migrate_series_db
+
+            await ensure_schema()
+            conn = await get_conn()
+            conn.row_factory = aiosqlite.Row
+            if SERIES_DB_PATH.exists():
+                await asyncio.to_thread(_migrate_series_db)
+                await conn.execute("ATTACH DATABASE ? AS series_db", (str(SERIES_DB_PATH),))
+                series_attached = True
+            else:
+                logger.warning("⚠️ series.db not found — tiers resolve as Unknown.")
+            _read_conn = conn
+    return _read_conn
+
+
+async def close_read_conn():
+    global _read_conn, series_attached
+    if _read_conn is not None:
+        await _read_conn.close()
+        _read_conn = None
+        series_attached = False
+
+
+async def reset_db_state():
+    """After mudae.db is replaced on disk: re-run migrations and reopen the read connection on next use."""
+    global _schema_ready
+    _schema_ready = False
+    await close_read_conn()
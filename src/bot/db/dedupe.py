@@ -0,0 +1,322 @@
+# ============================================================
+# 🧹 Duplicate / collision detection for mudae.db characters
+# ============================================================
+"""
+Finds near-duplicate character rows without comparing rows pairwise.
+
+Blocking key per row: (normalize_name_loose(name_normalized), series_key).
+SQLite sorts all rows by that key once (O(n log n); the sort may spill to a
+temp file, so Python memory stays flat), and one streaming pass groups
+neighbours:
+
+    same name key + same series key      → duplicate cluster, merged
+    same name key + several series keys  → collision, reported only
+
+Duplicates come from older name normalizers ("reiko gnh" vs "reiko (gnh)")
+and punctuation variants. They are separate rows that split times_seen and
+ranks between them. Collisions are different characters whose names only
+differ in punctuation ("Mei Mei" / "Mei-Mei"). Names that are exactly equal
+already share a row (UNIQUE(name_normalized)), so those can't be seen here.
+
+Series spelling variants that share a series_key ("… Shukufuku wo!" / "…
+Shukufuku") get one canonical series_display.
+
+Detection runs on a read snapshot without taking any lock. Applying the plan
+is ONE `BEGIN IMMEDIATE` transaction. It re-reads every cluster by id, so
+writes that land between the scan and the apply are merged too. The survivor
+keeps the best (lowest) claim / like rank and the highest known kakera, and
+gets the summed times_seen. Loser rows' rank_history is re-pointed to it.
+"""
+import os
+import time
+import sqlite3
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from itertools import groupby
+from operator import itemgetter
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+from src.bot.config import DB_PATH
+from src.bot.db.database import ensure_schema
+from src.bot.db.rank_history import diff_snapshots
+from src.bot.db.refresh_planner import compute_refresh_due, parse_sqlite_timestamp
+from src.bot.utils.normalization import normalize_name_loose, normalize_text
+
+logger = logging.getLogger("mudae-helper.db.dedupe")
+
+DEDUPE_SAMPLES = int(os.getenv("DEDUPE_SAMPLES", 10))
+
+_SCAN_SQL = """
+    SELECT name_block_key(name_normalized) AS name_key, COALESCE(series_key, 'unknown') AS skey,
+           id, name_display, series_display
+    FROM characters
+    ORDER BY name_key, skey, id
+"""
+
+_VARIANTS_SQL = """
+    SELECT series_key, series_display, COUNT(*), SUM(times_seen)
+    FROM characters
+    WHERE series_key IS NOT NULL
+    GROUP BY series_key, series_display
+    ORDER BY series_key
+"""
+
+_CLUSTER_COLUMNS = "id, name_display, name_normalized, claim_rank, like_rank, kakera_value, times_seen, last_updated"
+
+
+@dataclass
+class DedupePlan:
+    clusters: List[List[int]] = field(default_factory=list)        # ids, ≥ 2 per cluster
+    series_renames: List[Tuple[str, str]] = field(default_factory=list)  # (series_key, canonical display)
+
+
+@dataclass
+class DedupeReport:
+    rows_scanned: int = 0
+    duplicate_clusters: int = 0
+    duplicate_rows: int = 0
+    collision_clusters: int = 0
+    series_variants: int = 0
+    scan_seconds: float = 0.0
+    applied: bool = False
+    rows_merged: int = 0
+    history_repointed: int = 0
+    series_rows_rewritten: int = 0
+    apply_seconds: float = 0.0
+    duplicate_samples: List[List[Tuple[str, str]]] = field(default_factory=list)
+    collision_samples: List[List[Tuple[str, str]]] = field(default_factory=list)
+    variant_samples: List[Tuple[str, List[str]]] = field(default_factory=list)
+
+    def summary(self) -> str:
+        text = (f"scanned {self.rows_scanned:,} rows in {self.scan_seconds:.2f}s — "
+                f"{self.duplicate_clusters:,} duplicate clusters ({self.duplicate_rows:,} rows), "
+                f"{self.collision_clusters:,} name collisions, {self.series_variants:,} series with spelling variants")
+        if self.applied:
+            text += (f" | merged away {self.rows_merged:,} rows, re-pointed {self.history_repointed:,} history rows, "
+                     f"rewrote series on {self.series_rows_rewritten:,} rows in {self.apply_seconds:.2f}s")
+        return text
+
+
+# ============================================================
+# 🔎 Detection (read-only)
+# ============================================================
+
+def _canonical_spelling(variants: Sequence[Tuple[str, int, int]]) -> str:
+    """Pick one display spelling from (display, rows, times_seen)."""
+    # Markdown-escaped spellings ("\\~") are scraping artifacts, never canonical;
+    # otherwise the most used spelling wins, then the longer one ("… wo!").
+    return max(variants, key=lambda v: ("\\" not in v[0], v[1], v[2] or 0, len(v[0]), v[0]))[0]
+
+
+def find_duplicates(conn: sqlite3.Connection, samples: int = DEDUPE_SAMPLES) -> Tuple[DedupePlan, DedupeReport]:
+    """One sorted scan over characters → merge plan + report. Does not write."""
+    conn.create_function("name_block_key", 1, lambda n: normalize_name_loose(n) or n, deterministic=True)
+    plan, report = DedupePlan(), DedupeReport()
+    t0 = time.perf_counter()
+
+    for _, name_rows in groupby(conn.execute(_SCAN_SQL), key=itemgetter(0)):
+        name_rows = list(name_rows)
+        report.rows_scanned += len(name_rows)
+        if len(name_rows) == 1:
+            continue
+        series_groups = [list(g) for _, g in groupby(name_rows, key=itemgetter(1))]
+        if len(series_groups) > 1:
+            report.collision_clusters += 1
+            if len(report.collision_samples) < samples:
+                report.collision_samples.append([(r[3], r[4]) for r in name_rows])
+        for group in series_groups:
+            if len(group) < 2:
+                continue
+            plan.clusters.append([r[2] for r in group])
+            report.duplicate_clusters += 1
+            report.duplicate_rows += len(group)
+            if len(report.duplicate_samples) < samples:
+                report.duplicate_samples.append([(r[3], r[4]) for r in group])
+
+    for series_key, rows in groupby(conn.execute(_VARIANTS_SQL), key=itemgetter(0)):
+        variants = [(r[1], r[2], r[3]) for r in rows if r[1] is not None]
+        if len(variants) < 2:
+            continue
+        canonical = _canonical_spelling(variants)
+        plan.series_renames.append((series_key, canonical))
+        report.series_variants += 1
+        if len(report.variant_samples) < samples:
+            report.variant_samples.append((canonical, [v[0] for v in variants if v[0] != canonical]))
+
+    report.scan_seconds = time.perf_counter() - t0
+    return plan, report
+
+
+# ============================================================
+# 🔧 Apply (one write transaction)
+# ============================================================
+
+def _best_rank(values) -> Optional[int]:
+    known = [v for v in values if v]
+    return min(known) if known else None
+
+
+def _merge_cluster(conn: sqlite3.Connection, ids: List[int], now: int) -> Tuple[int, int]:
+    """Merge one cluster into its survivor. Returns (rows removed, history rows re-pointed)."""
+    marks = ",".join("?" * len(ids))
+    rows = conn.execute(f"SELECT {_CLUSTER_COLUMNS} FROM characters WHERE id IN ({marks})", ids).fetchall()
+    if len(rows) < 2:
+        return 0, 0  # merged or deleted since the scan
+
+    # Prefer the row upserts will hit again (its key matches today's normalize_text),
+    # then the most seen, then the oldest
+    survivor = max(rows, key=lambda r: (normalize_text(r[1]) == r[2], r[6] or 0, -r[0]))
+    losers = [r[0] for r in rows if r[0] != survivor[0]]
+
+    claim = _best_rank(r[3] for r in rows)
+    like = _best_rank(r[4] for r in rows)
+    known_kakera = [r[5] for r in rows if r[5]]
+    kakera = max(known_kakera) if known_kakera else survivor[5]
+    times_seen = sum(r[6] or 0 for r in rows)
+    last_updated = max((r[7] for r in rows if r[7]), default=survivor[7])
+
+    conn.execute(
+        "UPDATE characters SET claim_rank = ?, like_rank = ?, kakera_value = ?, times_seen = ?, "
+        "last_updated = ?, refresh_due_at = ? WHERE id = ?;",
+        (claim, like, kakera, times_seen, last_updated,
+         compute_refresh_due(parse_sqlite_timestamp(last_updated), claim, like, times_seen), survivor[0]),
+    )
+    loser_marks = ",".join("?" * len(losers))
+    repointed = conn.execute(
+        f"UPDATE rank_history SET character_id = ? WHERE character_id IN ({loser_marks});",
+        [survivor[0], *losers],
+    ).rowcount
+    conn.execute(f"DELETE FROM characters WHERE id IN ({loser_marks});", losers)
+
+    history = diff_snapshots(survivor[0], (survivor[3], survivor[4], survivor[5] or None),
+                             (claim, like, kakera or None), now, "dedupe")
+    if history:
+        conn.executemany(
+            "INSERT INTO rank_history (character_id, recorded_at, field, value, delta, data_source) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            history,
+        )
+    return len(losers), repointed
+
+
+def apply_plan(conn: sqlite3.Connection, plan: DedupePlan, report: DedupeReport) -> DedupeReport:
+    """Apply `plan` in one transaction (rolled back entirely on any error)."""
+    t0 = time.perf_counter()
+    now = int(time.time())
+    conn.isolation_level = None  # explicit BEGIN / COMMIT below
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for series_key, canonical in plan.series_renames:
+            report.series_rows_rewritten += conn.execute(
+                "UPDATE characters SET series_display = ? WHERE series_key = ? AND series_display IS NOT ?;",
+                (canonical, series_key, canonical),
+            ).rowcount
+        for ids in plan.clusters:
+            removed, repointed = _merge_cluster(conn, ids, now)
+            report.rows_merged += removed
+            report.history_repointed += repointed
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    report.applied = True
+    report.apply_seconds = time.perf_counter() - t0
+    return report
+
+
+def dedupe_blocking(db_path=DB_PATH, apply: bool = False) -> DedupeReport:
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        plan, report = find_duplicates(conn)
+        if apply and (plan.clusters or plan.series_renames):
+            apply_plan(conn, plan, report)
+    finally:
+        conn.close()
+    return report
+
+
+# ============================================================
+# ⚡ Async API
+# ============================================================
+
+async def run_dedupe(apply: bool = False) -> DedupeReport:
+    """Scan mudae.db off the event loop; with apply=True also merge."""
+    await ensure_schema()
+    report = await asyncio.to_thread(dedupe_blocking, DB_PATH, apply)
+    logger.info(f"🧹 Dedupe {'applied' if report.applied else 'dry run'}: {report.summary()}")
+    return report
+
+
+# ============================================================
+# 🧪 CLI / scale benchmark
+# ============================================================
+
+def _bench(total_rows: int):
+    """Synthetic characters table: ~3% duplicate pairs, ~1% collisions, some series variants."""
+    import random
+    import tempfile
+
+    from src.bot.db.database import ensure_character_series_key, ensure_rank_history, ensure_refresh_due
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "dedupe.db"
+        conn = sqlite3.connect(path)
+        conn.execute("""
+            CREATE TABLE characters (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, name_display TEXT NOT NULL, name_normalized TEXT NOT NULL,
+                series_display TEXT DEFAULT 'Unknown', kakera_value INTEGER DEFAULT 0, claim_rank INTEGER DEFAULT NULL,
+                like_rank INTEGER DEFAULT NULL, times_seen INTEGER DEFAULT 1, data_source TEXT DEFAULT 'organic',
+                last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP, UNIQUE(name_normalized))
+        """)
+        t0 = time.perf_counter()
+        batch = []
+        for i in range(total_rows):
+            series_no = i % max(1, total_rows // 20)
+            series = f"Series {series_no} wo!" if series_no % 50 == 0 and rng.random() < 0.5 else f"Series {series_no}"
+            roll = rng.random()
+            if roll < 0.03:
+                name = f"Char {i - 1}!"           # punctuation variant of the previous row
+                series = batch[-1][2] if batch else series
+            elif roll < 0.04:
+                name = f"Char-{i - 1}"            # same loose key, other series → collision
+            else:
+                name = f"Char {i}"
+            batch.append((name, normalize_text(name), series, rng.randint(0, 2000),
+                          rng.randint(1, 90000), rng.randint(1, 90000), rng.randint(1, 20)))
+            if len(batch) == 100_000:
+                conn.executemany("INSERT OR IGNORE INTO characters (name_display, name_normalized, series_display, "
+                                 "kakera_value, claim_rank, like_rank, times_seen) VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+                batch = batch[-1:]
+        conn.executemany("INSERT OR IGNORE INTO characters (name_display, name_normalized, series_display, "
+                         "kakera_value, claim_rank, like_rank, times_seen) VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+        conn.commit()
+        ensure_character_series_key(conn)
+        ensure_rank_history(conn)
+        ensure_refresh_due(conn)
+        conn.close()
+        print(f"[🧹] Built {total_rows:,} synthetic rows in {time.perf_counter() - t0:.1f}s")
+
+        report = dedupe_blocking(path, apply=True)
+        print(f"[⚡] {report.summary()}")
+        again = dedupe_blocking(path, apply=False)
+        print(f"[✅] second pass: {again.duplicate_clusters} duplicate clusters, {again.series_variants} series variants left")
+
+
+if __name__ == "__main__":
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        _bench(int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000)
+    else:
+        result = asyncio.run(run_dedupe(apply=len(sys.argv) > 1 and sys.argv[1] == "apply"))
+        print(result.summary())
+        for group in result.duplicate_samples:
+            print("  duplicate:", " | ".join(f"{n} ({s})" for n, s in group))
+        for group in result.collision_samples:
+            print("  collision:", " | ".join(f"{n} ({s})" for n, s in group))
+        for canonical, others in result.variant_samples:
+            print(f"  series: {canonical!r} ← {others}")
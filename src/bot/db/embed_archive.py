@@ -0,0 +1,163 @@
+# ============================================================
+# 🗃️ Raw embed archive — segmented gzip JSONL
+# ============================================================
+"""
+Every Mudae embed the listener sees is kept as `embed.to_dict()` so old data
+can be reparsed whenever im_parser improves (src/tools/reparse_embed_archive.py).
+
+Layout: data/embed_archive/embeds-<UTC start>.jsonl.gz, one JSON record per line:
+    {"ts": unix, "message_id": ..., "channel_id": ..., "embed": {...}}
+
+The listener only appends a small dict to an in-memory buffer. Writes happen
+in a worker thread, ARCHIVE_FLUSH_RECORDS records or ARCHIVE_FLUSH_SECONDS at
+a time. Each flush appends one gzip member; concatenated members are still a
+valid .gz stream. A segment is closed at ARCHIVE_SEGMENT_MB and a new one is
+started.
+"""
+import os
+import gzip
+import json
+import time
+import asyncio
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from src.bot.config import DB_PATH
+
+logger = logging.getLogger("mudae-helper.archive")
+
+ARCHIVE_ENABLED = os.getenv("EMBED_ARCHIVE", "true").lower() == "true"
+ARCHIVE_DIR = Path(os.getenv("EMBED_ARCHIVE_DIR", str(Path(DB_PATH).parent / "embed_archive")))
+ARCHIVE_SEGMENT_MB = float(os.getenv("ARCHIVE_SEGMENT_MB", 16))
+ARCHIVE_FLUSH_RECORDS = 200
+ARCHIVE_FLUSH_SECONDS = 10.0
+
+
+class EmbedArchive:
+    def __init__(self, directory: Path = ARCHIVE_DIR, segment_mb: float = ARCHIVE_SEGMENT_MB):
+        self.directory = Path(directory)
+        self.segment_bytes = int(segment_mb * 1024 * 1024)
+        self._pending: List[str] = []
+        self._segment: Optional[Path] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._write_lock = threading.Lock()
+        self.records_written = 0
+
+    # --------------------------------------------------------
+    # Hot path (event loop)
+    # --------------------------------------------------------
+    def append(self, embed, message_id: Optional[int] = None, channel_id: Optional[int] = None):
+        record = {"ts": int(time.time()), "message_id": message_id, "channel_id": channel_id,
+                  "embed": embed.to_dict()}
+        self._pending.append(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+        self._schedule()
+
+    def _schedule(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write(self._take())
+            return
+        if len(self._pending) >= ARCHIVE_FLUSH_RECORDS:
+            self._start_flush(loop)
+        elif self._timer is None:
+            self._timer = loop.call_later(ARCHIVE_FLUSH_SECONDS, self._start_flush, loop)
+
+    def _start_flush(self, loop):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._flush_task and not self._flush_task.done():
+            return
+        self._flush_task = loop.create_task(self._flush_pending())
+
+    def _take(self) -> List[str]:
+        lines, self._pending = self._pending, []
+        return lines
+
+    async def _flush_pending(self):
+        while self._pending:
+            lines = self._take()
+            try:
+                await asyncio.to_thread(self._write, lines)
+            except Exception as e:
+                self._pending = lines + self._pending
+                logger.error(f"Embed archive write failed: {e}")
+                return
+
+    async def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._flush_task and not self._flush_task.done():
+            await self._flush_task
+        await self._flush_pending()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    # --------------------------------------------------------
+    # Disk (worker thread)
+    # --------------------------------------------------------
+    def _current_segment(self) -> Path:
+        if self._segment is None or (self._segment.exists() and self._segment.stat().st_size >= self.segment_bytes):
+            self.directory.mkdir(parents=True, exist_ok=True)
+            stamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S-%f")
+            self._segment = self.directory / f"embeds-{stamp}.jsonl.gz"
+        return self._segment
+
+    def _write(self, lines: List[str]):
+        if not lines:
+            return
+        with self._write_lock:
+            # "ab" adds a new gzip member; readers see one continuous stream
+            with gzip.open(self._current_segment(), "ab", compresslevel=6) as f:
+                f.write(("\n".join(lines) + "\n").encode("utf-8"))
+            self.records_written += len(lines)
+
+
+_archive: Optional[EmbedArchive] = None
+
+
+def get_embed_archive() -> Optional[EmbedArchive]:
+    """Process-wide archive, or None when EMBED_ARCHIVE=false."""
+    global _archive
+    if not ARCHIVE_ENABLED:
+        return None
+    if _archive is None:
+        _archive = EmbedArchive()
+    return _archive
+
+
+# ============================================================
+# 📖 Reading
+# ============================================================
+
+def list_segments(directory: Path = ARCHIVE_DIR) -> List[Path]:
+    """Oldest first (names sort by start time)."""
+    return sorted(Path(directory).glob("embeds-*.jsonl.gz"))
+
+
+def iter_archive_lines(directory: Path = ARCHIVE_DIR) -> Iterator[str]:
+    """Raw JSON lines across all segments, oldest first; tolerates a truncated tail."""
+    for segment in list_segments(directory):
+        try:
+            with gzip.open(segment, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield line
+        except (EOFError, OSError) as e:
+            logger.warning(f"Stopped reading {segment.name} early: {e}")
+
+
+def iter_archive(directory: Path = ARCHIVE_DIR) -> Iterator[Dict]:
+    for line in iter_archive_lines(directory):
+        try:
+            yield json.loads(line)
+        except ValueError:
+            continue
@@ -1,7 +1,13 @@
+import sys
 import sqlite3
 import pandas as pd
 from pathlib import Path
 
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+
+from src.bot.db.series_rank import ensure_series_indexes
+from src.bot.utils.normalization import normalize_series_loose
+
 DB_PATH = Path("data/mudae.db")
 OUTPUT_PATH = Path("data/series.db")
 TOP_LIMIT = 1000  # use top 1000 meta-ranked characters
@@ -54,6 +60,7 @@ def build_series_rank():
         else: return "D"
 
     grouped["tier"] = grouped["tier_score"].apply(get_tier)
+    grouped["series_key"] = grouped["series"].map(normalize_series_loose)
 
     # Sort by score descending for display
     grouped = grouped.sort_values("series_score", ascending=False).reset_index(drop=True)
@@ -61,6 +68,7 @@ def build_series_rank():
     # Save
     conn_out = sqlite3.connect(OUTPUT_PATH)
     grouped.to_sql("series_rank", conn_out, if_exists="replace", index=False)
+    ensure_series_indexes(conn_out)
     conn_out.close()
 
     print(f"[💾] Saved {len(grouped)} series entries to {OUTPUT_PATH}")
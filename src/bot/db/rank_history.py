@@ -0,0 +1,269 @@
+# ============================================================
+# 📈 Rank history — append-only, delta-encoded, batched
+# ============================================================
+"""
+Both upserts hand the old and new (claim_rank, like_rank, kakera_value) of a
+character to the recorder. Only fields that actually changed become rows in
+rank_history:
+
+    (character_id, recorded_at, field, value, delta)
+
+`delta` is new - old (NULL on a character's first observation), so trend
+queries just SUM deltas over a time window. Rows are buffered in memory and
+written in one executemany/transaction per batch (HISTORY_BATCH_SIZE rows or
+HISTORY_FLUSH_SECONDS after the first buffered row, whichever comes first).
+
+Trend queries read only idx_rank_history_trend (field, recorded_at,
+character_id, delta): the window is a range scan of a covering index, so cost
+follows the rows inside the window, not the size of the whole history.
+"""
+import os
+import time
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from src.bot.db.database import get_conn, ensure_schema
+
+logger = logging.getLogger("mudae-helper.db.history")
+
+HISTORY_BATCH_SIZE = int(os.getenv("HISTORY_BATCH_SIZE", 200))
+HISTORY_FLUSH_SECONDS = float(os.getenv("HISTORY_FLUSH_SECONDS", 5))
+
+# Field codes (stored as small ints)
+FIELD_CLAIM, FIELD_LIKE, FIELD_KAKERA = 1, 2, 3
+FIELDS = {"claim": FIELD_CLAIM, "like": FIELD_LIKE, "kakera": FIELD_KAKERA}
+FIELD_COLUMNS = {FIELD_CLAIM: "claim_rank", FIELD_LIKE: "like_rank", FIELD_KAKERA: "kakera_value"}
+
+# (claim_rank, like_rank, kakera_value) — same order as FIELD codes
+RankSnapshot = Tuple[Optional[int], Optional[int], Optional[int]]
+HistoryRow = Tuple[int, int, int, Optional[int], Optional[int], Optional[str]]
+
+
+def diff_snapshots(character_id: int, old: Optional[RankSnapshot], new: RankSnapshot,
+                   recorded_at: int, data_source: Optional[str] = None) -> List[HistoryRow]:
+    """History rows for the fields that changed between `old` and `new`."""
+    rows = []
+    old = old or (None, None, None)
+    for field, before, after in zip((FIELD_CLAIM, FIELD_LIKE, FIELD_KAKERA), old, new):
+        if after == before or after is None:
+            continue
+        delta = after - before if before is not None else None
+        rows.append((character_id, recorded_at, field, after, delta, data_source))
+    return rows
+
+
+class RankHistoryRecorder:
+    """In-memory buffer of history rows, flushed in batches."""
+
+    def __init__(self, batch_size: int = HISTORY_BATCH_SIZE, flush_seconds: float = HISTORY_FLUSH_SECONDS):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._pending: List[HistoryRow] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self.rows_written = 0
+        self.batches_written = 0
+
+    def record(self, character_id: int, old: Optional[RankSnapshot], new: RankSnapshot,
+               data_source: Optional[str] = None, recorded_at: Optional[float] = None) -> int:
+        """Queue the changed fields (stamped now, or at `recorded_at` for old data); returns rows queued."""
+        stamp = int(recorded_at if recorded_at is not None else time.time())
+        rows = diff_snapshots(character_id, old, new, stamp, data_source)
+        if not rows:
+            return 0
+        self._pending.extend(rows)
+        self._schedule()
+        return len(rows)
+
+    def _schedule(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # scripts call flush() themselves
+        if len(self._pending) >= self.batch_size:
+            self._start_flush(loop)
+        elif self._timer is None:
+            self._timer = loop.call_later(self.flush_seconds, self._start_flush, loop)
+
+    def _start_flush(self, loop):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._flush_task and not self._flush_task.done():
+            return  # the running flush loops until the buffer is empty
+        self._flush_task = loop.create_task(self._flush_pending())
+
+    async def _flush_pending(self):
+        while self._pending:
+            batch, self._pending = self._pending, []
+            try:
+                await ensure_schema()
+                conn = await get_conn()
+                try:
+                    await conn.executemany(
+                        "INSERT INTO rank_history (character_id, recorded_at, field, value, delta, data_source) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        batch,
+                    )
+                    await conn.commit()
+                finally:
+                    await conn.close()
+                self.rows_written += len(batch)
+                self.batches_written += 1
+                logger.debug(f"Wrote {len(batch)} rank_history rows")
+            except Exception as e:
+                # Keep the rows for the next attempt
+                self._pending = batch + self._pending
+                logger.error(f"Failed to write rank history: {e}")
+                return
+
+    async def flush(self):
+        """Write everything pending now (shutdown, scripts)."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._flush_task and not self._flush_task.done():
+            await self._flush_task
+        await self._flush_pending()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+
+_recorder: Optional[RankHistoryRecorder] = None
+
+
+def get_history_recorder() -> RankHistoryRecorder:
+    global _recorder
+    if _recorder is None:
+        _recorder = RankHistoryRecorder()
+    return _recorder
+
+
+# ============================================================
+# 🔎 Trend queries
+# ============================================================
+
+async def top_climbers(days: float = 7, field: str = "claim", limit: int = 10) -> List[Dict]:
+    """
+    Characters whose rank improved the most over the last `days`
+    (for kakera: whose value grew the most).
+    """
+    code = FIELDS[field]
+    since = int(time.time() - days * 86400)
+    # Lower rank = better, so climbers have the most negative summed delta
+    order = "DESC" if code == FIELD_KAKERA else "ASC"
+    column = FIELD_COLUMNS[code]
+
+    await ensure_schema()
+    conn = await get_conn()
+    try:
+        cursor = await conn.execute(
+            f"""
+            SELECT t.character_id, c.name_display, c.series_display, t.change, t.changes, c.{column}
+            FROM (
+                SELECT character_id, SUM(delta) AS change, COUNT(*) AS changes
+                FROM rank_history INDEXED BY idx_rank_history_trend
+                WHERE field = ? AND recorded_at >= ? AND delta IS NOT NULL
+                GROUP BY character_id
+                ORDER BY change {order}
+                LIMIT ?
+            ) t
+            JOIN characters c ON c.id = t.character_id
+            ORDER BY t.change {order};
+            """,
+            (code, since, limit),
+        )
+        rows = await cursor.fetchall()
+    finally:
+        await conn.close()
+
+    return [{
+        "character_id": r[0],
+        "name": r[1],
+        "series": r[2],
+        "change": r[3],
+        "changes": r[4],
+        "current": r[5],
+    } for r in rows if (r[3] < 0 if order == "ASC" else r[3] > 0)]
+
+
+async def character_history(character_id: int, limit: int = 50) -> List[Dict]:
+    """Newest-first timeline for one character."""
+    await ensure_schema()
+    conn = await get_conn()
+    try:
+        cursor = await conn.execute(
+            """
+            SELECT recorded_at, field, value, delta, data_source
+            FROM rank_history
+            WHERE character_id = ?
+            ORDER BY recorded_at DESC
+            LIMIT ?;
+            """,
+            (character_id, limit),
+        )
+        rows = await cursor.fetchall()
+    finally:
+        await conn.close()
+    return [{
+        "recorded_at": r[0],
+        "field": FIELD_COLUMNS.get(r[1], str(r[1])),
+        "value": r[2],
+        "delta": r[3],
+        "data_source": r[4],
+    } for r in rows]
+
+
+# ============================================================
+# 🧪 Scale check — trend query on a large synthetic history
+# ============================================================
+if __name__ == "__main__":
+    import random
+    import sqlite3
+    import sys
+    import tempfile
+    from pathlib import Path
+
+    from src.bot.db.database import ensure_rank_history
+
+    total_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    rng = random.Random(0)
+    now = int(time.time())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(Path(tmp) / "history.db")
+        conn.execute("CREATE TABLE characters (id INTEGER PRIMARY KEY, name_display TEXT, series_display TEXT, "
+                     "claim_rank INTEGER, like_rank INTEGER, kakera_value INTEGER)")
+        conn.executemany("INSERT INTO characters VALUES (?, ?, ?, ?, ?, ?)",
+                         [(i, f"Character {i}", f"Series {i % 300}", i, i, 100) for i in range(1, 5001)])
+        ensure_rank_history(conn)
+
+        t0 = time.perf_counter()
+        batch = []
+        for _ in range(total_rows):
+            # a year of history, uniformly spread
+            batch.append((rng.randint(1, 5000), now - rng.randint(0, 365 * 86400), rng.randint(1, 3),
+                          rng.randint(1, 5000), rng.randint(-300, 300), "synthetic"))
+            if len(batch) == 100_000:
+                conn.executemany("INSERT INTO rank_history (character_id, recorded_at, field, value, delta, data_source) "
+                                 "VALUES (?, ?, ?, ?, ?, ?)", batch)
+                batch.clear()
+        conn.commit()
+        print(f"[📈] Inserted {total_rows:,} history rows in {time.perf_counter() - t0:.1f}s")
+
+        sql = """
+            SELECT character_id, SUM(delta) AS change
+            FROM rank_history INDEXED BY idx_rank_history_trend
+            WHERE field = ? AND recorded_at >= ? AND delta IS NOT NULL
+            GROUP BY character_id ORDER BY change ASC LIMIT 10
+        """
+        for detail in conn.execute("EXPLAIN QUERY PLAN " + sql, (FIELD_CLAIM, now - 7 * 86400)):
+            print(f"    plan: {detail[-1]}")
+        for days in (1, 7, 30):
+            t0 = time.perf_counter()
+            top = conn.execute(sql, (FIELD_CLAIM, now - days * 86400)).fetchall()
+            print(f"[⚡] top climbers over {days:>2}d: {(time.perf_counter() - t0) * 1000:7.1f} ms (best {top[0]})")
+        conn.close()
@@ -0,0 +1,123 @@
+# ============================================================
+# 🔄 Refresh planner — which characters to $im next
+# ============================================================
+"""
+Every character carries an indexed `refresh_due_at` (unix seconds):
+
+    refresh_due_at = last_updated + REFRESH_BASE_HOURS / weight
+    weight         = meta_factor(meta_rank) × (1 + log2(times_seen))
+
+Valuable (low meta rank) and frequently rolled characters get short intervals;
+obscure ones drift to the back. The value is recomputed by the upserts whenever
+a row is written, so "next N to refresh" is an index walk —
+ORDER BY refresh_due_at LIMIT N — never a scan of the table.
+"""
+import math
+import os
+import time
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from src.bot.db.database import get_conn, ensure_schema
+
+logger = logging.getLogger("mudae-helper.db.refresh")
+
+REFRESH_BASE_HOURS = float(os.getenv("REFRESH_BASE_HOURS", 72))
+# meta rank at which meta_factor == 1 (better ranks refresh faster)
+REFRESH_META_PIVOT = 1000
+MIN_META_FACTOR, MAX_META_FACTOR = 0.25, 10.0
+
+
+def meta_factor(meta_rank: Optional[int]) -> float:
+    if not meta_rank:
+        return 1.0  # unknown ranks: refresh at the base pace so we learn them
+    return max(MIN_META_FACTOR, min(MAX_META_FACTOR, REFRESH_META_PIVOT / meta_rank))
+
+
+def refresh_weight(meta_rank: Optional[int], times_seen: Optional[int]) -> float:
+    return meta_factor(meta_rank) * (1.0 + math.log2(max(1, times_seen or 1)))
+
+
+def compute_refresh_due(last_updated_ts: float, claim_rank: Optional[int], like_rank: Optional[int],
+                        times_seen: Optional[int]) -> int:
+    # Same meta rank as the characters_meta view / RulesEngine
+    if claim_rank and like_rank:
+        meta_rank = (claim_rank + like_rank) // 2
+    else:
+        meta_rank = claim_rank or like_rank or None
+    interval = REFRESH_BASE_HOURS * 3600 / refresh_weight(meta_rank, times_seen)
+    return int(last_updated_ts + interval)
+
+
+def parse_sqlite_timestamp(value) -> float:
+    """CURRENT_TIMESTAMP text ('YYYY-MM-DD HH:MM:SS', UTC) → unix seconds."""
+    if not value:
+        return 0.0
+    try:
+        return datetime.strptime(str(value)[:19], "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc).timestamp()
+    except ValueError:
+        return 0.0
+
+
+async def touch_refresh_due(conn, character_id: int, claim_rank, like_rank, times_seen,
+                            last_updated_ts: Optional[float] = None):
+    """Recompute refresh_due_at for a row that was just written (same transaction)."""
+    updated_at = last_updated_ts if last_updated_ts is not None else time.time()
+    await conn.execute(
+        "UPDATE characters SET refresh_due_at = ? WHERE id = ?;",
+        (compute_refresh_due(updated_at, claim_rank, like_rank, times_seen), character_id),
+    )
+
+
+# ============================================================
+# 🔎 Planner queries (index-only ordering)
+# ============================================================
+
+async def next_to_refresh(limit: int = 10) -> List[Dict]:
+    """The `limit` characters whose refresh is most overdue (idx_chars_refresh_due)."""
+    await ensure_schema()
+    conn = await get_conn()
+    try:
+        cursor = await conn.execute(
+            """
+            SELECT id, name_display, series_display, refresh_due_at,
+                   claim_rank, like_rank, kakera_value, times_seen, last_updated, data_source
+            FROM characters INDEXED BY idx_chars_refresh_due
+            ORDER BY refresh_due_at ASC
+            LIMIT ?;
+            """,
+            (limit,),
+        )
+        rows = await cursor.fetchall()
+    finally:
+        await conn.close()
+
+    now = time.time()
+    return [{
+        "id": r[0],
+        "name": r[1],
+        "series": r[2],
+        "overdue_hours": (now - (r[3] or 0)) / 3600,
+        "claim_rank": r[4],
+        "like_rank": r[5],
+        "kakera_value": r[6],
+        "times_seen": r[7],
+        "last_updated": r[8],
+        "data_source": r[9],
+    } for r in rows]
+
+
+async def count_due(now: Optional[float] = None) -> int:
+    """How many characters are past their refresh time (index range count)."""
+    await ensure_schema()
+    conn = await get_conn()
+    try:
+        cursor = await conn.execute(
+            "SELECT COUNT(*) FROM characters WHERE refresh_due_at <= ?;",
+            (int(now or time.time()),),
+        )
+        (count,) = await cursor.fetchone()
+    finally:
+        await conn.close()
+    return count
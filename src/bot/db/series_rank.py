@@ -1,9 +1,18 @@
+import sys
+import asyncio
 import sqlite3
-import math
 import logging
 from pathlib import Path
 from typing import Optional, Dict, List
 
+# Ensure project root is importable when run as a script
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+
+import aiosqlite
+
+from src.bot.utils.tier_style import tier_style
+from src.bot.utils.normalization import normalize_series_loose
+
 # ============================================================
 # 📦 Database paths
 # ============================================================
@@ -30,6 +39,26 @@ def connect_series_db():
 def connect_mudae_db():
     return sqlite3.connect(MUDAE_DB_PATH)
 
+
+def ensure_series_indexes(conn: sqlite3.Connection):
+    """
+    Add the normalized `series_key` column (if the table was written without it)
+    and the indexes the read path relies on. Safe to call repeatedly.
+    """
+    cols = {row[1] for row in conn.execute("PRAGMA table_info(series_rank)")}
+    if not cols:
+        return
+    if "series_key" not in cols:
+        conn.execute("ALTER TABLE series_rank ADD COLUMN series_key TEXT")
+        rows = conn.execute("SELECT rowid, series FROM series_rank").fetchall()
+        conn.executemany(
+            "UPDATE series_rank SET series_key = ? WHERE rowid = ?",
+            [(normalize_series_loose(series), rowid) for rowid, series in rows],
+        )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_series_rank_score ON series_rank(series_score DESC)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_series_rank_key ON series_rank(series_key)")
+    conn.commit()
+
 # ============================================================
 # 🎯 Series rank computation (meta-based)
 # ============================================================
@@ -106,6 +135,7 @@ def build_series_rank(top_limit: int = 1000):
             return "D"
 
     grouped["tier"] = grouped["tier_score"].apply(assign_tier)
+    grouped["series_key"] = grouped["series"].map(normalize_series_loose)
 
     # ============================================================
     # 💾 Save to series.db
@@ -113,6 +143,7 @@ def build_series_rank(top_limit: int = 1000):
     with connect_series_db() as conn:
         conn.execute("DROP TABLE IF EXISTS series_rank")
         grouped.to_sql("series_rank", conn, index=False)
+        ensure_series_indexes(conn)
 
     logger.info(f"[✅] Series ranking generated with {len(grouped)} entries.")
     logger.info(f"[💾] Saved to {SERIES_DB_PATH}")
@@ -179,15 +210,94 @@ def get_top_series(limit: int = 10) -> List[Dict]:
     return rows
 
 
+# ============================================================
+# ⚡ Async read API (shared aiosqlite connection, indexed)
+# ============================================================
+
+_SERIES_COLUMNS = "series, avg_meta_rank, characters_in_top, series_score, tier_score, tier"
+
+_series_conn: Optional[aiosqlite.Connection] = None
+_series_conn_lock: Optional[asyncio.Lock] = None
+
+
+async def get_series_conn() -> Optional[aiosqlite.Connection]:
+    """Shared connection to series.db (opened and migrated once per process)."""
+    global _series_conn, _series_conn_lock
+    if _series_conn is not None:
+        return _series_conn
+    if not SERIES_DB_PATH.exists():
+        logger.warning("⚠️ series.db not found.")
+        return None
+    if _series_conn_lock is None:
+        _series_conn_lock = asyncio.Lock()
+    async with _series_conn_lock:
+        if _series_conn is None:
+            # One-off schema check runs off the event loop
+            await asyncio.to_thread(_migrate_series_db)
+            conn = await aiosqlite.connect(SERIES_DB_PATH)
+            conn.row_factory = aiosqlite.Row
+            _series_conn = conn
+    return _series_conn
+
+
+def _migrate_series_db():
+    with connect_series_db() as conn:
+        ensure_series_indexes(conn)
+
+
+async def close_series_conn():
+    global _series_conn
+    if _series_conn is not None:
+        await _series_conn.close()
+        _series_conn = None
+
+
+async def _series_fetch(sql: str, params: tuple) -> List[Dict]:
+    conn = await get_series_conn()
+    if conn is None:
+        return []
+    try:
+        cursor = await conn.execute(sql, params)
+    except sqlite3.OperationalError as e:
+        # series.db was rebuilt by a script without series_key — migrate and retry once
+        logger.warning(f"series.db query failed ({e}); re-checking schema")
+        await asyncio.to_thread(_migrate_series_db)
+        cursor = await conn.execute(sql, params)
+    rows = await cursor.fetchall()
+    await cursor.close()
+    return [dict(r) for r in rows]
+
+
+async def get_series_info_async(series_name: str) -> Optional[Dict]:
+    """Non-blocking series lookup by normalized series key."""
+    rows = await _series_fetch(
+        f"""
+        SELECT {_SERIES_COLUMNS}
+        FROM series_rank
+        WHERE series_key = ?
+        ORDER BY series_score DESC
+        LIMIT 1;
+        """,
+        (normalize_series_loose(series_name),),
+    )
+    return rows[0] if rows else None
+
+
+async def get_top_series_async(limit: int = 10) -> List[Dict]:
+    """Non-blocking top-N series (walks idx_series_rank_score, no sort)."""
+    return await _series_fetch(
+        f"""
+        SELECT {_SERIES_COLUMNS}
+        FROM series_rank
+        ORDER BY series_score DESC
+        LIMIT ?;
+        """,
+        (limit,),
+    )
+
+
 def tier_flavor_label(tier: str) -> str:
-    mapping = {
-        "S": "🌟 **S-TIER Series!** 🌟",
-        "A": "🔥 **A-TIER Series!** 🔥",
-        "B": "⭐ **B-TIER Series** ⭐",
-        "C": "✨ **C-TIER Series** ✨",
-        "D": "💤 **D-TIER Series** 💤",
-    }
-    return mapping.get(tier.upper(), "❔ **Unknown Tier** ❔")
+    return tier_style(tier).flavor
 
 
 def should_dm_user(meta_rank: Optional[float], kakera_value: Optional[float], series_score: Optional[float]) -> bool:
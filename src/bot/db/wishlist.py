@@ -0,0 +1,196 @@
+# ============================================================
+# ⭐ Wishlist — characters / series the owners are chasing
+# ============================================================
+"""
+The wishlist table (mudae.db) is kept in memory as one Aho-Corasick automaton
+(src/bot/utils/aho_corasick.py). A roll is checked with one pass over
+
+    normalize_text(name) + "\\n" + normalize_series_loose(series)
+
+Character entries count only when they fall in the name part and series
+entries only in the series part. Matches are whole-word, so a "Rem" entry
+matches "Rem" and "Rem (Re:Zero)" but not "Remilia". Each entry is normalized
+the same way as the part it is matched against. The cost does not grow with
+the number of entries.
+
+!wish / !wish_series / !unwish change the table and the automaton together.
+A change only inserts or tombstones one pattern; the failure links are rebuilt
+on the next match.
+"""
+import time
+import asyncio
+import logging
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from src.bot.db.database import get_conn, ensure_schema
+from src.bot.utils.aho_corasick import AhoCorasick
+from src.bot.utils.normalization import normalize_text, normalize_series_loose
+
+logger = logging.getLogger("mudae-helper.db.wishlist")
+
+WISH_KINDS = ("character", "series")
+
+
+class WishEntry(NamedTuple):
+    id: int
+    kind: str          # "character" | "series"
+    pattern: str       # normalized, what rolls are matched against
+    display: str       # as the owner typed it
+    added_by: Optional[int]
+    added_at: int
+
+
+def normalize_wish(kind: str, text: str) -> str:
+    """Normalize the way the matching part of a roll is normalized."""
+    if kind == "series":
+        return normalize_series_loose(text) if text and text.strip() else ""
+    return normalize_text(text)
+
+
+def roll_text(name_display: str, series_display: str) -> Tuple[str, int]:
+    """The scanned text and where its series part starts."""
+    name_key = normalize_text(name_display)
+    return f"{name_key}\n{normalize_series_loose(series_display)}", len(name_key) + 1
+
+
+class Wishlist:
+    def __init__(self):
+        self.entries: Dict[int, WishEntry] = {}
+        self._automaton = AhoCorasick()
+        self._by_pattern: Dict[int, List[WishEntry]] = {}    # automaton pattern id → entries
+        self._lock = asyncio.Lock()
+        self.loaded = False
+        self.rolls_checked = 0
+        self.hits = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    # --------------------------------------------------------
+    # In-memory index
+    # --------------------------------------------------------
+    def _index(self, entry: WishEntry):
+        self.entries[entry.id] = entry
+        pid = self._automaton.add(entry.pattern)
+        self._by_pattern.setdefault(pid, []).append(entry)
+
+    def _unindex(self, entry: WishEntry):
+        self.entries.pop(entry.id, None)
+        pid = self._automaton.id_of(entry.pattern)
+        if pid is None:
+            return
+        remaining = [e for e in self._by_pattern.get(pid, []) if e.id != entry.id]
+        if remaining:
+            self._by_pattern[pid] = remaining
+        else:
+            self._by_pattern.pop(pid, None)
+            self._automaton.remove(entry.pattern)
+
+    async def ensure_loaded(self):
+        if self.loaded:
+            return
+        async with self._lock:
+            if self.loaded:
+                return
+            await ensure_schema()
+            conn = await get_conn()
+            try:
+                cursor = await conn.execute(
+                    "SELECT id, kind, pattern, display, added_by, added_at FROM wishlist ORDER BY id"
+                )
+                rows = await cursor.fetchall()
+            finally:
+                await conn.close()
+            for row in rows:
+                self._index(WishEntry(*row))
+            self.loaded = True
+            logger.info(f"Wishlist loaded: {len(self.entries)} entries, {self._automaton.nodes} automaton nodes")
+
+    # --------------------------------------------------------
+    # Changes (DB first, then the automaton)
+    # --------------------------------------------------------
+    async def add(self, kind: str, display: str, added_by: Optional[int] = None) -> Tuple[Optional[WishEntry], bool]:
+        """(entry, created). (None, False) if `display` normalizes to nothing."""
+        if kind not in WISH_KINDS:
+            raise ValueError(f"kind must be one of {WISH_KINDS}")
+        pattern = normalize_wish(kind, display)
+        if not pattern:
+            return None, False
+        await self.ensure_loaded()
+        for entry in self._by_pattern.get(self._automaton.id_of(pattern), []):
+            if entry.kind == kind:
+                return entry, False
+
+        conn = await get_conn()
+        try:
+            cursor = await conn.execute(
+                "INSERT INTO wishlist (kind, pattern, display, added_by, added_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(kind, pattern) DO NOTHING RETURNING id, kind, pattern, display, added_by, added_at",
+                (kind, pattern, display.strip(), added_by, int(time.time())),
+            )
+            row = await cursor.fetchone()
+            await conn.commit()
+        finally:
+            await conn.close()
+        if row is None:  # added by another process since we loaded
+            return None, False
+        entry = WishEntry(*row)
+        self._index(entry)
+        return entry, True
+
+    async def remove(self, key: str) -> List[WishEntry]:
+        """Remove by id (`12` / `#12`) or by text (every kind it matches). Returns what was removed."""
+        await self.ensure_loaded()
+        key = key.strip()
+        if key.lstrip("#").isdigit():
+            targets = [e for e in (self.entries.get(int(key.lstrip("#"))),) if e is not None]
+        else:
+            targets = [e for e in self.entries.values()
+                       if e.pattern == normalize_wish(e.kind, key)]
+        if not targets:
+            return []
+
+        conn = await get_conn()
+        try:
+            await conn.executemany("DELETE FROM wishlist WHERE id = ?", [(e.id,) for e in targets])
+            await conn.commit()
+        finally:
+            await conn.close()
+        for entry in targets:
+            self._unindex(entry)
+        return targets
+
+    # --------------------------------------------------------
+    # Matching
+    # --------------------------------------------------------
+    def match(self, name_display: str, series_display: str) -> List[WishEntry]:
+        """Entries this roll satisfies, in text order (call ensure_loaded() once first)."""
+        if not self.entries:
+            return []
+        self.rolls_checked += 1
+        text, series_start = roll_text(name_display, series_display)
+        found: Dict[int, WishEntry] = {}
+        for start, end, pid in self._automaton.search(text):
+            in_series = start >= series_start
+            for entry in self._by_pattern.get(pid, ()):
+                if (entry.kind == "series") == in_series:
+                    found.setdefault(entry.id, entry)
+        if found:
+            self.hits += 1
+        return list(found.values())
+
+    def stats(self) -> str:
+        kinds = [e.kind for e in self.entries.values()]
+        return (f"{kinds.count('character')} characters, {kinds.count('series')} series | "
+                f"automaton {self._automaton.nodes:,} nodes, {self._automaton.rebuilds} link rebuilds | "
+                f"{self.hits}/{self.rolls_checked} rolls matched")
+
+
+_wishlist: Optional[Wishlist] = None
+
+
+def get_wishlist() -> Wishlist:
+    global _wishlist
+    if _wishlist is None:
+        _wishlist = Wishlist()
+    return _wishlist
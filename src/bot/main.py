@@ -11,6 +11,13 @@ sys.path.append(str(Path(__file__).resolve().parents[2]))
 # --- Project imports ---
 from src.bot.config import DISCORD_TOKEN
 from src.bot.utils.logger import setup_logger
+from src.bot.utils.env_config import get_config_store
+from src.bot.db.series_rank import close_series_conn
+from src.bot.db.database import close_read_conn
+from src.bot.db.rank_history import get_history_recorder
+from src.bot.db.embed_archive import get_embed_archive
+from src.bot.utils.loop_monitor import get_loop_monitor
+from src.bot.metrics_server import start_metrics_server, stop_metrics_server
 
 # --- Setup logger and intents ---
 logger = setup_logger()
@@ -41,11 +48,23 @@ async def on_message(message: discord.Message):
 @bot.event
 async def setup_hook():
     """Load async extensions before the bot becomes ready."""
+    # Loop lag / blocking-call attribution (!loop_lag, logs/loop_lag.json)
+    if get_loop_monitor() is not None:
+        get_loop_monitor().start()
+    # Prometheus /metrics + /healthz on 127.0.0.1:METRICS_PORT (0 = off)
+    await start_metrics_server(bot)
+
     # 🆕 FIXED: Correct import paths
     from src.bot.recommender.recommender_listener_v2 import RecommenderListenerV2
     await bot.add_cog(RecommenderListenerV2(bot))
     from src.bot.recommender.recommender_debug_cog import RecommenderDebugCog
     await bot.add_cog(RecommenderDebugCog(bot))
+    from src.bot.db.backup_cog import BackupCog
+    await bot.add_cog(BackupCog(bot))
+    from src.bot.db.backfill_cog import BackfillCog
+    await bot.add_cog(BackfillCog(bot))
+    from src.bot.recommender.wishlist_cog import WishlistCog
+    await bot.add_cog(WishlistCog(bot))
     logger.info("✅ Recommender listener + debug commands loaded.")
 
 
@@ -53,4 +72,19 @@ async def run_bot():
     """Start the bot safely."""
     if not DISCORD_TOKEN:
         raise RuntimeError("DISCORD_TOKEN missing in environment variables.")
-    await bot.start(DISCORD_TOKEN)
\ No newline at end of file
+    try:
+        await bot.start(DISCORD_TOKEN)
+    finally:
+        # Removes the cogs, so the listener drains its lanes ($im upserts, DMs) before the DBs close
+        if not bot.is_closed():
+            await bot.close()
+        await stop_metrics_server()
+        # Don't lose threshold changes still waiting on the .env debounce
+        await get_config_store().flush()
+        await get_history_recorder().flush()
+        if get_embed_archive() is not None:
+            await get_embed_archive().flush()
+        if get_loop_monitor() is not None:
+            await get_loop_monitor().stop()
+        await close_series_conn()
+        await close_read_conn()
@@ -0,0 +1,230 @@
+# src/bot/metrics_server.py
+"""
+Local /metrics (Prometheus text) and /healthz endpoint on the bot's own loop.
+
+Started from setup_hook with aiohttp (already a discord.py dependency). Binds to
+METRICS_HOST:METRICS_PORT (default 127.0.0.1:9108); METRICS_PORT=0 turns it
+off. The counters and histograms are updated on the hot paths
+(src/bot/utils/metrics.py). Everything below is read only when Prometheus
+scrapes, so an idle endpoint costs nothing.
+
+    curl -s localhost:9108/metrics | grep mudae_
+    curl -s localhost:9108/healthz
+"""
+import os
+import math
+import time
+import asyncio
+import logging
+from typing import Iterable, List, Optional
+
+from aiohttp import web
+
+from src.bot.utils.metrics import Family, counter_family, gauge, register_collector, render_text
+
+logger = logging.getLogger("mudae-helper.metrics")
+
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", 9108))
+
+_started = time.time()
+
+
+# ============================================================
+# 📡 Scrape-time collectors
+# ============================================================
+def _listener_families(bot) -> Iterable[Family]:
+    cog = bot.get_cog("RecommenderListenerV2")
+    if cog is None:
+        return []
+    families = [counter_family(
+        "mudae_listener_events_total",
+        "Listener pipeline events by stage (seen, filtered, parsed, evaluated, DMed, edits)",
+        [({"event": k}, v) for k, v in sorted(cog.counters.items())],
+    )]
+    caches = {"message_ids": cog.processed, "alert_cooldown": cog.alert_cooldown}
+    families += [
+        counter_family("mudae_cache_hits_total", "Cache hits",
+                       [({"cache": n}, c.hits) for n, c in caches.items()]),
+        counter_family("mudae_cache_misses_total", "Cache misses",
+                       [({"cache": n}, c.misses) for n, c in caches.items()]),
+        counter_family("mudae_cache_evictions_total", "Entries expired or evicted",
+                       [({"cache": n}, c.evictions) for n, c in caches.items()]),
+        gauge("mudae_cache_entries", "Live cache entries", [({"cache": n}, len(c)) for n, c in caches.items()]),
+    ]
+    lanes = cog.lanes.lanes.values()
+    families += [
+        gauge("mudae_lane_depth", "Lane jobs queued or running", [({"lane": l.name}, l.depth) for l in lanes]),
+        counter_family("mudae_lane_jobs_total", "Lane jobs finished", [({"lane": l.name}, l.completed) for l in lanes]),
+        counter_family("mudae_lane_failures_total", "Lane jobs that raised", [({"lane": l.name}, l.failed) for l in lanes]),
+        counter_family("mudae_lane_slo_misses_total", "Jobs finished later than the lane SLO after receipt",
+                       [({"lane": l.name}, l.slo_misses) for l in lanes if l.slo is not None]),
+    ]
+    return families
+
+
+def _lru_families() -> Iterable[Family]:
+    from src.bot.utils.normalization import _normalize_text, _normalize_series_loose
+    from src.bot.recommender.dm_payload import _static_parts
+    infos = {
+        "normalize_text": _normalize_text.cache_info(),
+        "normalize_series_loose": _normalize_series_loose.cache_info(),
+        "dm_payload": _static_parts.cache_info(),
+    }
+    return [
+        counter_family("mudae_lru_hits_total", "functools.lru_cache hits", [({"cache": n}, i.hits) for n, i in infos.items()]),
+        counter_family("mudae_lru_misses_total", "functools.lru_cache misses", [({"cache": n}, i.misses) for n, i in infos.items()]),
+        gauge("mudae_lru_entries", "functools.lru_cache size", [({"cache": n}, i.currsize) for n, i in infos.items()]),
+    ]
+
+
+def _db_families() -> Iterable[Family]:
+    from src.bot.db import database, series_rank
+    from src.bot.db.rank_history import get_history_recorder
+    from src.bot.db.embed_archive import get_embed_archive
+    from src.bot.utils.env_config import get_config_store
+
+    conns = {"mudae_read": database._read_conn, "series": series_rank._series_conn}
+    open_samples, queue_samples = [], []
+    for name, conn in conns.items():
+        open_samples.append(({"db": name}, 1 if conn is not None else 0))
+        # aiosqlite runs every call through one worker thread fed by this queue
+        tx = getattr(conn, "_tx", None)
+        queue_samples.append(({"db": name}, tx.qsize() if tx is not None else 0))
+
+    archive = get_embed_archive()
+    pending = [({"buffer": "rank_history"}, get_history_recorder().pending),
+               ({"buffer": "config_env"}, get_config_store().pending)]
+    if archive is not None:
+        pending.append(({"buffer": "embed_archive"}, archive.pending))
+
+    families = [
+        gauge("mudae_db_connection_open", "Shared aiosqlite connection is open", open_samples),
+        gauge("mudae_db_queue_depth", "Calls waiting on the aiosqlite worker thread", queue_samples),
+        gauge("mudae_write_buffer_depth", "Rows / records waiting for a background flush", pending),
+    ]
+    if archive is not None:
+        families.append(counter_family("mudae_embed_archive_records_total", "Embeds written to the archive",
+                                       [({}, archive.records_written)]))
+
+    try:
+        age = time.time() - os.stat(series_rank.SERIES_DB_PATH).st_mtime
+    except OSError:
+        age = None
+    families.append(gauge("mudae_series_rank_age_seconds", "Seconds since series.db was last rebuilt", [({}, age)]))
+    return families
+
+
+def _progress_families(bot) -> Iterable[Family]:
+    from src.bot.scraper import ACTIVE_SCRAPERS
+
+    pages = []
+    for scraper in list(ACTIVE_SCRAPERS):
+        for list_type, session in scraper.sessions.items():
+            pages += [
+                ({"list": list_type, "state": "ingested"}, bin(session.ingested).count("1")),
+                ({"list": list_type, "state": "buffered"}, len(session.buffer)),
+                ({"list": list_type, "state": "total"}, session.total_pages),
+                ({"list": list_type, "state": "duplicates"}, session.duplicates),
+            ]
+    families = [gauge("mudae_scraper_pages", "$top / $topl scrape progress per list", pages)]
+
+    cog = bot.get_cog("BackfillCog")
+    stats = getattr(cog, "stats", None)
+    if stats is not None:
+        families.append(gauge("mudae_backfill_progress", "Current / last !backfill run", [
+            ({"field": "scanned"}, stats.scanned), ({"field": "mudae_embeds"}, stats.mudae_embeds),
+            ({"field": "im_updates"}, stats.im_updates), ({"field": "new"}, stats.new),
+            ({"field": "updated"}, stats.updated), ({"field": "stale"}, stats.stale),
+            ({"field": "running"}, 0 if stats.done else 1),
+        ]))
+    return families
+
+
+def _runtime_families(bot) -> Iterable[Family]:
+    from src.bot.utils.loop_monitor import get_loop_monitor
+
+    latency = bot.latency if bot.is_ready() and not math.isnan(bot.latency) else None
+    families = [
+        gauge("mudae_up", "Bot connected to the gateway", [({}, 1 if bot.is_ready() and not bot.is_closed() else 0)]),
+        gauge("mudae_gateway_latency_seconds", "Heartbeat latency", [({}, latency)]),
+        gauge("mudae_uptime_seconds", "Seconds since the metrics server started", [({}, time.time() - _started)]),
+        gauge("mudae_asyncio_tasks", "Tasks alive on the event loop", [({}, len(asyncio.all_tasks()))]),
+    ]
+    monitor = get_loop_monitor()
+    if monitor is not None and monitor.started_at is not None:
+        p = monitor.percentiles()
+        families += [
+            gauge("mudae_loop_lag_seconds", "Event-loop lag over the monitor window",
+                  [({"quantile": q}, p[f"{k}_ms"] / 1000) for q, k in (("0.5", "p50"), ("0.9", "p90"), ("0.99", "p99"), ("1", "max"))]),
+            counter_family("mudae_loop_stalls_total", "Callbacks that blocked the loop past the threshold",
+                           [({}, monitor.stalls_total)]),
+        ]
+    return families
+
+
+# ============================================================
+# 🌐 HTTP server
+# ============================================================
+class MetricsServer:
+    def __init__(self, bot, host: str = METRICS_HOST, port: int = METRICS_PORT):
+        self.bot = bot
+        self.host, self.port = host, port
+        self._runner: Optional[web.AppRunner] = None
+
+    def _collect_bot(self) -> List[Family]:
+        return [*_listener_families(self.bot), *_progress_families(self.bot), *_runtime_families(self.bot)]
+
+    async def _metrics(self, request: web.Request) -> web.Response:
+        return web.Response(text=render_text(), content_type="text/plain", charset="utf-8",
+                            headers={"X-Content-Type-Options": "nosniff"})
+
+    async def _healthz(self, request: web.Request) -> web.Response:
+        ready = self.bot.is_ready() and not self.bot.is_closed()
+        body = {"status": "ok" if ready else "starting", "user": str(self.bot.user) if self.bot.user else None,
+                "latency_ms": round(self.bot.latency * 1000, 1) if ready else None,
+                "uptime_s": round(time.time() - _started)}
+        return web.json_response(body, status=200 if ready else 503)
+
+    async def start(self):
+        register_collector(self._collect_bot)
+        register_collector(_lru_families)
+        register_collector(_db_families)
+
+        app = web.Application()
+        app.router.add_get("/metrics", self._metrics)
+        app.router.add_get("/healthz", self._healthz)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"Metrics on http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+_server: Optional[MetricsServer] = None
+
+
+async def start_metrics_server(bot) -> Optional[MetricsServer]:
+    """Start once per process; None when METRICS_PORT=0 or the port is taken."""
+    global _server
+    if METRICS_PORT <= 0 or _server is not None:
+        return _server
+    server = MetricsServer(bot)
+    try:
+        await server.start()
+    except OSError as e:
+        logger.error(f"Metrics endpoint not started on {METRICS_HOST}:{METRICS_PORT}: {e}")
+        return None
+    _server = server
+    return _server
+
+
+async def stop_metrics_server():
+    global _server
+    if _server is not None:
+        await _server.stop()
+        _server = None
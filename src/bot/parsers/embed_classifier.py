@@ -0,0 +1,231 @@
+# src/bot/parsers/embed_classifier.py
+"""
+One precompiled keyword classifier for every "is this keyword in that field"
+check on a Mudae message.
+
+Used to be separate `any(k in text for k in [...])` chains, scattered over the
+listener and parse_im_embed. Now every rule lives in RULES, and one classify()
+call returns all matched categories as a bit mask. The two claimed lists stay
+two categories: CLAIM_PHRASE lets an embed through the roll gate, CLAIMED
+(the full CLAIMED_KEYWORDS, title included) makes the roll DM unconditionally:
+
+    labels = EMBED_CLASSIFIER.classify(title=..., description=..., footer=...)
+    if labels & CLAIMED: ...
+
+At build time every (field, keyword) pair is merged into one table per field,
+with the OR of the categories it proves. classify() walks each given field's
+table once and skips a keyword as soon as all of its categories are already
+known. Prefix rules (utility commands) are a single str.startswith(tuple) per
+category.
+
+Why not a single automaton pass (src/bot/utils/aho_corasick.py)? These
+tables are ~25 short keywords over ~150 characters, so a per-character
+Python loop costs more than a few C-level substring searches.
+`python -m src.bot.parsers.embed_classifier` measures the legacy chain, this
+table, the automaton and a regex alternation side by side. The automaton only
+pays off with hundreds of patterns, as in the wishlist.
+"""
+from typing import Dict, Iterable, List, Tuple
+
+from src.bot.recommender.rules_engine import CLAIMED_KEYWORDS
+
+# ============================================================
+# 🏷️ Categories (bit flags)
+# ============================================================
+REJECT_TITLE = 1 << 0      # leaderboard / roulette / daily embed, by title
+REJECT_AUTHOR = 1 << 1     # same, by author line
+SERIES_FILTER = 1 << 2     # first description line is a stats line, not a series
+CLAIMED = 1 << 3           # "belongs to", "💍", … anywhere claimed: the unconditional-DM flag
+NEW_ROLL = 1 << 4          # "react with any emoji to claim"
+UTILITY = 1 << 5           # message content starts with a Mudae utility command
+ROLL_COMMAND = 1 << 6      # message content contains a roll command ($wa, $mx, …)
+CLAIM_PHRASE = 1 << 7      # the roll gate's narrower claimed check (3 phrases, description / footer)
+
+LABEL_NAMES = {
+    REJECT_TITLE: "reject_title", REJECT_AUTHOR: "reject_author", SERIES_FILTER: "series_filter",
+    CLAIMED: "claimed", NEW_ROLL: "new_roll", UTILITY: "utility", ROLL_COMMAND: "roll_command",
+    CLAIM_PHRASE: "claim_phrase",
+}
+
+# Fields are passed lowercased; series_line is parse_im_embed's cleaned first description line
+FIELDS = ("title", "author", "description", "footer", "series_line", "content")
+
+ROLL_COMMANDS = ("$wa", "$wg", "$ha", "$hg", "$ma", "$mg", "$mx", "$waifu")
+UTILITY_COMMANDS = ("$top", "$mm", "$tu", "$help", "$info", "$note", "$bonus", "$dk", "$rt")
+# Lets an embed through the listener's roll gate. Deliberately narrower than
+# CLAIMED_KEYWORDS: a stray 💍 / "has claimed" embed is not a roll.
+CLAIM_PHRASES = ("belongs to", "is married to", "claimed by")
+
+# (category, fields, keywords, prefix-only)
+RULES: Tuple[Tuple[int, Tuple[str, ...], Tuple[str, ...], bool], ...] = (
+    (REJECT_TITLE, ("title",), ("top", "roulette", "daily", "ranking", "claim rank", "like rank"), False),
+    (REJECT_AUTHOR, ("author",), ("top", "roulette", "daily", "ranking"), False),
+    (SERIES_FILTER, ("series_line",), ("roulette", "claim", "rank", "like", "kakera"), False),
+    (CLAIMED, ("description", "footer", "title"), CLAIMED_KEYWORDS, False),
+    (CLAIM_PHRASE, ("description", "footer"), CLAIM_PHRASES, False),
+    (NEW_ROLL, ("description",), ("react with any emoji to claim",), False),
+    (ROLL_COMMAND, ("content",), ROLL_COMMANDS, False),
+    (UTILITY, ("content",), UTILITY_COMMANDS, True),
+)
+
+
+class KeywordClassifier:
+    def __init__(self, rules: Iterable[Tuple[int, Tuple[str, ...], Tuple[str, ...], bool]]):
+        substr: Dict[str, Dict[str, int]] = {}
+        prefix: Dict[str, Dict[int, List[str]]] = {}
+        for category, fields, keywords, prefix_only in rules:
+            for field in fields:
+                if field not in FIELDS:
+                    raise ValueError(f"unknown field {field!r}")
+                for kw in keywords:
+                    if prefix_only:
+                        prefix.setdefault(field, {}).setdefault(category, []).append(kw)
+                    else:
+                        table = substr.setdefault(field, {})
+                        table[kw] = table.get(kw, 0) | category
+        # (keyword, categories) — a keyword shared by several categories is searched once
+        self._substr = {f: tuple(t.items()) for f, t in substr.items()}
+        self._prefix = {f: tuple((c, tuple(kws)) for c, kws in t.items()) for f, t in prefix.items()}
+
+    def classify(self, **fields: str) -> int:
+        """OR of every category whose keyword appears in its field (fields already lowercased)."""
+        found = 0
+        for field, text in fields.items():
+            if not text:
+                continue
+            for kw, mask in self._substr.get(field, ()):
+                if mask & ~found and kw in text:
+                    found |= mask
+            for mask, prefixes in self._prefix.get(field, ()):
+                if mask & ~found and text.startswith(prefixes):
+                    found |= mask
+        return found
+
+    @staticmethod
+    def names(labels: int) -> List[str]:
+        return [name for bit, name in LABEL_NAMES.items() if labels & bit]
+
+
+EMBED_CLASSIFIER = KeywordClassifier(RULES)
+
+
+# ============================================================
+# 🧪 Legacy chain vs. classifier vs. single-pass alternatives
+# ============================================================
+if __name__ == "__main__":
+    import re
+    import time
+    import random
+    from bisect import bisect_right
+
+    from src.bot.utils.aho_corasick import AhoCorasick
+
+    def legacy(title, author, description, footer, series_line, content):
+        """The checks exactly as the listener / parse_im_embed used to run them."""
+        labels = 0
+        if any(k in title for k in ["top", "roulette", "daily", "ranking", "claim rank", "like rank"]):
+            labels |= REJECT_TITLE
+        if any(k in author for k in ["top", "roulette", "daily", "ranking"]):
+            labels |= REJECT_AUTHOR
+        if any(k in series_line for k in ("roulette", "claim", "rank", "like", "kakera")):
+            labels |= SERIES_FILTER
+        if any(p in description or p in footer for p in ["belongs to", "is married to", "claimed by"]):
+            labels |= CLAIM_PHRASE
+        if any(p in description for p in ["react with any emoji to claim", "react with any emoji to claim!"]):
+            labels |= NEW_ROLL
+        for kw in ("belongs to", "is married to", "claimed by", "has claimed", "💍"):   # is_claimed_embed
+            if kw in description or kw in footer or kw in title:
+                labels |= CLAIMED
+                break
+        if any(content.startswith(cmd) for cmd in ["$top", "$mm", "$tu", "$help", "$info", "$note", "$bonus", "$dk", "$rt"]):
+            labels |= UTILITY
+        if any(cmd in content for cmd in ["$wa", "$wg", "$ha", "$hg", "$ma", "$mg", "$mx", "$waifu"]):
+            labels |= ROLL_COMMAND
+        return labels
+
+    # Single pass over all fields joined by \0: automaton and regex alternation
+    segment_masks: Dict[Tuple[str, int], int] = {}
+    for category, fields, keywords, prefix_only in RULES:
+        for field in fields:
+            for kw in keywords:
+                key = (kw, FIELDS.index(field))
+                segment_masks[key] = segment_masks.get(key, 0) | category
+    prefix_keys = {(kw, FIELDS.index(f)) for c, fs, kws, p in RULES if p for f in fs for kw in kws}
+    automaton = AhoCorasick()
+    for kw, _ in segment_masks:
+        automaton.add(kw)
+    alternation = re.compile("|".join(re.escape(k) for k in sorted({k for k, _ in segment_masks}, key=len, reverse=True)))
+    # finditer() never overlaps: a "claim rank" hit must also prove the "claim" / "rank" it contains
+    closure = {}
+    for kw in {k for k, _ in segment_masks}:
+        for seg in range(len(FIELDS)):
+            mask = segment_masks.get((kw, seg), 0)
+            for (k2, s2), m in segment_masks.items():
+                if s2 == seg and k2 in kw and (k2, s2) not in prefix_keys:
+                    mask |= m
+            closure[(kw, seg)] = mask
+
+    def _resolve(hits, values, masks=segment_masks):
+        labels, bounds, pos = 0, [], 0
+        for v in values:
+            bounds.append(pos)
+            pos += len(v) + 1
+        for start, kw in hits:
+            seg = bisect_right(bounds, start) - 1
+            if (kw, seg) in prefix_keys and start != bounds[seg]:
+                continue
+            labels |= masks.get((kw, seg), 0)
+        return labels
+
+    def single_pass_automaton(*values):
+        text = "\0".join(values)
+        return _resolve([(s, automaton.pattern(pid)) for s, _, pid in automaton.iter_matches(text)], values)
+
+    def single_pass_regex(*values):
+        text = "\0".join(values)
+        return _resolve([(m.start(), m.group()) for m in alternation.finditer(text)], values, closure)
+
+    def classifier(title, author, description, footer, series_line, content):
+        return EMBED_CLASSIFIER.classify(title=title, author=author, description=description, footer=footer,
+                                         series_line=series_line, content=content)
+
+    rng = random.Random(0)
+    kakera = "**{}**<:kakera:469835869059153940>"
+    samples = [
+        # unclaimed roll
+        lambda: ("", "megumin", f"kono subarashii sekai ni shukufuku wo!\nreact with any emoji to claim!\n{kakera.format(rng.randint(30, 900))}",
+                 "", "kono subarashii sekai ni shukufuku wo!", ""),
+        # claimed roll
+        lambda: ("", "2d", f"gorillaz\n{kakera.format(rng.randint(30, 900))}", "belongs to someone ~~ 2 / 3", "gorillaz", ""),
+        # $im result
+        lambda: ("", "rem", f"re:zero kara hajimeru isekai seikatsu\nanimanga roulette · {kakera.format(rng.randint(30, 9000))}\n"
+                             f"claim rank: #{rng.randint(1, 9999)}\nlike rank: #{rng.randint(1, 9999)}",
+                 "belongs to someone", "re:zero kara hajimeru isekai seikatsu", "$im rem"),
+        # stats line where the series should be
+        lambda: ("", "emilia", "claim rank: #42 · like rank: #17\nre:zero", "", "claim rank: #42 · like rank: #17", ""),
+        # $top page
+        lambda: ("top 15 — claim rank", "", "#1 - rem\n#2 - megumin\n#3 - 2d", "page 1 / 100", "#1 - rem", "$top"),
+        # claimed keyword but no roll phrase (must not pass the roll gate)
+        lambda: ("💍 wedding", "", "someone has claimed a spouse", "", "someone has claimed a spouse", ""),
+    ]
+    embeds = [rng.choice(samples)() for _ in range(20_000)]
+    for e in embeds:
+        assert classifier(*e) == legacy(*e) == single_pass_automaton(*e) == single_pass_regex(*e), e
+
+    def bench(fn) -> float:
+        best = float("inf")
+        for _ in range(5):
+            t0 = time.perf_counter()
+            for e in embeds:
+                fn(*e)
+            best = min(best, time.perf_counter() - t0)
+        return best / len(embeds) * 1e6
+
+    timings = {label: bench(fn) for label, fn in (
+        ("legacy any() chain", legacy), ("EMBED_CLASSIFIER", classifier),
+        ("single-pass Aho-Corasick", single_pass_automaton), ("single-pass regex", single_pass_regex),
+    )}
+    base = timings["legacy any() chain"]
+    print(f"[🏷️] {len(embeds):,} messages, {sum(len(k) for k, _ in segment_masks)} keyword chars, labels identical across all four")
+    for label, us in timings.items():
+        print(f"    {label:<26} {us:6.2f} µs/message  ({base / us:4.2f}× legacy speed)")
@@ -1,6 +1,10 @@
 # src/bot/parsers/im_parser.py
 import re
 import logging
+from typing import Optional
+
+from src.bot.utils.character import Character, EMPTY_CHARACTER
+from src.bot.parsers.embed_classifier import EMBED_CLASSIFIER, REJECT_TITLE, REJECT_AUTHOR, SERIES_FILTER
 
 logger = logging.getLogger("mudae-helper.parser.im")
 
@@ -23,10 +27,66 @@ def _parse_int_with_commas(s: str):
         return None
 
 
-def parse_im_embed(embed):
+_KAKERA_PATTERNS = [
+    re.compile(p, re.IGNORECASE) for p in (
+        r'(\d{1,3}(?:,\d{3})*)\s*[💎♦]',
+        r'[💎♦]\s*(\d{1,3}(?:,\d{3})*)',
+        r'(\d{1,3}(?:,\d{3})*)\s*<:kakera:',
+        r'roulette\s*[•-]?\s*(\d{1,3}(?:,\d{3})*)',
+    )
+]
+_KAKERA_NEAR_RE = re.compile(r'(\d{1,3}(?:,\d{3})*|\d{1,4})')
+
+
+def extract_kakera(desc: str):
+    """Multi-pass kakera value from an embed description, or None."""
+    desc = desc or ""
+    for pat in _KAKERA_PATTERNS:
+        m = pat.search(desc)
+        if m:
+            return _parse_int_with_commas(m.group(1))
+
+    pos = desc.find("💎") if "💎" in desc else desc.find("♦")
+    if pos != -1:
+        snippet = desc[max(0, pos - 30):pos + 30]
+        for n in _KAKERA_NEAR_RE.findall(snippet):
+            val = _parse_int_with_commas(n)
+            if val and 10 <= val <= 50000:
+                return val
+    return None
+
+
+def _first_line(desc: str) -> str:
+    for line in desc.splitlines():
+        line = line.strip()
+        if line:
+            return line
+    return ""
+
+
+def classify_embed(embed, content: str = "") -> int:
+    """
+    EMBED_CLASSIFIER labels for an embed's title / author / description /
+    footer / series line, plus the message content when given. One call per
+    message; parse_im_embed and the listener both read the result.
+    """
+    title = getattr(embed, "title", "") or ""
+    author = (getattr(embed.author, "name", "") or "") if getattr(embed, "author", None) else ""
+    desc = embed.description or ""
+    footer = (embed.footer.text or "") if embed.footer else ""
+    return EMBED_CLASSIFIER.classify(
+        title=title.lower().strip(), author=author.lower().strip(),
+        description=desc.lower(), footer=footer.lower(),
+        series_line=_clean_emoji_and_tags(_first_line(desc)).lower(), content=content,
+    )
+
+
+def parse_im_embed(embed, labels: Optional[int] = None):
     """
     Robust parser for Mudae $im embeds.
-    Returns dict: {name, series, kakera_value, claim_rank, like_rank}
+    Returns a Character (name, series, kakera_value, claim_rank, like_rank);
+    EMPTY_CHARACTER for non-character embeds. `labels` is classify_embed(embed)
+    when the caller already has it.
     """
 
     # Optional debug of raw embed structure
@@ -45,15 +105,15 @@ def parse_im_embed(embed):
     # --- Early guard: reject non-character embeds ---
     title_text = getattr(embed, "title", "") or ""
     author_text = getattr(embed.author, "name", "") if getattr(embed, "author", None) else ""
-    title_low = title_text.lower().strip()
-    author_low = author_text.lower().strip()
+    if labels is None:
+        labels = classify_embed(embed)
 
-    if any(k in title_low for k in ["top", "roulette", "daily", "ranking", "claim rank", "like rank"]):
+    if labels & REJECT_TITLE:
         logger.debug(f"Rejected non-character embed by title: {title_text}")
-        return {"name": None, "series": None, "kakera_value": None, "claim_rank": None, "like_rank": None}
-    if any(k in author_low for k in ["top", "roulette", "daily", "ranking"]):
+        return EMPTY_CHARACTER
+    if labels & REJECT_AUTHOR:
         logger.debug(f"Rejected non-character embed by author: {author_text}")
-        return {"name": None, "series": None, "kakera_value": None, "claim_rank": None, "like_rank": None}
+        return EMPTY_CHARACTER
 
     # --- Character name ---
     if author_text:
@@ -70,7 +130,7 @@ def parse_im_embed(embed):
         if (
             first_line
             and len(first_line) > 2
-            and not any(k in first_line.lower() for k in ("roulette", "claim", "rank", "like", "kakera"))
+            and not labels & SERIES_FILTER
             and not re.search(r"\b\d{17,20}\b", first_line)
         ):
             if first_line.lower() != char_name.lower():
@@ -79,28 +139,7 @@ def parse_im_embed(embed):
                 logger.debug("Series line equals character name — will handle as self-titled later.")
 
     # --- Kakera extraction (multi-pass) ---
-    kakera_patterns = [
-        r'(\d{1,3}(?:,\d{3})*)\s*[💎♦]',
-        r'[💎♦]\s*(\d{1,3}(?:,\d{3})*)',
-        r'(\d{1,3}(?:,\d{3})*)\s*<:kakera:',
-        r'roulette\s*[•-]?\s*(\d{1,3}(?:,\d{3})*)'
-    ]
-    for pat in kakera_patterns:
-        m = re.search(pat, desc, re.IGNORECASE)
-        if m:
-            kakera_value = _parse_int_with_commas(m.group(1))
-            break
-
-    if kakera_value is None:
-        pos = desc.find("💎") if "💎" in desc else desc.find("♦")
-        if pos != -1:
-            snippet = desc[max(0, pos - 30):pos + 30]
-            nums = re.findall(r'(\d{1,3}(?:,\d{3})*|\d{1,4})', snippet)
-            for n in nums:
-                val = _parse_int_with_commas(n)
-                if val and 10 <= val <= 50000:
-                    kakera_value = val
-                    break
+    kakera_value = extract_kakera(desc)
 
     # --- Claim & Like ranks ---
     match_claim = re.search(r"Claim\s*Rank\s*:\s*#?\s*([\d,]+)", desc, re.IGNORECASE)
@@ -118,7 +157,7 @@ def parse_im_embed(embed):
     # --- Sanity: skip clearly invalid embeds ---
     if not char_name or not series or not re.search(r"[A-Za-z]", char_name):
         logger.debug("Rejected invalid or empty embed: %r | %r", char_name, series)
-        return {"name": None, "series": None, "kakera_value": None, "claim_rank": None, "like_rank": None}
+        return EMPTY_CHARACTER
 
     # --- Log final parse result ---
     logger.info(
@@ -126,10 +165,19 @@ def parse_im_embed(embed):
         f"Kakera={kakera_value}, ClaimRank={claim_rank}, LikeRank={like_rank}"
     )
 
-    return {
-        "name": char_name.strip(),
-        "series": series.strip(),
-        "kakera_value": kakera_value,
-        "claim_rank": claim_rank,
-        "like_rank": like_rank,
-    }
+    return Character(char_name.strip(), series.strip(), kakera_value, claim_rank, like_rank)
+
+
+def im_update_from_parsed(parsed):
+    """
+    The parsed Character when it is an $im result, or None when the parse
+    carries no kakera/rank data (rolls and utility embeds).
+    """
+    if not parsed or not parsed.name_display or not parsed.has_stats:
+        return None
+    return parsed
+
+
+def extract_im_update(embed):
+    """parse_im_embed + im_update_from_parsed — the listener's $im path in one call."""
+    return im_update_from_parsed(parse_im_embed(embed))
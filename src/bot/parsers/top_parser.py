@@ -0,0 +1,99 @@
+# src/bot/parsers/top_parser.py
+"""
+Parser for Mudae $top / $topl pages — shared by the live scraper and by file
+imports of data/tops_*.txt, so both paths produce identical entries.
+
+Every supported line layout is matched by ONE compiled pattern:
+    "#1 - Name - Series"   "1. Name — Series"   "1) Name – Series"   "1 - Name - Series"
+(the old per-embed pattern list tried three regexes in turn, but the second
+and third only ever matched lines the first one already accepted).
+
+Entries are plain (rank, name_display, series_display) tuples.
+"""
+import re
+import logging
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+logger = logging.getLogger("mudae-helper.parser.top")
+
+TopEntry = Tuple[int, str, str]
+
+# rank · separator · name (lazy) · dash · series
+_TOP_LINE_RE = re.compile(
+    r"""
+    \#?\s*(\d{1,4})     # rank, optional '#'
+    \s*[-.)]\s*         # "1 -" | "1." | "1)"
+    (.*?)               # character name
+    \s*[-–—]\s*         # hyphen, en dash or em dash
+    (.+)$               # series
+    """,
+    re.VERBOSE,
+)
+_EMOJI_TAG_RE = re.compile(r"<:[^>]+>")
+_FOOTER_PAGE_RE = re.compile(r"(\d{1,3})\s*(?:/|of)\s*(\d{1,3})")
+_INVISIBLE = str.maketrans({"\u200b": None, "\xa0": " "})
+
+# Lines shorter than this can't hold "1 - A - B"
+MIN_LINE_LENGTH = 6
+
+
+def parse_top_lines(lines: Iterable[str]) -> List[TopEntry]:
+    """Parse raw top-list lines; non-entry lines are skipped."""
+    match = _TOP_LINE_RE.match
+    out: List[TopEntry] = []
+    append = out.append
+    for line in lines:
+        line = line.strip()
+        if len(line) < MIN_LINE_LENGTH:
+            continue
+        m = match(line)
+        if not m:
+            continue
+        rank, name, series = m.groups()
+        if "<:" in name:
+            name = _EMOJI_TAG_RE.sub("", name)
+        if "<:" in series:
+            series = _EMOJI_TAG_RE.sub("", series)
+        append((int(rank), name.strip(), series.strip()))
+    return out
+
+
+def parse_footer_page(footer_text: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    """'Page 3 / 67' → (3, 67); (None, None) when there is no page marker."""
+    if not footer_text:
+        return None, None
+    m = _FOOTER_PAGE_RE.search(footer_text)
+    if not m:
+        return None, None
+    return int(m.group(1)), int(m.group(2))
+
+
+def embed_text(embed) -> str:
+    """Title, description and field names/values of an embed, one block per line."""
+    parts = []
+    if embed.title:
+        parts.append(embed.title)
+    if embed.description:
+        parts.append(embed.description)
+    for f in getattr(embed, "fields", None) or ():
+        if f.name:
+            parts.append(f.name)
+        if f.value:
+            parts.append(f.value)
+    return "\n".join(parts).translate(_INVISIBLE)
+
+
+def parse_top_embed(embed) -> Tuple[Optional[int], Optional[int], List[TopEntry]]:
+    """Return (page, total_pages, entries) for a Mudae top-list embed."""
+    footer = getattr(embed, "footer", None)
+    page, total = parse_footer_page(getattr(footer, "text", None) if footer else None)
+    return page, total, parse_top_lines(embed_text(embed).splitlines())
+
+
+def parse_top_file(path) -> List[TopEntry]:
+    """Parse a saved top list (one entry per line, e.g. data/tops_claimed.txt)."""
+    with open(Path(path), "r", encoding="utf-8") as f:
+        entries = parse_top_lines(f.read().translate(_INVISIBLE).splitlines())
+    logger.debug(f"Parsed {len(entries)} entries from {path}")
+    return entries
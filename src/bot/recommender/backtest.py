@@ -0,0 +1,321 @@
+# ============================================================
+# 📈 Threshold Backtester — replay rolls through the DM logic
+# ============================================================
+"""
+Replays the `characters` table (or a recorded roll log) through the same
+DM decision used by RecommenderListenerV2.on_message and sweeps
+KAKERA_THRESHOLD / META_RANK_THRESHOLD / DM_TIER_THRESHOLD grids.
+
+Usage:
+    python -m src.bot.recommender.backtest --kakera 50:500:25 --meta 500:10000:500
+    python -m src.bot.recommender.backtest --log data/roll_log.jsonl --tiers S,A,B
+"""
+import sys
+import json
+import time
+import sqlite3
+import logging
+import argparse
+from pathlib import Path
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+
+from src.bot.db.series_rank import MUDAE_DB_PATH, SERIES_DB_PATH
+from src.bot.utils.normalization import normalize_series_loose
+from src.bot.recommender.rules_engine import (
+    TIER_VALUES, DEFAULT_REQUIRED_TIER_VALUE, RulesEngine, RollFacts, compute_meta_rank, to_int,
+)
+
+logger = logging.getLogger("mudae-helper.backtest")
+
+# "Worth a DM" ground truth used when a roll log carries no label
+DEFAULT_GOOD_META = 1000
+DEFAULT_GOOD_KAKERA = 300
+
+_META_UNKNOWN = np.iinfo(np.int64).max
+
+
+# ============================================================
+# 🧩 Roll container
+# ============================================================
+
+@dataclass
+class RollSet:
+    """Column-oriented rolls; 0 means "unknown" for kakera/meta like in on_message."""
+    names: List[str]
+    kakera: np.ndarray      # int64
+    meta: np.ndarray        # int64
+    tier_val: np.ndarray    # int8
+    claimed: np.ndarray     # bool
+    label: np.ndarray       # bool — ground truth "this roll deserved a DM"
+
+    def __len__(self):
+        return len(self.names)
+
+
+def _load_series_tiers(series_db_path: Path = SERIES_DB_PATH) -> Dict[str, str]:
+    """Map normalized series key → tier, the same key get_series_info_async matches on."""
+    if not Path(series_db_path).exists():
+        logger.warning("⚠️ series.db not found — every series evaluates as Unknown.")
+        return {}
+    with sqlite3.connect(series_db_path) as conn:
+        rows = conn.execute("SELECT series, tier FROM series_rank ORDER BY series_score DESC").fetchall()
+    tiers = {}
+    for series, tier in rows:
+        if series:
+            tiers.setdefault(normalize_series_loose(series), tier)
+    return tiers
+
+
+def _build_rollset(records: Iterable[dict], tiers: Dict[str, str],
+                   good_meta: int, good_kakera: int) -> RollSet:
+    names, kakera, meta, tier_val, claimed, label = [], [], [], [], [], []
+    for r in records:
+        k = to_int(r.get("kakera_value"))
+        m = compute_meta_rank(to_int(r.get("claim_rank")), to_int(r.get("like_rank")))
+        tier = r.get("series_tier") or tiers.get(normalize_series_loose(r.get("series_display") or "Unknown"), "Unknown")
+
+        if r.get("label") is not None:
+            good = bool(r["label"])
+        else:
+            good = bool((m and m <= good_meta) or (k and k >= good_kakera))
+
+        names.append(r.get("name_display") or "Unknown")
+        kakera.append(k or 0)
+        meta.append(m or 0)
+        tier_val.append(TIER_VALUES.get(tier, 0))
+        claimed.append(bool(r.get("claimed")))
+        label.append(good)
+
+    return RollSet(
+        names=names,
+        kakera=np.asarray(kakera, dtype=np.int64),
+        meta=np.asarray(meta, dtype=np.int64),
+        tier_val=np.asarray(tier_val, dtype=np.int8),
+        claimed=np.asarray(claimed, dtype=bool),
+        label=np.asarray(label, dtype=bool),
+    )
+
+
+def load_rolls_from_db(db_path: Path = MUDAE_DB_PATH, series_db_path: Path = SERIES_DB_PATH,
+                       good_meta: int = DEFAULT_GOOD_META,
+                       good_kakera: int = DEFAULT_GOOD_KAKERA) -> RollSet:
+    """Treat every row of `characters` as one fresh (unclaimed) roll."""
+    with sqlite3.connect(db_path) as conn:
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute(
+            "SELECT name_display, series_display, kakera_value, claim_rank, like_rank FROM characters"
+        ).fetchall()
+    return _build_rollset((dict(r) for r in rows), _load_series_tiers(series_db_path), good_meta, good_kakera)
+
+
+def load_rolls_from_log(log_path: Path, series_db_path: Path = SERIES_DB_PATH,
+                        good_meta: int = DEFAULT_GOOD_META,
+                        good_kakera: int = DEFAULT_GOOD_KAKERA) -> RollSet:
+    """
+    Load a JSONL roll log. Each line may carry:
+      name_display, series_display, kakera_value, claim_rank, like_rank,
+      claimed (bool), series_tier (optional override), label (optional ground truth)
+    """
+    records = []
+    with open(log_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                records.append(json.loads(line))
+    return _build_rollset(records, _load_series_tiers(series_db_path), good_meta, good_kakera)
+
+
+# ============================================================
+# ⚡ Vectorized grid sweep
+# ============================================================
+
+@dataclass
+class SweepResult:
+    """Column-oriented grid results (one entry per threshold combination)."""
+    kakera_threshold: np.ndarray
+    meta_rank_threshold: np.ndarray
+    dm_tier_threshold: np.ndarray
+    alerts: np.ndarray
+    hits: np.ndarray
+    total_good: int
+
+    def __len__(self):
+        return len(self.alerts)
+
+    @property
+    def precision(self) -> np.ndarray:
+        return np.divide(self.hits, self.alerts, out=np.zeros(len(self), dtype=float), where=self.alerts > 0)
+
+    @property
+    def recall(self) -> np.ndarray:
+        return self.hits / self.total_good if self.total_good else np.zeros(len(self), dtype=float)
+
+    @property
+    def f1(self) -> np.ndarray:
+        p, r = self.precision, self.recall
+        return np.divide(2 * p * r, p + r, out=np.zeros(len(self), dtype=float), where=(p + r) > 0)
+
+    def row(self, i: int) -> dict:
+        alerts, hits = int(self.alerts[i]), int(self.hits[i])
+        return {
+            "kakera_threshold": int(self.kakera_threshold[i]),
+            "meta_rank_threshold": int(self.meta_rank_threshold[i]),
+            "dm_tier_threshold": str(self.dm_tier_threshold[i]),
+            "alerts": alerts,
+            "hits": hits,
+            "precision": hits / alerts if alerts else 0.0,
+            "recall": hits / self.total_good if self.total_good else 0.0,
+        }
+
+
+def sweep(rolls: RollSet, kakera_grid: Sequence[int], meta_grid: Sequence[int],
+          tier_grid: Sequence[str]) -> SweepResult:
+    """
+    Evaluate every (tier, kakera, meta) combination.
+
+    Rolls are sorted by meta rank once; for each (tier, kakera) pair the rolls
+    that alert regardless of meta are counted directly, and the remaining ones
+    are resolved for the whole meta grid with a single cumulative sum lookup.
+    Cost is O(T·K·N + T·K·M) instead of O(T·K·M·N). This is the array form of
+    RulesEngine.decide; verify_sample() cross-checks the two.
+    """
+    order = np.argsort(np.where(rolls.meta > 0, rolls.meta, _META_UNKNOWN), kind="stable")
+    kakera = rolls.kakera[order]
+    tier_val = rolls.tier_val[order]
+    claimed = rolls.claimed[order]
+    label = rolls.label[order]
+    meta_sorted = np.where(rolls.meta[order] > 0, rolls.meta[order], _META_UNKNOWN)
+
+    kakera_grid = np.asarray(kakera_grid, dtype=np.int64)
+    meta_grid = np.asarray(meta_grid, dtype=np.int64)
+    # number of sorted rolls with meta <= m, for every m in the grid
+    meta_cut = np.searchsorted(meta_sorted, meta_grid, side="right")
+    kakera_known = kakera > 0
+
+    T, K, M = len(tier_grid), len(kakera_grid), len(meta_grid)
+    alerts = np.empty((T, K, M), dtype=np.int64)
+    hits = np.empty((T, K, M), dtype=np.int64)
+
+    for ti, tier in enumerate(tier_grid):
+        tier_ok = tier_val >= TIER_VALUES.get(tier, DEFAULT_REQUIRED_TIER_VALUE)
+        for ki, k in enumerate(kakera_grid.tolist()):
+            blocked = kakera_known & (kakera < k) & ~claimed
+            base = claimed | (~blocked & (tier_ok | (kakera_known & (kakera >= k))))
+            rest = ~blocked & ~base
+
+            # prefix counts with a leading zero so meta_cut can index directly
+            rest_cum = np.concatenate(([0], np.cumsum(rest)))
+            rest_hit_cum = np.concatenate(([0], np.cumsum(rest & label)))
+
+            alerts[ti, ki] = int(base.sum()) + rest_cum[meta_cut]
+            hits[ti, ki] = int((base & label).sum()) + rest_hit_cum[meta_cut]
+
+    tiers, ks, ms = np.meshgrid(np.asarray(tier_grid, dtype=object), kakera_grid, meta_grid, indexing="ij")
+    return SweepResult(
+        kakera_threshold=ks.ravel(),
+        meta_rank_threshold=ms.ravel(),
+        dm_tier_threshold=tiers.ravel(),
+        alerts=alerts.ravel(),
+        hits=hits.ravel(),
+        total_good=int(label.sum()),
+    )
+
+
+def verify_sample(rolls: RollSet, results: SweepResult, samples: int = 25, seed: int = 0) -> int:
+    """Re-check a few grid points with the scalar RulesEngine; returns the number of mismatches."""
+    tier_names = {v: k for k, v in TIER_VALUES.items()}
+    facts = [
+        RollFacts(k or None, m or None, tier_names[t], c)
+        for k, m, t, c in zip(rolls.kakera.tolist(), rolls.meta.tolist(),
+                              rolls.tier_val.tolist(), rolls.claimed.tolist())
+    ]
+    rng = np.random.default_rng(seed)
+    mismatches = 0
+    for idx in rng.choice(len(results), size=min(samples, len(results)), replace=False):
+        row = results.row(int(idx))
+        engine = RulesEngine(row["kakera_threshold"], row["meta_rank_threshold"], row["dm_tier_threshold"])
+        expected = sum(d.should_dm for d in engine.decide_batch(facts))
+        if expected != row["alerts"]:
+            mismatches += 1
+            logger.error(f"[❌] Backtest mismatch at {row}: scalar={expected}")
+    return mismatches
+
+
+# ============================================================
+# 🧪 CLI
+# ============================================================
+
+def _parse_grid(spec: str) -> List[int]:
+    """'50:500:25' → range (inclusive), '100,200' → list."""
+    if ":" in spec:
+        start, stop, step = (int(x) for x in spec.split(":"))
+        return list(range(start, stop + 1, step))
+    return [int(x) for x in spec.split(",") if x.strip()]
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    ap = argparse.ArgumentParser(description="Backtest DM thresholds over historical rolls.")
+    ap.add_argument("--log", type=Path, help="JSONL roll log (default: replay the characters table)")
+    ap.add_argument("--db", type=Path, default=MUDAE_DB_PATH)
+    ap.add_argument("--series-db", type=Path, default=SERIES_DB_PATH)
+    ap.add_argument("--kakera", default="0:1000:25", help="grid, e.g. 50:500:25 or 100,150")
+    ap.add_argument("--meta", default="250:10000:250", help="grid, e.g. 500:10000:500")
+    ap.add_argument("--tiers", default="S,A,B,C,D", help="comma-separated DM_TIER_THRESHOLD values")
+    ap.add_argument("--good-meta", type=int, default=DEFAULT_GOOD_META)
+    ap.add_argument("--good-kakera", type=int, default=DEFAULT_GOOD_KAKERA)
+    ap.add_argument("--top", type=int, default=15, help="rows to print, ranked by F1")
+    ap.add_argument("--csv", type=Path, help="write the full grid to this CSV file")
+    ap.add_argument("--verify", type=int, default=0, help="cross-check N random grid points")
+    args = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    if args.log:
+        rolls = load_rolls_from_log(args.log, args.series_db, args.good_meta, args.good_kakera)
+    else:
+        rolls = load_rolls_from_db(args.db, args.series_db, args.good_meta, args.good_kakera)
+    t_load = time.perf_counter() - t0
+
+    kakera_grid = _parse_grid(args.kakera)
+    meta_grid = _parse_grid(args.meta)
+    tier_grid = [t.strip().upper() for t in args.tiers.split(",") if t.strip()]
+
+    t0 = time.perf_counter()
+    results = sweep(rolls, kakera_grid, meta_grid, tier_grid)
+    t_sweep = time.perf_counter() - t0
+
+    print(f"[📦] Loaded {len(rolls)} rolls ({int(rolls.label.sum())} good) in {t_load:.2f}s")
+    print(f"[⚡] Swept {len(results)} settings in {t_sweep:.3f}s")
+
+    if args.verify:
+        bad = verify_sample(rolls, results, samples=args.verify)
+        print(f"[🔍] Verified {min(args.verify, len(results))} grid points — mismatches: {bad}")
+
+    print(f"\n{'kakera':>7} {'meta':>7} {'tier':>4} {'alerts':>7} {'hits':>6} {'prec':>6} {'recall':>6}")
+    for i in np.argsort(-results.f1, kind="stable")[:args.top]:
+        row = results.row(int(i))
+        print(
+            f"{row['kakera_threshold']:>7} {row['meta_rank_threshold']:>7} {row['dm_tier_threshold']:>4} "
+            f"{row['alerts']:>7} {row['hits']:>6} {row['precision']:>6.2f} {row['recall']:>6.2f}"
+        )
+
+    if args.csv:
+        import csv
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["kakera_threshold", "meta_rank_threshold", "dm_tier_threshold",
+                             "alerts", "hits", "precision", "recall"])
+            writer.writerows(zip(
+                results.kakera_threshold.tolist(), results.meta_rank_threshold.tolist(),
+                results.dm_tier_threshold.tolist(), results.alerts.tolist(), results.hits.tolist(),
+                results.precision.round(4).tolist(), results.recall.round(4).tolist(),
+            ))
+        print(f"\n[💾] Wrote {len(results)} rows to {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
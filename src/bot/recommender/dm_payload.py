@@ -0,0 +1,146 @@
+# ============================================================
+# 💌 DM Payload Builder — memoized alert embeds
+# ============================================================
+"""
+Builds the DM alert embed sent by RecommenderListenerV2.
+
+The static parts (title, description, colour) depend only on the character
+and its tier, so they are memoized in a size-bounded LRU; popular characters
+that keep getting rolled skip all string formatting. Only the discord.Embed
+shell and the per-roll image are created for each alert.
+"""
+import os
+from functools import lru_cache
+from typing import Optional, Sequence, Tuple
+
+import discord
+
+from src.bot.utils.character import Character
+from src.bot.utils.tier_style import TIER_STYLES, UNKNOWN_TIER_STYLE, tier_style
+
+DM_PAYLOAD_CACHE_SIZE = int(os.getenv("DM_PAYLOAD_CACHE_SIZE", 512))
+
+# Prebuilt, shared Colour objects (never mutated by discord.Embed)
+TIER_COLOURS = {tier: discord.Colour(style.color) for tier, style in TIER_STYLES.items()}
+UNKNOWN_TIER_COLOUR = discord.Colour(UNKNOWN_TIER_STYLE.color)
+
+
+def tier_colour(tier: Optional[str], default: discord.Colour = UNKNOWN_TIER_COLOUR) -> discord.Colour:
+    return TIER_COLOURS.get((tier or "").upper(), default)
+
+
+@lru_cache(maxsize=DM_PAYLOAD_CACHE_SIZE)
+def _static_parts(name_display: str, series_display: str, series_tier: str,
+                  meta_rank: Optional[int], kakera_value: Optional[int],
+                  claimed: bool) -> Tuple[str, str, discord.Colour]:
+    style = tier_style(series_tier)
+    title = f"{style.emoji} {name_display} — {series_tier}-Tier"
+    description = (
+        f"**Series:** {series_display}\n"
+        f"**Meta Rank:** {meta_rank or '❔'}\n"
+        f"**Kakera:** {kakera_value or '❔'}\n"
+        f"**Claimed:** {'✅' if claimed else '❌'}"
+    )
+    return title, description, tier_colour(series_tier)
+
+
+def build_dm_embed(name_display: str, series_display: str, series_tier: str,
+                   meta_rank: Optional[int], kakera_value: Optional[int], claimed: bool,
+                   image_url: Optional[str] = None,
+                   thumbnail_url: Optional[str] = None,
+                   wishes: Sequence[str] = ()) -> discord.Embed:
+    """Return a fresh DM embed; image takes precedence over thumbnail."""
+    title, description, colour = _static_parts(
+        name_display, series_display, series_tier or "Unknown", meta_rank, kakera_value, bool(claimed)
+    )
+    embed = discord.Embed(title=title, description=description, color=colour)
+    if wishes:
+        embed.add_field(name="⭐ Wishlist", value=", ".join(wishes), inline=False)
+    if image_url:
+        embed.set_image(url=image_url)
+    elif thumbnail_url:
+        embed.set_thumbnail(url=thumbnail_url)
+    return embed
+
+
+def character_dm_embed(character: Character, claimed: bool,
+                       image_url: Optional[str] = None,
+                       thumbnail_url: Optional[str] = None,
+                       wishes: Sequence[str] = ()) -> discord.Embed:
+    """build_dm_embed for a merged roll record."""
+    return build_dm_embed(
+        character.name_display, character.series_display, character.series_tier,
+        character.meta_rank, character.kakera_value, claimed,
+        image_url=image_url, thumbnail_url=thumbnail_url, wishes=wishes,
+    )
+
+
+def payload_cache_info():
+    """functools cache stats (hits / misses / currsize) for the static parts."""
+    return _static_parts.cache_info()
+
+
+def clear_payload_cache():
+    _static_parts.cache_clear()
+
+
+# ============================================================
+# 🧪 Allocation / timing check — legacy inline build vs. builder
+# ============================================================
+if __name__ == "__main__":
+    import random
+    import time
+    import tracemalloc
+
+    def legacy_build(name, series, tier, meta, kakera, claimed, image_url):
+        # Exactly what on_message used to do for every alert
+        emoji_map = {"S": "💎", "A": "🌟", "B": "⭐", "C": "✨", "D": "💤", "Unknown": "🎯"}
+        color_map = {"S": discord.Color.gold(), "A": discord.Color.purple(), "B": discord.Color.blue(),
+                     "C": discord.Color.teal(), "D": discord.Color.dark_grey(), "Unknown": discord.Color.dark_grey()}
+        emoji = emoji_map.get(tier, "🎯")
+        color = color_map.get(tier, discord.Color.dark_grey())
+        embed = discord.Embed(
+            title=f"{emoji} {name} — {tier}-Tier",
+            description=(
+                f"**Series:** {series}\n"
+                f"**Meta Rank:** {meta or '❔'}\n"
+                f"**Kakera:** {kakera or '❔'}\n"
+                f"**Claimed:** {'✅' if claimed else '❌'}"
+            ),
+            color=color,
+        )
+        if image_url:
+            embed.set_image(url=image_url)
+        return embed
+
+    rng = random.Random(0)
+    popular = [
+        (f"Character {i}", f"Series {i % 40}", rng.choice("SABCD"), rng.randint(1, 5000), rng.randint(50, 1500))
+        for i in range(200)
+    ]
+    alerts = [rng.choice(popular) + (rng.random() < 0.1, "https://mudae.net/uploads/x.png") for _ in range(20_000)]
+
+    def measure(label, fn):
+        clear_payload_cache()
+        tracemalloc.start()
+        blocks_before = len(tracemalloc.take_snapshot().traces)
+        transient = 0
+        for a in alerts:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            fn(*a)
+            transient += tracemalloc.get_traced_memory()[1] - base
+        blocks_after = len(tracemalloc.take_snapshot().traces)
+        tracemalloc.stop()
+        # untraced run for clean timing
+        t0 = time.perf_counter()
+        for a in alerts:
+            fn(*a)
+        clean = time.perf_counter() - t0
+        print(f"{label:<8} {clean / len(alerts) * 1e6:6.2f} µs/alert | "
+              f"{transient / len(alerts):7.0f} B allocated/alert (peak) | "
+              f"retained blocks {blocks_after - blocks_before:+d}")
+
+    measure("legacy", legacy_build)
+    measure("builder", build_dm_embed)
+    print(f"cache: {payload_cache_info()}")
@@ -7,10 +7,10 @@ import aiosqlite
 import logging
 
 # Ensure root path is importable
-sys.path.append(str(Path(__file__).resolve().parents[2]))
+sys.path.append(str(Path(__file__).resolve().parents[3]))
 
-from bot.db.database import get_conn
-from bot.db.series_rank import get_top_series
+from src.bot.db.database import get_conn
+from src.bot.db.series_rank import get_top_series_async
 
 logger = logging.getLogger("mudae-helper.recommendator")
 logger.setLevel(logging.INFO)
@@ -69,7 +69,7 @@ async def recommend_popular_series(limit: int = 10):
     """
     Recommend top series by popularity score (from series.db).
     """
-    series_list = get_top_series(limit=limit)
+    series_list = await get_top_series_async(limit=limit)
 
     if not series_list:
         logger.warning("⚠️ No series ranking data available.")
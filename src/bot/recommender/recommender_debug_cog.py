@@ -10,7 +10,15 @@ from dotenv import load_dotenv
 
 # Recommender helpers
 from src.bot.recommender.recommendator import recommend_popular_series, recommend_top_characters
-from src.bot.db.series_rank import tier_flavor_label, get_series_info
+from src.bot.db.series_rank import tier_flavor_label, get_series_info_async
+from src.bot.db.rank_history import FIELDS, top_climbers
+from src.bot.db.refresh_planner import next_to_refresh, count_due
+from src.bot.recommender.dm_payload import tier_colour
+from src.bot.recommender.rules_engine import RulesEngine, RollFacts, compute_meta_rank
+from src.bot.utils.character import CHARACTER_COLUMNS, character_row_factory
+from src.bot.utils.env_config import get_config_store, apply_setting
+from src.bot.utils.loop_monitor import get_loop_monitor
+from src.bot.utils.profiler import MODES as PROFILE_MODES, ALIASES as PROFILE_ALIASES, run_profile, is_running as profile_running
 
 load_dotenv()
 logger = logging.getLogger("mudae-helper.debug")
@@ -58,8 +66,19 @@ class RecommenderDebugCog(commands.Cog):
         self.meta_rank_threshold = int(os.getenv("META_RANK_THRESHOLD", 5000))
         self.kakera_threshold = int(os.getenv("KAKERA_THRESHOLD", 100))
         self.top_series_limit = int(os.getenv("TOP_SERIES_LIMIT", 50))
+        self.dm_tier_threshold = os.getenv("DM_TIER_THRESHOLD", "B").upper()
+        self.rules = RulesEngine(self.kakera_threshold, self.meta_rank_threshold, self.dm_tier_threshold)
         self.logger = logger
-        print(f"[⚙️] DebugCog loaded | Owner-only={self.owner_only_dm}, Meta≤{self.meta_rank_threshold}, Kakera≥{self.kakera_threshold}")
+        self.config = get_config_store()
+        self.config.subscribe(self._on_config_change)
+        print(f"[⚙️] DebugCog loaded | Owner-only={self.owner_only_dm}, Meta≤{self.meta_rank_threshold}, Kakera≥{self.kakera_threshold}, Tier≥{self.dm_tier_threshold}")
+
+    def cog_unload(self):
+        self.config.unsubscribe(self._on_config_change)
+
+    def _on_config_change(self, key: str, value: str):
+        if apply_setting(self, key, value):
+            self.rules = RulesEngine(self.kakera_threshold, self.meta_rank_threshold, self.dm_tier_threshold)
 
     # ------------------------------------------------------------
     # Manual DM test — simulate a real DM
@@ -83,12 +102,12 @@ class RecommenderDebugCog(commands.Cog):
         }
 
         # compute meta
-        meta_rank = (parsed["claim_rank"] + parsed["like_rank"]) // 2 if parsed.get("claim_rank") and parsed.get("like_rank") else None
+        meta_rank = compute_meta_rank(parsed.get("claim_rank"), parsed.get("like_rank"))
 
         # determine series tier by checking series DB or popular list
         series_tier = None
         try:
-            si = get_series_info(parsed["series_display"])
+            si = await get_series_info_async(parsed["series_display"])
             series_tier = si["tier"] if si else None
         except Exception:
             series_tier = None
@@ -106,20 +125,16 @@ class RecommenderDebugCog(commands.Cog):
 
         # friendly tier/flavor
         tier_label = series_tier or "Unknown"
-        tier_flavor = tier_flavor_label(series_tier) if series_tier else "❔ Unknown Tier"
-
-        # decision (meta-first, then series-popularity)
-        will_alert = False
-        reasons = []
-        if meta_rank is not None and meta_rank <= self.meta_rank_threshold:
-            will_alert = True
-            reasons.append(f"Meta≤{self.meta_rank_threshold} ({meta_rank})")
-        elif series_tier and series_tier.upper() in ("S", "A"):
-            will_alert = True
-            reasons.append(f"Series-tier {series_tier}")
-        elif parsed.get("kakera_value") and parsed["kakera_value"] >= self.kakera_threshold:
-            will_alert = True
-            reasons.append(f"Kakera≥{self.kakera_threshold} ({parsed['kakera_value']})")
+        tier_flavor = tier_flavor_label(series_tier)
+
+        # decision (same RulesEngine as the live listener)
+        facts = RollFacts(parsed.get("kakera_value"), meta_rank, tier_label)
+        decision = self.rules.decide(facts)
+        will_alert = decision.should_dm
+        if will_alert:
+            reasons = self.rules.success_reasons(facts, decision)
+        else:
+            reasons = self.rules.failure_reasons(facts, decision)
 
         # build embed
         color = discord.Color.gold() if will_alert else discord.Color.dark_grey()
@@ -127,7 +142,7 @@ class RecommenderDebugCog(commands.Cog):
             title=f"🎯 {parsed['name_display']} — {tier_label}",
             description=(
                 f"**Series:** {parsed['series_display']}\n"
-                f"**Tier:** {tier_label}\n"
+                f"**Tier:** {tier_flavor}\n"
                 f"**Meta Rank:** {meta_rank or '❔'}\n"
                 f"**Kakera:** {parsed.get('kakera_value') or '❔'}\n"
                 f"**Decision:** {'✅ DM Sent' if will_alert else '💤 No DM'}\n"
@@ -163,38 +178,27 @@ class RecommenderDebugCog(commands.Cog):
 
         async with ctx.typing():
             conn = await get_conn()
-            cursor = await conn.execute("""
-                SELECT name_display, series_display, kakera_value, claim_rank, like_rank, meta_rank
-                FROM characters_meta
+            cursor = await conn.execute(f"""
+                SELECT {CHARACTER_COLUMNS}
+                FROM characters
                 WHERE LOWER(name_display) = LOWER(?)
                 LIMIT 1
             """, (name,))
-            row = await cursor.fetchone()
+            cursor.row_factory = character_row_factory
+            parsed = await cursor.fetchone()
             await conn.close()
 
-            if not row:
+            if not parsed:
                 await ctx.send(f"❌ No character found for **{name}** in your DB.")
                 return
 
-            parsed = {
-                "name_display": row[0],
-                "series_display": row[1],
-                "kakera_value": row[2],
-                "claim_rank": row[3],
-                "like_rank": row[4],
-                "meta_rank": row[5],
-            }
-
-            kakera_value = parsed["kakera_value"]
-            meta_rank = parsed["meta_rank"] or (
-                (parsed["claim_rank"] + parsed["like_rank"]) // 2
-                if parsed["claim_rank"] and parsed["like_rank"]
-                else None
-            )
+            kakera_value = parsed.kakera_value or None
+            # Same integer meta as the listener (the view pads missing ranks with 9999)
+            meta_rank = compute_meta_rank(parsed.claim_rank, parsed.like_rank)
 
             # --- get series tier
             try:
-                series_info = get_series_info(parsed["series_display"])
+                series_info = await get_series_info_async(parsed.series_display)
                 series_tier = series_info["tier"] if series_info else "Unknown"
             except Exception:
                 series_tier = "Unknown"
@@ -203,23 +207,22 @@ class RecommenderDebugCog(commands.Cog):
             try:
                 popular_series = await recommend_popular_series(limit=self.top_series_limit)
                 popular_match = any(
-                    s["series"].lower() == parsed["series_display"].lower()
+                    s["series"].lower() == (parsed.series_display or "").lower()
                     for s in popular_series
                 )
             except Exception:
                 popular_match = False
 
-            # --- DM trigger logic (same as production)
-            meta_ok = meta_rank is not None and meta_rank <= self.meta_rank_threshold
-            kakera_ok = kakera_value is not None and kakera_value >= self.kakera_threshold
-            tier_ok = series_tier and series_tier.upper() in ("S", "A")
-            should_dm = meta_ok or kakera_ok or tier_ok
+            # --- DM trigger logic (shared RulesEngine, same as production)
+            decision = self.rules.decide(RollFacts(kakera_value, meta_rank, series_tier))
+            meta_ok, tier_ok, kakera_ok = decision.meta_ok, decision.tier_ok, decision.kakera_ok
+            should_dm = decision.should_dm
 
             # --- build result embed
             color = discord.Color.green() if should_dm else discord.Color.dark_grey()
             emoji = "💌" if should_dm else "💤"
             desc = (
-                f"**Series:** {parsed['series_display']}\n"
+                f"**Series:** {parsed.series_display}\n"
                 f"**Series Tier:** {series_tier}\n"
                 f"**Meta Rank:** {meta_rank or '❔'}\n"
                 f"**Kakera:** {kakera_value or '❔'}\n"
@@ -227,9 +230,10 @@ class RecommenderDebugCog(commands.Cog):
                 f"**Meta Check:** {'✅' if meta_ok else '❌'}\n"
                 f"**Tier Check:** {'✅' if tier_ok else '❌'}\n"
                 f"**Kakera Check:** {'✅' if kakera_ok else '❌'}"
+                + (f"\n**Kakera Block:** ⛔ below {self.kakera_threshold}" if decision.kakera_blocked else "")
             )
             embed = discord.Embed(
-                title=f"{emoji} Simulation — {parsed['name_display']}",
+                title=f"{emoji} Simulation — {parsed.name_display}",
                 description=desc,
                 color=color,
             )
@@ -245,8 +249,7 @@ class RecommenderDebugCog(commands.Cog):
     async def series_rank(self, ctx, *, series_name: str):
         """Check the tier and ranking info of a specific anime/game series."""
         try:
-            from src.bot.db.series_rank import get_series_info
-            info = get_series_info(series_name)
+            info = await get_series_info_async(series_name)
             if not info:
                 await ctx.send(f"❌ No ranking data found for **{series_name}**.")
                 return
@@ -255,14 +258,8 @@ class RecommenderDebugCog(commands.Cog):
             rank = info.get("rank", "?")
             popularity = info.get("popularity", "N/A")
 
-            color_map = {
-                "S": discord.Color.gold(),
-                "A": discord.Color.purple(),
-                "B": discord.Color.blue(),
-                "C": discord.Color.teal(),
-                "D": discord.Color.dark_grey(),
-            }
-            color = color_map.get(tier, discord.Color.blurple())
+            # Unranked series keep this command's blurple (DMs use UNKNOWN_TIER_STYLE's grey)
+            color = tier_colour(tier, discord.Color.blurple())
 
             embed = discord.Embed(
                 title=f"🏆 Series Ranking — {series_name}",
@@ -278,14 +275,149 @@ class RecommenderDebugCog(commands.Cog):
         except Exception as e:
             await ctx.send(f"⚠️ Failed to fetch series info: {e}")
 
+    # ============================================================
+    # 📈 Rank trends (rank_history)
+    # ============================================================
+    @commands.command(name="climbers")
+    async def climbers(self, ctx, days: float = 7, field: str = "claim", limit: int = 10):
+        """Biggest rank climbers (or kakera gainers) over the last N days. Usage: !climbers 7 claim|like|kakera 10"""
+        field = field.lower()
+        if field not in FIELDS:
+            await ctx.send(f"❌ Unknown field `{field}` — use one of: {', '.join(FIELDS)}.")
+            return
+        try:
+            rows = await top_climbers(days=days, field=field, limit=max(1, min(limit, 25)))
+        except Exception as e:
+            await ctx.send(f"⚠️ Failed to read rank history: {e}")
+            return
+        if not rows:
+            await ctx.send(f"📭 No {field} changes recorded in the last {days:g} days.")
+            return
+
+        unit = "kakera" if field == "kakera" else "ranks"
+        lines = [
+            f"**{i}. {r['name']}** ({r['series']}) — {abs(r['change'])} {unit} "
+            f"{'gained' if field == 'kakera' else 'climbed'} → now {r['current'] or '❔'}"
+            for i, r in enumerate(rows, 1)
+        ]
+        embed = discord.Embed(
+            title=f"📈 Top {field} climbers — last {days:g} days",
+            description="\n".join(lines),
+            color=discord.Color.green(),
+        )
+        await ctx.send(embed=embed)
+
+    # ============================================================
+    # 🔄 Refresh planner — what to $im next
+    # ============================================================
+    @commands.command(name="refresh_next")
+    async def refresh_next(self, ctx, limit: int = 10):
+        """Characters most worth re-checking with $im (stale × valuable × often rolled)."""
+        try:
+            rows = await next_to_refresh(limit=max(1, min(limit, 25)))
+            due = await count_due()
+        except Exception as e:
+            await ctx.send(f"⚠️ Failed to read refresh plan: {e}")
+            return
+        if not rows:
+            await ctx.send("📭 No characters in the database yet.")
+            return
+
+        lines = []
+        for r in rows:
+            when = f"overdue {r['overdue_hours']:.0f}h" if r["overdue_hours"] >= 0 else f"due in {-r['overdue_hours']:.0f}h"
+            lines.append(
+                f"`$im {r['name']}` — {when} | 📈 {r['claim_rank'] or '❔'} / 💖 {r['like_rank'] or '❔'} "
+                f"| 👀 {r['times_seen']}× | last {r['data_source']} {r['last_updated']}"
+            )
+        embed = discord.Embed(
+            title=f"🔄 Next {len(rows)} to refresh ({due} overdue)",
+            description="\n".join(lines),
+            color=discord.Color.orange(),
+        )
+        await ctx.send(embed=embed)
+
+    # ============================================================
+    # ⏱️ Event-loop lag (utils/loop_monitor.py)
+    # ============================================================
+    @commands.command(name="loop_lag")
+    async def loop_lag(self, ctx, stalls: int = 5):
+        """Event-loop lag percentiles and the most recent blocking call sites."""
+        if ctx.author.id not in OWNER_IDS:
+            await ctx.send("🚫 Only the owner can inspect loop lag.")
+            return
+        monitor = get_loop_monitor()
+        if monitor is None or monitor.started_at is None:
+            await ctx.send("⚠️ Loop monitor is not running (LOOP_MONITOR=false?).")
+            return
+
+        p = monitor.percentiles()
+        lines = [
+            f"**p50** {p['p50_ms']:.1f} ms | **p90** {p['p90_ms']:.1f} ms | "
+            f"**p99** {p['p99_ms']:.1f} ms | **max** {p['max_ms']:.1f} ms",
+            f"{len(monitor.lags)} samples over the last {len(monitor.lags) * monitor.interval / 60:.0f} min · "
+            f"{monitor.stalls_total} stalls ≥ {monitor.threshold * 1000:g} ms since start",
+        ]
+        recent = list(monitor.stalls)[-max(0, min(stalls, 10)):] if stalls > 0 else []
+        for s in reversed(recent):
+            lines.append(f"• **{s.lag_ms:.0f} ms** <t:{int(s.ts)}:R> — `{s.call_site or 'not sampled'}`")
+        lines.append(f"Full stacks: `{monitor.path}`")
+
+        p99 = p["p99_ms"]
+        color = discord.Color.green() if p99 < 50 else discord.Color.orange() if p99 < 250 else discord.Color.red()
+        await ctx.send(embed=discord.Embed(title="⏱️ Event-loop lag", description="\n".join(lines), color=color))
+
+    # ============================================================
+    # 🔥 Live profiler (utils/profiler.py)
+    # ============================================================
+    @commands.command(name="profile")
+    async def profile(self, ctx, mode: str = "sample", seconds: float = 10):
+        """Profile the running bot for N seconds. Usage: !profile sample|cpu|mem 30 (files go to logs/)"""
+        if ctx.author.id not in OWNER_IDS:
+            await ctx.send("🚫 Only the owner can run the profiler.")
+            return
+        mode = PROFILE_ALIASES.get(mode.lower(), mode.lower())
+        if mode not in PROFILE_MODES:
+            await ctx.send(f"❌ Unknown mode `{mode}` — use one of: {', '.join(PROFILE_MODES)}.")
+            return
+        if profile_running():
+            await ctx.send("⏳ A profile is already running — try again when it finishes.")
+            return
+
+        await ctx.send(f"🔥 Profiling (**{mode}**) for {seconds:g}s...")
+        try:
+            result = await run_profile(mode, seconds)
+        except Exception as e:
+            self.logger.error("debug_cog: profile failed — %s\n%s", e, traceback.format_exc())
+            await ctx.send(f"⚠️ Profile failed: {e}")
+            return
+        if result is None:
+            await ctx.send("⏳ A profile is already running — try again when it finishes.")
+            return
 
+        heading = "Top allocation sites (growth)" if mode == "mem" else "Hottest functions"
+        body = "\n".join(result.top) or "(nothing recorded)"
+        if len(body) > 3500:
+            body = body[:3500].rsplit("\n", 1)[0] + "\n…"
+        embed = discord.Embed(
+            title=f"🔥 Profile — {mode}, {result.seconds:g}s",
+            description=f"{result.summary}\n**{heading}:**\n```\n{body}\n```",
+            color=discord.Color.orange(),
+        )
+        embed.set_footer(text=f"Saved to {result.path}")
+        await ctx.send(embed=embed)
+        print(f"[🔥] Profile ({mode}, {result.seconds:g}s) written to {result.path}")
 
     # ------------------------------------------------------------
     # Toggle Owner-only mode
     # ------------------------------------------------------------
     @commands.command(name="toggle_owner_only_debug")
     async def toggle_owner_only_debug(self, ctx):
-        self.owner_only_dm = not self.owner_only_dm
+        if ctx.author.id not in OWNER_IDS:
+            await ctx.send("🚫 Only the owner can toggle owner-only mode.")
+            return
+        # Goes through the config store so the listener flips too; runtime only, .env is untouched
+        self.config.set("OWNER_ONLY_DM", "false" if self.owner_only_dm else "true", persist=False)
         mode = "ON (owner only)" if self.owner_only_dm else "OFF (all users)"
         await ctx.send(f"✅ Owner-only DM mode toggled: **{mode}**")
         print(f"[⚙️] Debug owner-only mode now {mode}")
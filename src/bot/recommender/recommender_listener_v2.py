@@ -3,15 +3,30 @@
 # ============================================================
 
 import os
+import time
+from collections import Counter
+from typing import Dict, NamedTuple, Optional, Tuple
+
 import discord
 from discord.ext import commands
 from dotenv import load_dotenv
 from src.bot.config import OWNER_IDS
-from src.bot.parsers.im_parser import parse_im_embed
-from src.bot.db.crud import upsert_character_from_im, get_character_info
+from src.bot.parsers.im_parser import parse_im_embed, im_update_from_parsed, extract_kakera, classify_embed
+from src.bot.parsers.embed_classifier import EMBED_CLASSIFIER, CLAIMED, CLAIM_PHRASE, NEW_ROLL, ROLL_COMMAND, UTILITY
+from src.bot.db.crud import upsert_character_from_im, resolve_character
+from src.bot.db.embed_archive import get_embed_archive
+from src.bot.db.wishlist import get_wishlist
 from src.bot.recommender.recommendator import recommend as recommend_global
-from src.bot.db.series_rank import get_series_info
-from src.bot.utils.env_config import write_env
+from src.bot.utils.env_config import get_config_store, apply_setting
+from src.bot.recommender.dm_payload import character_dm_embed
+from src.bot.utils.character import Character, EMPTY_CHARACTER
+from src.bot.utils.normalization import normalize_text
+from src.bot.utils.ttl_cache import TTLCache
+from src.bot.utils.metrics import histogram
+from src.bot.utils.lanes import Lane, LaneScheduler
+from src.bot.recommender.rules_engine import (
+    RulesEngine, RollFacts, compute_meta_rank, is_claimed_color, is_claimed_embed, to_int,
+)
 
 # ============================================================
 # 🔧 Environment & Globals
@@ -27,6 +42,32 @@ from src.bot.config import OWNER_IDS, OWNER_ID
 
 print(f"[👑] Active owner IDs: {', '.join(str(x) for x in OWNER_IDS)}")
 
+# Latency histograms (served on /metrics, see src/bot/metrics_server.py)
+PARSE_SECONDS = histogram("mudae_parse_seconds", "parse_im_embed time per Mudae embed")
+LOOKUP_SECONDS = histogram("mudae_lookup_seconds", "resolve_character lookup time per evaluated roll")
+UPSERT_SECONDS = histogram("mudae_upsert_seconds", "upsert_character_from_im time per $im result")
+DM_SECONDS = histogram("mudae_dm_seconds", "fetch_user + send time per alert DM")
+
+
+class RollState(NamedTuple):
+    """What on_message learned about a roll, kept in the message cache for edits."""
+    roll: Character
+    description: str
+    footer: str
+    color: Optional[int]
+    claimed: bool
+    owner_roll: bool
+    alerted: bool
+    name_key: str
+    wishes: Tuple[str, ...] = ()    # wishlist entries this roll matched (display names)
+
+
+def _embed_signature(embed):
+    """(description, footer text, colour) — the parts Mudae edits on claim / kakera react."""
+    footer = (embed.footer.text or "") if embed.footer else ""
+    color = embed.color.value if getattr(embed, "color", None) else None
+    return embed.description or "", footer, color
+
 
 # ============================================================
 # 🎯 Main Listener Class
@@ -45,11 +86,35 @@ class RecommenderListenerV2(commands.Cog):
         self.top_series_cache_time = int(os.getenv("TOP_SERIES_CACHE_TIME", 1800))
         self.dm_tier_threshold = os.getenv("DM_TIER_THRESHOLD", "B").upper()
         self.owner_only_dm = os.getenv("OWNER_ONLY_DM", "true").lower() == "true"
+        self.rules = RulesEngine(self.kakera_threshold, self.meta_rank_threshold, self.dm_tier_threshold)
 
         # State tracking
         self.last_roller_name = None
         self._last_owner_roll = None
 
+        # Raw Mudae embeds → data/embed_archive/ (None when EMBED_ARCHIVE=false)
+        self.embed_archive = get_embed_archive()
+
+        # ⭐ Wishlist (mudae.db `wishlist`, one Aho-Corasick pass per roll)
+        self.wishlist = get_wishlist()
+
+        # Dedup: message IDs already handled, and per-(owner, character) DM cooldown
+        self.processed = TTLCache(int(os.getenv("MESSAGE_CACHE_SIZE", 5000)),
+                                  float(os.getenv("MESSAGE_CACHE_TTL", 900)))
+        self.alert_cooldown = TTLCache(int(os.getenv("ALERT_COOLDOWN_SIZE", 2000)),
+                                       float(os.getenv("ALERT_COOLDOWN_SECONDS", 600)))
+        self.counters = Counter()
+        # Rolls queued / being evaluated → latest edit that arrived meanwhile (None = no edit yet)
+        self.pending_edits: Dict[int, Optional[discord.Message]] = {}
+
+        # Work lanes: unclaimed rolls never queue behind DB writes or claimed-roll DMs
+        self.lanes = LaneScheduler([
+            Lane("fast", int(os.getenv("FAST_LANE_WORKERS", 16)),
+                 slo_ms=float(os.getenv("FAST_LANE_SLO_MS", 250)), background=False),
+            Lane("notify", int(os.getenv("NOTIFY_LANE_WORKERS", 4))),
+            Lane("db", int(os.getenv("DB_LANE_WORKERS", 1))),
+        ])
+
         # Startup log
         print(f"[⚙️] Owner-only DM mode: {self.owner_only_dm}")
         print("[✅] Recommender listener loaded.")
@@ -57,6 +122,88 @@ class RecommenderListenerV2(commands.Cog):
         print(f"[⚙️] Meta rank threshold: {self.meta_rank_threshold}")
         print(f"[⚙️] DM Tier Threshold: {self.dm_tier_threshold}+")
         print(f"[⚙️] Top-series limit: {self.top_series_limit} (cache {self.top_series_cache_time}s)")
+        print(f"[⚙️] Alert cooldown: {self.alert_cooldown.ttl:g}s per owner/character")
+
+        # Live config: threshold commands (from any cog) apply here immediately
+        self.config = get_config_store()
+        self.config.subscribe(self._on_config_change)
+
+    async def cog_unload(self):
+        self.config.unsubscribe(self._on_config_change)
+        # Let queued $im upserts / DMs finish before the cog goes away
+        await self.lanes.close(timeout=10)
+
+    def _on_config_change(self, key: str, value: str):
+        if apply_setting(self, key, value):
+            self.rules = RulesEngine(self.kakera_threshold, self.meta_rank_threshold, self.dm_tier_threshold)
+            print(f"[⚙️] Listener updated {key}={value}")
+
+    # ============================================================
+    # ⚙️ Runtime threshold commands
+    # ============================================================
+    async def _set_config(self, ctx, key: str, value):
+        if ctx.author.id not in OWNER_IDS:
+            await ctx.send("🚫 Only the owner can change thresholds.")
+            return
+        saved = self.config.set(key, value)
+        await ctx.send(f"✅ `{key}` set to **{saved}** (saving to .env in the background).")
+
+    @commands.command(name="set_kakera")
+    async def set_kakera(self, ctx, value: int):
+        """Set the minimum kakera value for DM alerts."""
+        await self._set_config(ctx, "KAKERA_THRESHOLD", value)
+
+    @commands.command(name="set_meta")
+    async def set_meta(self, ctx, value: int):
+        """Set the maximum meta rank for DM alerts (lower = rarer)."""
+        await self._set_config(ctx, "META_RANK_THRESHOLD", value)
+
+    @commands.command(name="set_dm_tier")
+    async def set_dm_tier(self, ctx, tier: str):
+        """Set the minimum series tier (S/A/B/C/D) for DM alerts."""
+        tier = tier.upper()
+        if tier not in ("S", "A", "B", "C", "D"):
+            await ctx.send("⚠️ Tier must be one of S, A, B, C, D.")
+            return
+        await self._set_config(ctx, "DM_TIER_THRESHOLD", tier)
+
+    @commands.command(name="set_series_limit")
+    async def set_series_limit(self, ctx, value: int):
+        """Set how many top series the recommender tracks."""
+        await self._set_config(ctx, "TOP_SERIES_LIMIT", value)
+
+    @commands.command(name="show_config")
+    async def show_config(self, ctx):
+        """Show the thresholds currently in effect."""
+        await ctx.send(
+            f"⚙️ **Active config**\n"
+            f"• Kakera ≥ **{self.kakera_threshold}**\n"
+            f"• Meta rank ≤ **{self.meta_rank_threshold}**\n"
+            f"• Series tier ≥ **{self.dm_tier_threshold}**\n"
+            f"• Top-series limit: **{self.top_series_limit}**\n"
+            f"• Owner-only DM: **{self.owner_only_dm}**\n"
+            f"• Alert cooldown: **{self.alert_cooldown.ttl:g}s**"
+        )
+
+    @commands.command(name="listener_stats")
+    async def listener_stats(self, ctx):
+        """How much work the message / alert dedup caches have saved."""
+        c = self.counters
+        avoided = c["duplicate_messages"] + c["cooldown_skips"]
+        await ctx.send(
+            f"📊 **Listener stats**\n"
+            f"• Mudae embeds handled: **{c['mudae_embeds']}** | rolls evaluated: **{c['rolls_evaluated']}** | DMs sent: **{c['dms_sent']}**\n"
+            f"• Duplicate messages skipped before parsing: **{c['duplicate_messages']}**\n"
+            f"• Roll edits: **{c['edits_seen']}** seen | **{c['edits_unchanged']}** unchanged | "
+            f"**{c['edits_reevaluated']}** re-evaluated | **{c['edits_deferred']}** deferred until evaluated | "
+            f"**{c['edits_uncached']}** not cached\n"
+            f"• Rolls skipped by alert cooldown (no lookup / decision): **{c['cooldown_skips']}**\n"
+            f"• DMs suppressed by cooldown: **{c['dms_suppressed']}**\n"
+            f"• Work avoided: **{avoided}** of {c['mudae_embeds'] + c['duplicate_messages']} pipelines\n"
+            f"• Message cache: {self.processed.stats()}\n"
+            f"• Cooldown cache: {self.alert_cooldown.stats()}\n"
+            f"🚦 **Lanes**\n" + "\n".join(f"• {line}" for line in self.lanes.summary_lines())
+        )
 
     # ============================================================
     # 📩 Main on_message Listener
@@ -67,244 +214,180 @@ class RecommenderListenerV2(commands.Cog):
 
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
-        """Handles Mudae rolls, embeds, and DM alerts."""
-    
+        """
+        Handles Mudae rolls, embeds, and DM alerts. Filtering and parsing run
+        inline; the lookup / DM (rolls) and the upsert ($im) are handed to a
+        lane and the lane's Future is returned.
+        """
+        received_at = time.perf_counter()
 
         # --- 1️⃣ Track Owner Roll
         try:
             author_id = message.author.id
         except Exception:
             return
+        self.counters["messages_seen"] += 1
 
         content_lower = (message.content or "").lower()
         # 🆕 FIX: Check all OWNER_IDS, not just OWNER_ID
-        if author_id in OWNER_IDS and any(cmd in content_lower for cmd in ["$wa", "$wg", "$ha", "$hg", "$ma", "$mg","$mx", "$waifu"]):
+        if author_id in OWNER_IDS and EMBED_CLASSIFIER.classify(content=content_lower) & ROLL_COMMAND:
             self.last_roller_name = (message.author.display_name or message.author.name or "").lower()
             self._last_owner_roll = self.last_roller_name
             print(f"[🎲] Owner rolled: {message.content} — awaiting embed for '{self.last_roller_name}'")
+            self.counters["owner_rolls"] += 1
             return
 
         # --- 2️⃣ Filter: only Mudae embeds
         if not message.author or "mudae" not in (message.author.name or "").lower() or not message.embeds:
             return
 
+        # --- 2️⃣b Already handled this message (gateway replay, cog reload)? Skip before parsing
+        if message.id in self.processed:
+            self.counters["duplicate_messages"] += 1
+            return
+        self.processed.set(message.id)
+        self.counters["mudae_embeds"] += 1
+
         embed = message.embeds[0]
+        if self.embed_archive is not None:
+            try:
+                self.embed_archive.append(embed, message.id, getattr(message.channel, "id", None))
+            except Exception as e:
+                print(f"[⚠️] Embed archive append failed: {e}")
         desc_lower = (embed.description or "").lower()
         footer_lower = (embed.footer.text or "").lower() if embed.footer else ""
 
+        # Every keyword check below (utility, $im rejects, claimed, new roll) in one classifier call
+        labels = classify_embed(embed, content_lower)
+
         # --- 3️⃣ Skip Mudae utility embeds
-        ignored = ["$top", "$mm", "$tu", "$help", "$info", "$note", "$bonus", "$dk", "$rt"]
-        if any(content_lower.startswith(cmd) for cmd in ignored):
+        if labels & UTILITY:
             print(f"[🚫] Ignored utility message ({content_lower})")
+            self.counters["utility_skipped"] += 1
             return
 
         # --- 4️⃣ Handle $im updates - SIMPLE DATA-DRIVEN APPROACH
-        parsed = parse_im_embed(embed)
-        
+        with PARSE_SECONDS.time():
+            parsed = parse_im_embed(embed, labels)
+
         # 🆕 SIMPLE LOGIC: If we have any non-NULL rank data, it's an $im response
-        has_valid_data = (
-            parsed and 
-            any(value is not None for value in [
-                parsed.get('kakera_value'), 
-                parsed.get('claim_rank'), 
-                parsed.get('like_rank')
-            ])
-        )
+        update = im_update_from_parsed(parsed)
 
-        if has_valid_data:
+        if update:
             print(f"[ℹ️] Processing $im response (has valid data)")
-
-            # 🧩 Normalize field names to match DB schema
-            normalized = {
-                "name_display": parsed.get("name_display") or parsed.get("name"),
-                "series_display": parsed.get("series_display") or parsed.get("series"),
-                "kakera_value": parsed.get("kakera_value"),
-                "claim_rank": parsed.get("claim_rank"),
-                "like_rank": parsed.get("like_rank"),
-            }
-
-            # 🧩 Drop any None keys before DB call (prevents null overwrites)
-            clean_data = {k: v for k, v in normalized.items() if v is not None}
-
-            try:
-                result = await upsert_character_from_im(**clean_data)
-
-                kakera = clean_data.get('kakera_value', 'None')
-                claim = clean_data.get('claim_rank', 'None')
-                like = clean_data.get('like_rank', 'None')
-
-                if result == "new":
-                    print(f"[🆕] NEW ENTRY from $im: {clean_data.get('name_display')} | {clean_data.get('series_display')} (Kakera={kakera}, Claim={claim}, Like={like})")
-                else:
-                    print(f"[🔁] Updated from $im: {clean_data.get('name_display')} | {clean_data.get('series_display')} (Kakera={kakera}, Claim={claim}, Like={like})")
-
-            except Exception as e:
-                print(f"[⚠️] DB upsert error: {e}")
-
             print("[🚫] Skipping DM logic for $im — info-only update.")
-            return
-
+            return self.lanes.submit("db", self._apply_im_update, update, received_at=received_at)
 
         # ============================================================
         # 5️⃣ Detect Roll / Claim
         # ============================================================
         # Only reaches here if it's NOT an $im response (no valid data)
-        claimed_roll = any(p in desc_lower or p in footer_lower for p in ["belongs to", "is married to", "claimed by"])
-        new_roll = any(p in desc_lower for p in ["react with any emoji to claim", "react with any emoji to claim!"])
+        claim_phrase = bool(labels & CLAIM_PHRASE)
+        new_roll = bool(labels & NEW_ROLL)
         user_roll = self.last_roller_name and (
             self.last_roller_name in desc_lower or self.last_roller_name in footer_lower
         )
 
-        if not (claimed_roll or new_roll or user_roll):
+        if not (claim_phrase or new_roll or user_roll):
             print("[🚫] Ignored embed: not a roll/claim pattern.")
+            self.counters["not_roll"] += 1
             return
 
         print("🎯 Detected roll embed — parsing...")
-        parsed = parse_im_embed(embed) or {}
-        name_display = parsed.get("name_display") or parsed.get("name") or "Unknown"
-        series_display = parsed.get("series_display") or parsed.get("series") or "Unknown"
+        name_display = parsed.name_display or "Unknown"
+        series_display = parsed.series_display or "Unknown"
         print(f"[📦] Parsed: {name_display} | {series_display}")
 
+        # Every owner was alerted for this character recently → no lookup, no decision
+        owner_ids = OWNER_IDS or [OWNER_ID]
+        name_key = normalize_text(name_display)
+        if all((oid, name_key) in self.alert_cooldown for oid in owner_ids):
+            self.counters["cooldown_skips"] += 1
+            print(f"[⏳] {name_display} alerted within {self.alert_cooldown.ttl:g}s — skipping.")
+            return
+        self.counters["rolls_evaluated"] += 1
+
         # 🆕 CRITICAL: Prevent roll data from being mistaken for $im
         # Rolls should NEVER write to database - only read from it
         print(f"[🛡️] Roll protection: Ensuring no DB write for roll data")
         # Explicitly skip any database upsert for rolls
 
+        # 🏆 Claimed rolls ALWAYS trigger a DM (keywords or purple claimed colour)
+        claimed_roll = bool(labels & CLAIMED) or is_claimed_color(embed.color.value if getattr(embed, "color", None) else None)
+        # Decided now, while _last_owner_roll still refers to this roll
+        owner_roller = self._last_owner_roll
+        is_owner_roll = bool(owner_roller and owner_roller in (desc_lower + footer_lower))
+
+        # ============================================================
+        # 🚦 Lane: an unclaimed roll races the claim window → fast lane;
+        # a claimed roll's DM is informational and waits behind it
+        # ============================================================
+        lane = "notify" if claimed_roll else "fast"
+        self.pending_edits[message.id] = None
+        return self.lanes.submit(
+            lane, self._evaluate_roll_job, message.id, embed, parsed, name_display, series_display,
+            name_key, claimed_roll, is_owner_roll, owner_roller, received_at=received_at,
+        )
+
+    async def _evaluate_roll_job(self, message_id: int, *args) -> bool:
+        """_evaluate_roll, then replay a claim / kakera edit that arrived while it was queued or running."""
+        try:
+            return await self._evaluate_roll(message_id, *args)
+        finally:
+            edited = self.pending_edits.pop(message_id, None)
+            if edited is not None:
+                self._reevaluate_edit(edited)
+
+    async def _evaluate_roll(self, message_id: int, embed, parsed, name_display: str, series_display: str,
+                             name_key: str, claimed_roll: bool, is_owner_roll: bool, owner_roller) -> bool:
+        """Lookup → merge → decide → DM for one roll (runs on a lane worker). True if a DM went out."""
         # ============================================================
-        # 6️⃣ Fetch DB Info
+        # 6️⃣ Fetch DB Info (character + series tier, one query)
         # ============================================================
-        db_info = await get_character_info(name_display, series_display)
-        if db_info:
-            print(f"[🧠] DB entry found: Kakera={db_info.get('kakera_value')} Claim={db_info.get('claim_rank')} Like={db_info.get('like_rank')}")
+        try:
+            with LOOKUP_SECONDS.time():
+                db_info = await resolve_character(name_display, series_display)
+        except Exception as e:
+            print(f"[⚠️] DB lookup failed: {e}")
+            db_info = None
+        known = db_info or EMPTY_CHARACTER
+        if known.name_display:
+            print(f"[🧠] DB entry found: Kakera={known.kakera_value} Claim={known.claim_rank} Like={known.like_rank}")
         else:
             print(f"[🕳️] No DB record for {name_display} | {series_display}")
 
-        # Merge parsed + DB
-        payload = {
-            "name_display": name_display,
-            "series_display": series_display,
-            "kakera_value": parsed.get("kakera_value") or (db_info or {}).get("kakera_value"),
-            "claim_rank": parsed.get("claim_rank") or (db_info or {}).get("claim_rank"),
-            "like_rank": parsed.get("like_rank") or (db_info or {}).get("like_rank"),
-        }
+        # ============================================================
+        # 7️⃣ Merge parsed + DB, compute Meta / Rank (one record)
+        # ============================================================
+        kakera_value = to_int(parsed.kakera_value or known.kakera_value)
+        claim_rank = to_int(parsed.claim_rank or known.claim_rank)
+        like_rank = to_int(parsed.like_rank or known.like_rank)
+        meta_rank = compute_meta_rank(claim_rank, like_rank)
+        series_tier = known.series_tier or "Unknown"
+        roll = Character(name_display, series_display, kakera_value, claim_rank, like_rank, meta_rank, series_tier)
 
         print("\n" + "═" * 65)
         emoji_type = "🫶" if claimed_roll else "🎲"
         print(f"{emoji_type} **Processing Roll:** {name_display} | {series_display}")
-        print(f"💎 Kakera: {payload['kakera_value'] or '❔'} | 📈 Claim Rank: {payload['claim_rank'] or '❔'} | 💖 Like Rank: {payload['like_rank'] or '❔'}")
+        print(f"💎 Kakera: {kakera_value or '❔'} | 📈 Claim Rank: {claim_rank or '❔'} | 💖 Like Rank: {like_rank or '❔'}")
         print("──────────────────────────────")
 
-        # ============================================================
-        # 7️⃣ Compute Meta / Rank Logic
-        # ============================================================
-        kakera_value = payload["kakera_value"]
-        claim_rank = payload["claim_rank"]
-        like_rank = payload["like_rank"]
-
-        try:
-            kakera_value = int(kakera_value) if kakera_value else None
-        except (ValueError, TypeError) as e:
-            print(f"[⚠️] Kakera conversion failed: {e}")
-            kakera_value = None
-            
-        try:
-            claim_rank = int(claim_rank) if claim_rank else None
-        except (ValueError, TypeError) as e:
-            print(f"[⚠️] Claim rank conversion failed: {e}")
-            claim_rank = None
-            
-        try:
-            like_rank = int(like_rank) if like_rank else None
-        except (ValueError, TypeError) as e:
-            print(f"[⚠️] Like rank conversion failed: {e}")
-            like_rank = None
-
-        meta_rank = None
-        if claim_rank and like_rank:
-            meta_rank = (claim_rank + like_rank) // 2
-        elif claim_rank:
-            meta_rank = claim_rank
-        elif like_rank:
-            meta_rank = like_rank
-
-        payload.update({
-            "kakera_value": kakera_value,
-            "claim_rank": claim_rank,
-            "like_rank": like_rank,
-            "meta_rank": meta_rank,
-        })
-
         print(f"💭 Evaluating: Meta ≤ {self.meta_rank_threshold}, Kakera ≥ {self.kakera_threshold}, Tier ≥ {self.dm_tier_threshold}")
         print(f"🧮 Computed Meta Rank: {meta_rank or '❔'}")
 
         # ============================================================
-        # 8️⃣ DM Decision Logic (Priority-based + Detailed Debug Output)
+        # 8️⃣ DM Decision Logic (shared RulesEngine)
         # ============================================================
-        should_dm = False
-        reasons = []
-        series_name = series_display or "Unknown"
-        series_tier = "Unknown"
-
-        # 🏆 1️⃣ Claimed rolls ALWAYS trigger a DM
-        claimed_keywords = ["belongs to", "is married to", "claimed by", "has claimed", "💍"]
-        claimed_roll = any(
-            kw in desc_lower or kw in footer_lower or kw in (embed.title or "").lower()
-            for kw in claimed_keywords
-        )
-
-        # 🩵 Detect purple "claimed" embed color (Mudae uses ~0xf47fff)
-        if hasattr(embed, "color") and embed.color:
-            color_val = embed.color.value
-            if 0xf47ff0 <= color_val <= 0xf480ff:
-                claimed_roll = True
-
         if claimed_roll:
-            should_dm = True
             print("[🏆] Claimed roll detected — DM will be sent unconditionally.")
 
-        # 💎 2️⃣ Hard block: if Kakera known and below threshold (and not claimed)
-        kakera_known = kakera_value is not None
-        kakera_low = kakera_known and kakera_value < self.kakera_threshold
-        if kakera_low and not claimed_roll:
-            reasons.append(f"💎 Kakera too low ({kakera_value} < {self.kakera_threshold})")
-            should_dm = False
-        else:
-            # 🧮 3️⃣ Continue with Meta / Series logic
-            meta_ok = meta_rank and meta_rank <= self.meta_rank_threshold
-            kakera_ok = kakera_value and kakera_value >= self.kakera_threshold
+        facts = RollFacts(roll.kakera_value, roll.meta_rank, roll.series_tier, claimed_roll)
+        decision = self.rules.decide(facts)
 
-            try:
-                series_info = get_series_info(series_name)
-                series_tier = series_info["tier"] if series_info else "Unknown"
-            except Exception as e:
-                print(f"[⚠️] Series info fetch failed: {e}")
-                series_tier = "Unknown"
-
-            tier_val = {"S":5,"A":4,"B":3,"C":2,"D":1,"Unknown":0}
-            required_tier_val = tier_val.get(self.dm_tier_threshold, 3)
-            current_tier_val = tier_val.get(series_tier, 0)
-            tier_ok = current_tier_val >= required_tier_val
-
-            if not should_dm:
-                if meta_ok:
-                    should_dm = True
-                elif tier_ok:
-                    should_dm = True
-                elif kakera_ok:
-                    should_dm = True
-
-            # Collect reasons for debugging
-            if not meta_ok:
-                reasons.append(f"📉 Meta too high ({meta_rank or '❔'} > {self.meta_rank_threshold})")
-            if not tier_ok:
-                reasons.append(f"🏷️ Tier below {self.dm_tier_threshold} ({series_tier or 'Unknown'})")
-            if not kakera_ok:
-                reasons.append(f"💎 Kakera below {self.kakera_threshold} ({kakera_value or '❔'})")
-
-        # ✅ 4️⃣ Claimed rolls override everything
-        if claimed_roll:
-            should_dm = True
-            reasons.clear()  # claimed rolls ignore all failure reasons
+        # ⭐ Wishlist hits DM regardless of thresholds (and of who rolled)
+        await self.wishlist.ensure_loaded()
+        wishes = tuple(e.display for e in self.wishlist.match(name_display, series_display))
+        should_dm = decision.should_dm or bool(wishes)
 
         # ✅ Unified single output block (with bright blue highlight)
         if should_dm:
@@ -317,77 +400,164 @@ class RecommenderListenerV2(commands.Cog):
                 f"   • 💎 Kakera: {kakera_value or '❔'} (≥ {self.kakera_threshold})\n"
                 f"   • 📈 Meta Rank: {meta_rank or '❔'} (≤ {self.meta_rank_threshold})\n"
                 f"   • 🏆 Series Tier: {series_tier or 'Unknown'} (≥ {self.dm_tier_threshold})\n"
+                f"   • ⭐ Wishlist: {', '.join(wishes) or '—'}\n"
                 f"{BLUE_BOLD}{'═' * 60}{RESET}"
             )
         else:
             print("💤 **No DM Sent.** Reasons:")
-            for r in reasons:
+            for r in self.rules.failure_reasons(facts, decision):
                 print(f"   • {r}")
             print("──────────────────────────────")
 
-
-        payload.update({"should_dm": should_dm, "series_tier": series_tier})
-
+        # Cache what we know so a later claim / kakera edit needs no re-parse or lookup
+        state = RollState(roll, *_embed_signature(embed), claimed_roll, is_owner_roll, False, name_key, wishes)
+        self.processed.set(message_id, state)
 
         # ============================================================
         # 🆕 FIXED: Owner-only Mode Check
         # ============================================================
-        if self.owner_only_dm:
-            # Check if this is an owner roll by name matching
-            is_owner_roll = (
-                self._last_owner_roll and 
-                self._last_owner_roll in (desc_lower + footer_lower)
-            )
-            if not is_owner_roll:
-                print("[🚫] Ignored DM: Non-owner roll (owner-only mode).")
-                return
+        if self.owner_only_dm and not is_owner_roll and not wishes:
+            print("[🚫] Ignored DM: Non-owner roll (owner-only mode).")
+            self.counters["owner_only_skipped"] += 1
+            return False
 
         if not should_dm:
             print("💭 Decision: No DM triggered.")
-            return
+            self.counters["no_dm"] += 1
+            return False
 
         # ============================================================
         # 🔟 Send DM Embed
         # ============================================================
-        owner_ids = OWNER_IDS or [OWNER_ID]
-        emoji_map = {"S":"💎","A":"🌟","B":"⭐","C":"✨","D":"💤","Unknown":"🎯"}
-        color_map = {"S":discord.Color.gold(),"A":discord.Color.purple(),"B":discord.Color.blue(),
-                     "C":discord.Color.teal(),"D":discord.Color.dark_grey(),"Unknown":discord.Color.dark_grey()}
-        emoji = emoji_map.get(series_tier,"🎯")
-        color = color_map.get(series_tier,discord.Color.dark_grey())
-
-        dm_embed = discord.Embed(
-            title=f"{emoji} {name_display} — {series_tier}-Tier",
-            description=(
-                f"**Series:** {series_display}\n"
-                f"**Meta Rank:** {meta_rank or '❔'}\n"
-                f"**Kakera:** {kakera_value or '❔'}\n"
-                f"**Claimed:** {'✅' if claimed_roll else '❌'}"
-            ),
-            color=color
-        )
+        sent = await self._send_alert(roll, claimed_roll, embed, name_key, wishes)
+        if sent:
+            self.processed.set(message_id, state._replace(alerted=True))
+
+        # 🆕 CLEANUP: Reset roll tracking (unless the owner has rolled again meanwhile)
+        if self._last_owner_roll == owner_roller:
+            self._last_owner_roll = None
+            self.last_roller_name = None
 
-        # 🆕 IMPROVED: Safe image handling
-        if hasattr(embed, 'image') and embed.image and hasattr(embed.image, 'url') and embed.image.url:
-            dm_embed.set_image(url=embed.image.url)
-        elif hasattr(embed, 'thumbnail') and embed.thumbnail and hasattr(embed.thumbnail, 'url') and embed.thumbnail.url:
-            dm_embed.set_thumbnail(url=embed.thumbnail.url)
+        print("🏁 Roll processing complete - exiting")
+        return sent
 
-        for oid in owner_ids:
+    async def _apply_im_update(self, update):
+        """Write one $im result (runs on the single-worker db lane)."""
+        try:
+            # None fields are the upsert's own defaults — they never overwrite
+            with UPSERT_SECONDS.time():
+                result = await upsert_character_from_im(*update[:5])
+            self.counters["im_new" if result == "new" else "im_updated"] += 1
+
+            kakera, claim, like = update.kakera_value, update.claim_rank, update.like_rank
+            if result == "new":
+                print(f"[🆕] NEW ENTRY from $im: {update.name_display} | {update.series_display} (Kakera={kakera}, Claim={claim}, Like={like})")
+            else:
+                print(f"[🔁] Updated from $im: {update.name_display} | {update.series_display} (Kakera={kakera}, Claim={claim}, Like={like})")
+            return result
+
+        except Exception as e:
+            self.counters["im_errors"] += 1
+            print(f"[⚠️] DB upsert error: {e}")
+
+    async def _send_alert(self, roll: Character, claimed: bool, embed, name_key: str,
+                          wishes: Tuple[str, ...] = ()) -> bool:
+        """DM every owner not in cooldown for this character. True if any DM went out."""
+        image = getattr(embed, "image", None)
+        thumbnail = getattr(embed, "thumbnail", None)
+        dm_embed = character_dm_embed(
+            roll, claimed,
+            image_url=getattr(image, "url", None),
+            thumbnail_url=getattr(thumbnail, "url", None),
+            wishes=wishes,
+        )
+
+        sent = False
+        for oid in OWNER_IDS or [OWNER_ID]:
+            if (oid, name_key) in self.alert_cooldown:
+                self.counters["dms_suppressed"] += 1
+                continue
             try:
-                user = await self.bot.fetch_user(int(oid))
+                with DM_SECONDS.time():
+                    user = await self.bot.fetch_user(int(oid))
+                    if user:
+                        await user.send(embed=dm_embed)
                 if user:
-                    await user.send(embed=dm_embed)
-                    print(f"[💌] DM sent to {user.name} for {name_display} | Tier={series_tier}")
+                    self.alert_cooldown.set((oid, name_key))
+                    self.counters["dms_sent"] += 1
+                    sent = True
+                    print(f"[💌] DM sent to {user.name} for {roll.name_display} | Tier={roll.series_tier}")
             except Exception as e:
+                self.counters["dm_errors"] += 1
                 print(f"[❌] DM failed for {oid}: {e}")
+        return sent
 
-        # 🆕 CLEANUP: Reset roll tracking
-        self._last_owner_roll = None
-        self.last_roller_name = None
+    # ============================================================
+    # ✏️ Roll edits (claim / kakera react)
+    # ============================================================
+    @commands.Cog.listener()
+    async def on_message_edit(self, before: discord.Message, after: discord.Message):
+        """
+        Mudae edits a roll when it is claimed or kakera is reacted. Diff the
+        description / footer / colour against the cached RollState and
+        re-evaluate only the claim flag and kakera value — no re-parse, no DB.
+        An edit to a roll whose job hasn't finished is held and replayed after it.
+        """
+        if not after.embeds or "mudae" not in (getattr(after.author, "name", "") or "").lower():
+            return
+        self.counters["edits_seen"] += 1
+        if after.id in self.pending_edits:
+            # Claimed before the roll job finished: keep the newest edit, the job replays it
+            self.pending_edits[after.id] = after
+            self.counters["edits_deferred"] += 1
+            return
+        return self._reevaluate_edit(after)
+
+    def _reevaluate_edit(self, after: discord.Message):
+        """Diff one edited roll against its RollState; submits the alert job if it now qualifies."""
+        state = self.processed.get(after.id)
+        if not isinstance(state, RollState):
+            # Not a roll we evaluated ($im, utility, cooldown skip) or it aged out
+            self.counters["edits_uncached"] += 1
+            return
 
-        print("🏁 Roll processing complete - exiting")
+        embed = after.embeds[0]
+        description, footer, color = _embed_signature(embed)
+        desc_changed = description != state.description
+        if not (desc_changed or footer != state.footer or color != state.color):
+            self.counters["edits_unchanged"] += 1
+            return
 
-        # 🆕 ADD THIS RETURN STATEMENT:
-        return
-        # This prevents the code from continuing to the $im detection logic
\ No newline at end of file
+        roll, claimed = state.roll, state.claimed
+        if desc_changed:
+            kakera = extract_kakera(description)
+            if kakera and kakera != roll.kakera_value:
+                roll = roll._replace(kakera_value=kakera)
+        if not claimed:  # a claim is never undone
+            claimed = is_claimed_embed(description.lower(), footer.lower(), (embed.title or "").lower(), color)
+
+        current = state._replace(roll=roll, description=description, footer=footer, color=color, claimed=claimed)
+        self.processed.set(after.id, current)
+        if roll is state.roll and claimed == state.claimed:
+            self.counters["edits_unchanged"] += 1
+            return
+
+        self.counters["edits_reevaluated"] += 1
+        if claimed != state.claimed:
+            print(f"[🫶] {roll.name_display} was just claimed (message edited).")
+        if roll is not state.roll:
+            print(f"[💎] {roll.name_display} kakera {state.roll.kakera_value or '❔'} → {roll.kakera_value}")
+
+        decision = self.rules.decide(RollFacts(roll.kakera_value, roll.meta_rank, roll.series_tier, claimed))
+        if not (decision.should_dm or state.wishes) or state.alerted:
+            return
+        if self.owner_only_dm and not state.owner_roll and not state.wishes:
+            return
+        return self.lanes.submit("notify" if claimed else "fast", self._alert_from_edit,
+                                 after.id, current, embed)
+
+    async def _alert_from_edit(self, message_id: int, state: RollState, embed) -> bool:
+        sent = await self._send_alert(state.roll, state.claimed, embed, state.name_key, state.wishes)
+        if sent:
+            self.processed.set(message_id, state._replace(alerted=True))
+        return sent
@@ -0,0 +1,216 @@
+# ============================================================
+# ⚖️ DM Rules Engine — one decision path for every caller
+# ============================================================
+"""
+Pure (no I/O) version of the DM decision that used to live inline in
+RecommenderListenerV2.on_message. The listener, the debug cog and the
+backtester all call into this module so they can never drift apart.
+
+Every possible outcome is a prebuilt Decision, so scoring a roll is a handful
+of comparisons plus one tuple lookup — no per-roll allocations.
+"""
+import os
+from typing import Iterable, List, NamedTuple, Optional
+
+# ============================================================
+# 🏷️ Static rule tables
+# ============================================================
+
+TIER_VALUES = {"S": 5, "A": 4, "B": 3, "C": 2, "D": 1, "Unknown": 0}
+DEFAULT_REQUIRED_TIER_VALUE = TIER_VALUES["B"]
+
+CLAIMED_KEYWORDS = ("belongs to", "is married to", "claimed by", "has claimed", "💍")
+
+# Mudae paints claimed embeds purple (~0xf47fff)
+CLAIMED_COLOR_MIN = 0xf47ff0
+CLAIMED_COLOR_MAX = 0xf480ff
+
+
+class RollFacts(NamedTuple):
+    """Everything the decision needs about one roll (already merged with DB data)."""
+    kakera_value: Optional[int]
+    meta_rank: Optional[int]
+    series_tier: str = "Unknown"
+    claimed: bool = False
+
+
+class Decision(NamedTuple):
+    should_dm: bool
+    claimed: bool
+    kakera_blocked: bool
+    meta_ok: bool
+    tier_ok: bool
+    kakera_ok: bool
+
+
+def _build_decision_table() -> tuple:
+    """Index = claimed<<4 | blocked<<3 | meta_ok<<2 | tier_ok<<1 | kakera_ok."""
+    table = []
+    for idx in range(32):
+        claimed, blocked, meta_ok, tier_ok, kakera_ok = (bool(idx & (1 << b)) for b in (4, 3, 2, 1, 0))
+        should_dm = claimed or (not blocked and (meta_ok or tier_ok or kakera_ok))
+        table.append(Decision(should_dm, claimed, blocked, meta_ok, tier_ok, kakera_ok))
+    return tuple(table)
+
+
+_DECISIONS = _build_decision_table()
+
+
+# ============================================================
+# 🧮 Pure helpers
+# ============================================================
+
+def to_int(value) -> Optional[int]:
+    """The listener's coercion: falsy (0, '', None) and junk both mean unknown."""
+    try:
+        return int(value) if value else None
+    except (ValueError, TypeError):
+        return None
+
+
+def compute_meta_rank(claim_rank: Optional[int], like_rank: Optional[int]) -> Optional[int]:
+    """Integer average of both ranks, or whichever one is known."""
+    if claim_rank and like_rank:
+        return (claim_rank + like_rank) // 2
+    return claim_rank or like_rank or None
+
+
+def is_claimed_embed(desc_lower: str, footer_lower: str, title_lower: str,
+                     color_value: Optional[int] = None) -> bool:
+    """Claimed keyword in description/footer/title, or Mudae's purple claimed colour."""
+    for kw in CLAIMED_KEYWORDS:
+        if kw in desc_lower or kw in footer_lower or kw in title_lower:
+            return True
+    return is_claimed_color(color_value)
+
+
+def is_claimed_color(color_value: Optional[int]) -> bool:
+    """Mudae's purple claimed colour (the keyword half is EMBED_CLASSIFIER's CLAIMED label)."""
+    return bool(color_value) and CLAIMED_COLOR_MIN <= color_value <= CLAIMED_COLOR_MAX
+
+
+# ============================================================
+# 🎯 Engine
+# ============================================================
+
+class RulesEngine:
+    """
+    Compiled DM rules for one threshold set.
+      1️⃣ Claimed rolls always DM
+      2️⃣ Known kakera below threshold hard-blocks
+      3️⃣ Otherwise meta OR tier OR kakera
+    """
+
+    __slots__ = ("kakera_threshold", "meta_rank_threshold", "dm_tier_threshold", "required_tier_value")
+
+    def __init__(self, kakera_threshold: int = 100, meta_rank_threshold: int = 5000,
+                 dm_tier_threshold: str = "B"):
+        self.kakera_threshold = int(kakera_threshold)
+        self.meta_rank_threshold = int(meta_rank_threshold)
+        self.dm_tier_threshold = (dm_tier_threshold or "B").upper()
+        self.required_tier_value = TIER_VALUES.get(self.dm_tier_threshold, DEFAULT_REQUIRED_TIER_VALUE)
+
+    @classmethod
+    def from_env(cls) -> "RulesEngine":
+        return cls(
+            kakera_threshold=int(os.getenv("KAKERA_THRESHOLD", 100)),
+            meta_rank_threshold=int(os.getenv("META_RANK_THRESHOLD", 5000)),
+            dm_tier_threshold=os.getenv("DM_TIER_THRESHOLD", "B"),
+        )
+
+    def kakera_blocks(self, kakera_value: Optional[int], claimed: bool) -> bool:
+        """True when the roll is rejected before series tier even matters."""
+        return not claimed and kakera_value is not None and kakera_value < self.kakera_threshold
+
+    def decide(self, facts: RollFacts) -> Decision:
+        kakera_value, meta_rank, series_tier, claimed = facts
+        kt = self.kakera_threshold
+        idx = (
+            (16 if claimed else 0)
+            | (8 if (kakera_value is not None and kakera_value < kt and not claimed) else 0)
+            | (4 if (meta_rank and meta_rank <= self.meta_rank_threshold) else 0)
+            | (2 if TIER_VALUES.get(series_tier, 0) >= self.required_tier_value else 0)
+            | (1 if (kakera_value and kakera_value >= kt) else 0)
+        )
+        return _DECISIONS[idx]
+
+    def decide_batch(self, rolls: Iterable[RollFacts]) -> List[Decision]:
+        """Score many rolls; same result as calling decide() on each."""
+        kt = self.kakera_threshold
+        mt = self.meta_rank_threshold
+        rt = self.required_tier_value
+        tier_get = TIER_VALUES.get
+        table = _DECISIONS
+        out = []
+        append = out.append
+        for kakera_value, meta_rank, series_tier, claimed in rolls:
+            append(table[
+                (16 if claimed else 0)
+                | (8 if (kakera_value is not None and kakera_value < kt and not claimed) else 0)
+                | (4 if (meta_rank and meta_rank <= mt) else 0)
+                | (2 if tier_get(series_tier, 0) >= rt else 0)
+                | (1 if (kakera_value and kakera_value >= kt) else 0)
+            ])
+        return out
+
+    # --------------------------------------------------------
+    # Human-readable explanations (only built when printed)
+    # --------------------------------------------------------
+    def failure_reasons(self, facts: RollFacts, decision: Decision) -> List[str]:
+        """Why no DM — same wording the listener has always printed."""
+        if decision.claimed:
+            return []
+        if decision.kakera_blocked:
+            return [f"💎 Kakera too low ({facts.kakera_value} < {self.kakera_threshold})"]
+        reasons = []
+        if not decision.meta_ok:
+            reasons.append(f"📉 Meta too high ({facts.meta_rank or '❔'} > {self.meta_rank_threshold})")
+        if not decision.tier_ok:
+            reasons.append(f"🏷️ Tier below {self.dm_tier_threshold} ({facts.series_tier or 'Unknown'})")
+        if not decision.kakera_ok:
+            reasons.append(f"💎 Kakera below {self.kakera_threshold} ({facts.kakera_value or '❔'})")
+        return reasons
+
+    def success_reasons(self, facts: RollFacts, decision: Decision) -> List[str]:
+        """Which rules fired for a DM."""
+        if not decision.should_dm:
+            return []
+        reasons = []
+        if decision.claimed:
+            reasons.append("Claimed roll")
+        if decision.meta_ok:
+            reasons.append(f"Meta≤{self.meta_rank_threshold} ({facts.meta_rank})")
+        if decision.tier_ok:
+            reasons.append(f"Series-tier {facts.series_tier}≥{self.dm_tier_threshold}")
+        if decision.kakera_ok:
+            reasons.append(f"Kakera≥{self.kakera_threshold} ({facts.kakera_value})")
+        return reasons
+
+
+# ============================================================
+# 🧪 Quick throughput check
+# ============================================================
+if __name__ == "__main__":
+    import random
+    import time
+
+    rng = random.Random(0)
+    tiers = list(TIER_VALUES)
+    rolls = [
+        RollFacts(
+            rng.choice([None, rng.randint(30, 1500)]),
+            rng.choice([None, rng.randint(1, 60000)]),
+            rng.choice(tiers),
+            rng.random() < 0.05,
+        )
+        for _ in range(200_000)
+    ]
+    engine = RulesEngine()
+
+    t0 = time.perf_counter()
+    decisions = engine.decide_batch(rolls)
+    elapsed = time.perf_counter() - t0
+    assert decisions == [engine.decide(r) for r in rolls]
+
+    print(f"[⚡] Scored {len(rolls):,} rolls in {elapsed * 1000:.1f} ms "
+          f"→ {len(rolls) / (elapsed * 1000):,.0f} rolls/ms ({sum(d.should_dm for d in decisions):,} DMs)")
@@ -0,0 +1,104 @@
+# src/bot/recommender/wishlist_cog.py
+import logging
+
+from discord.ext import commands
+
+from src.bot.config import OWNER_IDS
+from src.bot.db.wishlist import get_wishlist
+
+logger = logging.getLogger("mudae-helper.wishlist")
+
+# Discord message limit, minus room for the header
+MAX_MESSAGE_CHARS = 1900
+
+
+class WishlistCog(commands.Cog):
+    """Owner commands for the wishlist (wish / wish_series / unwish / wishlist / wish_test)."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.wishlist = get_wishlist()
+        print("[⭐] WishlistCog loaded")
+
+    async def cog_load(self):
+        await self.wishlist.ensure_loaded()
+        print(f"[⭐] Wishlist: {self.wishlist.stats()}")
+
+    async def _add(self, ctx, kind: str, text: str):
+        if ctx.author.id not in OWNER_IDS:
+            await ctx.send("🚫 Only the owner can edit the wishlist.")
+            return
+        try:
+            entry, created = await self.wishlist.add(kind, text, ctx.author.id)
+        except Exception as e:
+            logger.error(f"Wishlist add failed: {e}")
+            await ctx.send(f"❌ Could not save: {e}")
+            return
+        if entry is None:
+            await ctx.send("⚠️ Nothing to match after normalization.")
+        elif created:
+            await ctx.send(f"⭐ Added {kind} **{entry.display}** (`#{entry.id}`, matches `{entry.pattern}`).")
+        else:
+            await ctx.send(f"ℹ️ {kind.capitalize()} **{entry.display}** is already wished (`#{entry.id}`).")
+
+    @commands.command(name="wish")
+    async def wish_cmd(self, ctx, *, name: str):
+        """DM me whenever this character is rolled (any thresholds, any roller)."""
+        await self._add(ctx, "character", name)
+
+    @commands.command(name="wish_series")
+    async def wish_series_cmd(self, ctx, *, series: str):
+        """DM me for every roll from this series."""
+        await self._add(ctx, "series", series)
+
+    @commands.command(name="unwish")
+    async def unwish_cmd(self, ctx, *, key: str):
+        """Remove a wishlist entry by #id or by name."""
+        if ctx.author.id not in OWNER_IDS:
+            await ctx.send("🚫 Only the owner can edit the wishlist.")
+            return
+        removed = await self.wishlist.remove(key)
+        if not removed:
+            await ctx.send(f"❔ No wishlist entry for `{key}`.")
+            return
+        await ctx.send("🗑️ Removed " + ", ".join(f"{e.kind} **{e.display}** (`#{e.id}`)" for e in removed))
+
+    @commands.command(name="wishlist")
+    async def wishlist_cmd(self, ctx):
+        """List wishlist entries."""
+        if ctx.author.id not in OWNER_IDS:
+            await ctx.send("🚫 Only the owner can view the wishlist.")
+            return
+        await self.wishlist.ensure_loaded()
+        if not len(self.wishlist):
+            await ctx.send("📭 Wishlist is empty — add with `!wish <character>` or `!wish_series <series>`.")
+            return
+        header = f"⭐ **Wishlist** — {self.wishlist.stats()}\n"
+        lines = [f"`#{e.id}` {'🎴' if e.kind == 'character' else '📚'} {e.display}"
+                 for e in sorted(self.wishlist.entries.values(), key=lambda e: (e.kind, e.pattern))]
+        chunk = header
+        for line in lines:
+            if len(chunk) + len(line) + 1 > MAX_MESSAGE_CHARS:
+                await ctx.send(chunk)
+                chunk = ""
+            chunk += line + "\n"
+        if chunk:
+            await ctx.send(chunk)
+
+    @commands.command(name="wish_test")
+    async def wish_test_cmd(self, ctx, *, roll: str):
+        """Check a roll against the wishlist: !wish_test <name> | <series>"""
+        if ctx.author.id not in OWNER_IDS:
+            await ctx.send("🚫 Only the owner can test the wishlist.")
+            return
+        name, _, series = roll.partition("|")
+        await self.wishlist.ensure_loaded()
+        hits = self.wishlist.match(name.strip(), series.strip())
+        if hits:
+            await ctx.send("⭐ Wishlist hit: " + ", ".join(f"{e.kind} **{e.display}** (`#{e.id}`)" for e in hits))
+        else:
+            await ctx.send("💤 No wishlist match.")
+
+
+async def setup(bot):
+    await bot.add_cog(WishlistCog(bot))
@@ -1,173 +1,301 @@
 # src/bot/scraper.py
-import re
 import asyncio
 import logging
+import weakref
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List, Dict, Optional
+from pathlib import Path
+from typing import Dict, List, Optional
 from src.bot.db.crud import upsert_character
-from src.bot.utils.normalization import normalize_text
-from src.bot.config import DB_PATH  # used for context; not required in this file
+from src.bot.parsers.top_parser import TopEntry, parse_top_embed, parse_top_file
+from src.bot.config import DB_PATH
+from src.bot.utils.checkpoint import read_json, write_json_atomic
 
 logger = logging.getLogger("mudae-helper.scraper")
 
+# Checkpoints live next to the DB: data/scrape_claimed.json, data/scrape_liked.json
+CHECKPOINT_DIR = Path(DB_PATH).parent
+# Buffered pages are written to the DB once this many are waiting
+FLUSH_EVERY_PAGES = 5
+
+LIST_TYPES = ("claimed", "liked")
+# Live scraper instances, read by /metrics for per-list progress
+ACTIVE_SCRAPERS: "weakref.WeakSet[TopListScraper]" = weakref.WeakSet()
+_LIST_ALIASES = {"claimed": "claimed", "claim": "claimed", "claimed_list": "claimed", "top": "claimed",
+                 "liked": "liked", "like": "liked", "liked_list": "liked", "topl": "liked"}
+
+
+def canonical_list_type(list_type: Optional[str]) -> str:
+    return _LIST_ALIASES.get((list_type or "claimed").lower(), "claimed")
+
+
+# ============================================================
+# 🗺️ Per-list session (page bitmap + out-of-order buffer)
+# ============================================================
+
+@dataclass
+class ScrapeSession:
+    """
+    One $top / $topl scrape. Page N is bit N of an int bitmap:
+      - `received`: pages accepted (buffered or already in the DB)
+      - `ingested`: pages whose entries were written — the only thing checkpointed
+    """
+    list_type: str
+    total_pages: int
+    started_at: str = field(default_factory=lambda: datetime.utcnow().isoformat(timespec="seconds"))
+    received: int = 0
+    ingested: int = 0
+    buffer: Dict[int, List[TopEntry]] = field(default_factory=dict)
+    duplicates: int = 0
+    channel: object = None
+
+    @property
+    def checkpoint_path(self) -> Path:
+        return CHECKPOINT_DIR / f"scrape_{self.list_type}.json"
+
+    def has_page(self, page: int) -> bool:
+        return bool(self.received >> page & 1)
+
+    def missing_pages(self) -> List[int]:
+        return [p for p in range(1, self.total_pages + 1) if not self.received >> p & 1]
+
+    @property
+    def complete(self) -> bool:
+        full = ((1 << self.total_pages) - 1) << 1  # bits 1..total_pages
+        return self.ingested & full == full
+
+    def progress(self) -> str:
+        done = bin(self.ingested).count("1")
+        return f"{self.list_type}: {done}/{self.total_pages} pages ingested, {len(self.buffer)} buffered"
+
+    # --------------------------------------------------------
+    # Checkpoints (atomic JSON next to the DB)
+    # --------------------------------------------------------
+    def to_checkpoint(self) -> dict:
+        return {
+            "list_type": self.list_type,
+            "total_pages": self.total_pages,
+            "started_at": self.started_at,
+            "ingested": format(self.ingested, "x"),
+        }
+
+    @classmethod
+    def from_checkpoint(cls, data: dict) -> "ScrapeSession":
+        ingested = int(data.get("ingested", "0"), 16)
+        return cls(
+            list_type=data["list_type"],
+            total_pages=int(data.get("total_pages", 100)),
+            started_at=data.get("started_at") or datetime.utcnow().isoformat(timespec="seconds"),
+            received=ingested,
+            ingested=ingested,
+        )
+
+    def write_checkpoint(self):
+        write_json_atomic(self.checkpoint_path, self.to_checkpoint())
+
+    @classmethod
+    def load_checkpoint(cls, list_type: str) -> Optional["ScrapeSession"]:
+        data = read_json(CHECKPOINT_DIR / f"scrape_{list_type}.json")
+        try:
+            return cls.from_checkpoint(data) if data else None
+        except (KeyError, ValueError) as e:
+            logger.warning(f"Ignoring invalid {list_type} scrape checkpoint: {e}")
+            return None
+
+
+# ============================================================
+# 📡 Session manager
+# ============================================================
+
 class TopListScraper:
     """
-    v3 TopListScraper:
-      - manual workflow supported: call start_scraping(ctx, list_type)
-      - then human types $top <page> in the Mudae channel
-      - owner runs scraper_page(page) or the on_message handler will detect page footers automatically
+    v4 TopListScraper — one session per list type, so claimed and liked
+    scrapes can run at the same time:
+      - start_scraping(ctx, list_type) starts (or resumes from its checkpoint)
+      - pages are accepted in any order; duplicates (by footer page number)
+        are dropped before any DB write
+      - buffered pages are flushed every FLUSH_EVERY_PAGES pages and on completion
     """
     def __init__(self):
-        self.scraping = False
-        self.current_list: Optional[str] = None  # "claimed" or "liked"
-        self.current_page = 0
-        self.total_pages = 100  # default max pages to consider (configurable)
-        self.collected_data: List[Dict] = []
-        self.start_time: Optional[datetime] = None
-        self.message_channel = None
-        self.expected_manual_page: Optional[int] = None
-
-    async def start_scraping(self, ctx, list_type: str = "claimed", total_pages: int = 67) -> bool:
-        if self.scraping:
-            await ctx.send("❌ Scraper already running.")
+        self.sessions: Dict[str, ScrapeSession] = {}
+        self._lock = asyncio.Lock()  # serializes flushes / checkpoint writes
+        ACTIVE_SCRAPERS.add(self)
+
+    @property
+    def scraping(self) -> bool:
+        return bool(self.sessions)
+
+    async def start_scraping(self, ctx, list_type: str = "claimed", total_pages: int = 67,
+                             resume: bool = True) -> bool:
+        list_type = canonical_list_type(list_type)
+        if list_type in self.sessions:
+            await ctx.send(f"❌ `{list_type}` scraper already running. {self.sessions[list_type].progress()}")
             return False
 
-        self.scraping = True
-        self.current_list = list_type
-        self.current_page = 0
-        self.total_pages = total_pages
-        self.collected_data = []
-        self.start_time = datetime.utcnow()
-        self.message_channel = ctx.channel
-        self.expected_manual_page = None
-        await ctx.send(f"📡 Started scraper for `{list_type}`. Type `$top 1` in Mudae channel to begin (or use `$topl 1` for liked).")
-        logger.info(f"Started TopListScraper for {list_type}, expecting up to {total_pages} pages.")
+        session = ScrapeSession.load_checkpoint(list_type) if resume else None
+        if session is None:
+            session = ScrapeSession(list_type=list_type, total_pages=total_pages)
+        session.channel = ctx.channel
+        self.sessions[list_type] = session
+
+        command = "$top" if list_type == "claimed" else "$topl"
+        missing = session.missing_pages()
+        if session.ingested:
+            await ctx.send(
+                f"♻️ Resumed `{list_type}` scraper ({session.progress()}). "
+                f"Missing pages: {_format_pages(missing)} — type `{command} <page>` for each."
+            )
+        else:
+            await ctx.send(f"📡 Started scraper for `{list_type}`. Type `{command} 1` in Mudae channel to begin (any page order works).")
+        logger.info(f"Started TopListScraper for {list_type}, {len(missing)} of {session.total_pages} pages missing.")
         return True
 
+    def session_for_embed(self, embed) -> Optional[ScrapeSession]:
+        """Route an embed to its session: the only active one, or by 'like' in the title/author."""
+        if len(self.sessions) == 1:
+            return next(iter(self.sessions.values()))
+        author = getattr(getattr(embed, "author", None), "name", None) or ""
+        heading = f"{embed.title or ''} {author}".lower()
+        return self.sessions.get("liked" if "like" in heading else "claimed")
+
     async def process_top_embed(self, embed) -> bool:
         """
-        Parse a top-list embed returned by Mudae and add entries.
-        Returns True if parse succeeded for this embed.
+        Parse a top-list embed returned by Mudae and buffer its entries.
+        Returns True if the page was accepted (False for duplicates / unknown pages).
         """
         try:
-            # detect page from footer if present
-            page = None
-            if embed.footer and getattr(embed.footer, "text", None):
-                m = re.search(r'(\d{1,3})\s*(?:/|of)\s*(\d{1,3})', embed.footer.text)
-                if m:
-                    page = int(m.group(1))
-                    total = int(m.group(2))
-                    self.total_pages = total
-
-            # If expected_manual_page is set, require it to match (manual flow)
-            if self.expected_manual_page is not None:
-                if page is None or page != self.expected_manual_page:
-                    logger.debug(f"Embed page {page} did not match expected manual page {self.expected_manual_page}; skipping.")
-                    return False  # wait for the expected page
-                # once matched, clear expectation so next manual page can be set
-                self.expected_manual_page = None
-
-            # Collect text sources in embed
-            raw_text = []
-            if embed.title:
-                raw_text.append(embed.title)
-            if embed.description:
-                raw_text.append(embed.description)
-            if getattr(embed, "fields", None):
-                for f in embed.fields:
-                    if f.name:
-                        raw_text.append(f.name)
-                    if f.value:
-                        raw_text.append(f.value)
-            joined = "\n".join(raw_text)
-
-            # Normalize separators & split into lines
-            joined = joined.replace('\u200b', '').replace('\xa0', ' ')
-            lines = [line.strip() for line in joined.splitlines() if line.strip()]
-
-            # Pattern variations: "#1 - Name - Series" or "1. Name — Series" or "1) Name - Series"
-            patterns = [
-                re.compile(r'^\#?\s*(\d{1,4})\s*[-.)]\s*(.*?)\s*[-–—]\s*(.+)$'),  # "#1 - Name - Series" or "1. Name — Series"
-                re.compile(r'^\s*(\d{1,4})\.\s*(.*?)\s*[-–—]\s*(.+)$'),  # "1. Name — Series"
-                re.compile(r'^\s*(\d{1,4})\s*-\s*(.*?)\s*-\s*(.+)$'),  # "1 - Name - Series"
-            ]
-
-            found = 0
-            for line in lines:
-                # Skip short lines unlikely to contain entries
-                if len(line) < 6:
-                    continue
-                parsed = None
-                for pat in patterns:
-                    m = pat.match(line)
-                    if m:
-                        try:
-                            rank = int(m.group(1))
-                            name = m.group(2).strip()
-                            series = m.group(3).strip()
-                            parsed = (rank, name, series)
-                            break
-                        except Exception:
-                            parsed = None
-                if parsed:
-                    rank, name, series = parsed
-                    # sanitize common noise
-                    name = re.sub(r'<:[^>]+>', '', name).strip()
-                    series = re.sub(r'<:[^>]+>', '', series).strip()
-                    entry = {
-                        "rank": rank,
-                        "name_display": name,
-                        "series_display": series,
-                        "list_type": self.current_list
-                    }
-                    self.collected_data.append(entry)
-                    found += 1
-
-            logger.info(f"Processed top embed page={page} found {found} entries (total collected={len(self.collected_data)})")
-
-            # Optionally auto-save every N pages to avoid losing data
-            # We'll save immediately for reliability
-            if found > 0:
-                saved = await self.save_collected_to_db()
-                logger.info(f"Saved {saved} entries from page {page} to DB")
+            session = self.session_for_embed(embed)
+            if session is None:
+                return False
 
+            page, total, entries = parse_top_embed(embed)
+            if page is None:
+                # Mudae omits the footer when the whole list fits on one page
+                page, total = 1, (total or (1 if not session.received else None))
+                logger.info(f"[{session.list_type}] top embed without a page footer — ingesting it as page 1"
+                            + (" of a single-page list" if total == 1 else ""))
+            if total:
+                session.total_pages = total
+            if session.has_page(page):
+                session.duplicates += 1
+                logger.debug(f"[{session.list_type}] page {page} already received; skipping.")
+                return False
+
+            session.received |= 1 << page
+            session.buffer[page] = entries
+            logger.info(f"[{session.list_type}] page {page}/{session.total_pages}: {len(entries)} entries buffered")
+
+            if len(session.buffer) >= FLUSH_EVERY_PAGES or not session.missing_pages():
+                await self.flush(session)
+            if session.complete:
+                await self.complete_scraping(session.list_type)
             return True
 
         except Exception as e:
             logger.error(f"Error processing top embed: {e}")
             return False
 
+    async def flush(self, session: ScrapeSession) -> int:
+        """Write buffered pages to the DB and checkpoint them. Returns entries saved."""
+        async with self._lock:
+            pages, session.buffer = session.buffer, {}
+            saved = 0
+            for page in sorted(pages):
+                count, failed = await save_top_entries(pages[page], session.list_type)
+                saved += count
+                if failed:
+                    # Un-mark the page so it is reported missing and re-requested
+                    session.received &= ~(1 << page)
+                else:
+                    session.ingested |= 1 << page
+            if pages:
+                await asyncio.to_thread(session.write_checkpoint)
+                logger.info(f"Saved {saved} entries from pages {_format_pages(sorted(pages))} — {session.progress()}")
+            return saved
+
     async def save_collected_to_db(self) -> int:
-        """
-        Upsert all collected_data entries into DB.
-        Returns count of processed entries.
-        """
-        count = 0
-        # Use the crud.upsert_character which handles normalization & merge rules
-        for entry in list(self.collected_data):  # copy to avoid mutation issues
-            try:
-                rank = entry.get("rank", 0)
-                name = entry.get("name_display", "")
-                series = entry.get("series_display", "")
-                if self.current_list in ("claimed", "claim", "claimed_list"):
-                    await upsert_character(name_display=name, series_display=series, claim_rank=rank, data_source="top_claimed")
+        """Flush every active session. Returns count of processed entries."""
+        total = 0
+        for session in list(self.sessions.values()):
+            total += await self.flush(session)
+        return total
+
+    def status(self) -> List[str]:
+        lines = []
+        for s in self.sessions.values():
+            missing = s.missing_pages()
+            lines.append(f"{s.progress()}, {s.duplicates} duplicates skipped — missing: {_format_pages(missing)}")
+        return lines
+
+    async def complete_scraping(self, list_type: Optional[str] = None):
+        """Finish one session (or all): save leftovers, keep the checkpoint if pages are missing."""
+        targets = [canonical_list_type(list_type)] if list_type else list(self.sessions)
+        for lt in targets:
+            session = self.sessions.pop(lt, None)
+            if session is None:
+                continue
+            leftovers = await self.flush(session)
+            missing = [p for p in range(1, session.total_pages + 1) if not session.ingested >> p & 1]
+            if not missing and session.checkpoint_path.exists():
+                session.checkpoint_path.unlink()
+            logger.info(f"Top list scraping for {lt} stopped. Leftovers saved: {leftovers}, missing pages: {_format_pages(missing)}")
+            if session.channel is not None:
+                if missing:
+                    await session.channel.send(f"⏸️ `{lt}` scraper stopped — missing pages {_format_pages(missing)} (resume later).")
                 else:
-                    await upsert_character(name_display=name, series_display=series, like_rank=rank, data_source="top_liked")
-                count += 1
-                # Optionally remove from collected_data after saving
-                self.collected_data.remove(entry)
-            except Exception as e:
-                logger.error(f"Failed saving entry {entry}: {e}")
-        return count
-
-    async def complete_scraping(self):
-        """Finish scraping run: save leftovers and mark complete."""
-        if not self.scraping:
-            return
-        leftovers = await self.save_collected_to_db()
-        self.scraping = False
-        logger.info(f"Top list scraping complete. Leftovers saved: {leftovers}")
-
-    def set_expected_manual_page(self, page: int):
-        """Call this when owner types the helper command to indicate next $top page."""
-        self.expected_manual_page = page
+                    await session.channel.send(f"✅ `{lt}` scraper complete ({session.total_pages} pages).")
+
+
+def _format_pages(pages: List[int]) -> str:
+    """[1, 2, 3, 7, 9, 10] → '1-3, 7, 9-10'."""
+    if not pages:
+        return "none"
+    runs, start, prev = [], pages[0], pages[0]
+    for p in pages[1:]:
+        if p != prev + 1:
+            runs.append(f"{start}-{prev}" if start != prev else str(start))
+            start = p
+        prev = p
+    runs.append(f"{start}-{prev}" if start != prev else str(start))
+    return ", ".join(runs)
+
+
+# ============================================================
+# Shared save path (live pages + file imports)
+# ============================================================
+async def save_top_entries(entries: List[TopEntry], list_type: Optional[str]):
+    """Upsert (rank, name, series) entries; returns (saved_count, failed_entries)."""
+    claimed = list_type in ("claimed", "claim", "claimed_list")
+    saved, failed = 0, []
+    # Use the crud.upsert_character which handles normalization & merge rules
+    for entry in entries:
+        rank, name, series = entry
+        if claimed:
+            ok = await upsert_character(name_display=name, series_display=series, claim_rank=rank, data_source="top_claimed")
+        else:
+            ok = await upsert_character(name_display=name, series_display=series, like_rank=rank, data_source="top_liked")
+        if ok:
+            saved += 1
+        else:
+            logger.error(f"Failed saving entry {entry}")
+            failed.append(entry)
+    return saved, failed
+
+
+async def import_top_file(path, list_type: str = "claimed") -> int:
+    """Import a saved top list (e.g. data/tops_claimed.txt) through the live parser."""
+    entries = parse_top_file(path)
+    saved, failed = await save_top_entries(entries, list_type)
+    logger.info(f"Imported {saved}/{len(entries)} {list_type} entries from {path} ({len(failed)} failed)")
+    return saved
+
+
+if __name__ == "__main__":
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+
+    if len(sys.argv) < 2:
+        print("Usage: python -m src.bot.scraper <tops_file> [claimed|liked]")
+        sys.exit(1)
+    asyncio.run(import_top_file(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else "claimed"))
@@ -0,0 +1,228 @@
+# src/bot/utils/aho_corasick.py
+"""
+Aho-Corasick multi-pattern matcher.
+
+All patterns are found in one left-to-right pass over the text. Cost is
+O(len(text) + matches), however many patterns are loaded. A chain of
+`p in text` checks costs O(len(text) × patterns) instead.
+
+The automaton changes in place:
+  add()     inserts into the trie right away (new nodes only) and marks the
+            failure links stale.
+  remove()  tombstones the pattern id; the trie is left untouched.
+  search()  rebuilds the failure / dictionary links first if they are stale.
+            The rebuild is one BFS over the trie, so a batch of adds costs
+            one rebuild. Once tombstones outnumber live patterns, the trie is
+            also compacted.
+
+Pattern ids are stable across rebuilds and compaction.
+"""
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Tuple
+
+Match = Tuple[int, int, int]   # (start, end, pattern_id) — text[start:end] is the pattern
+
+COMPACT_MIN_TOMBSTONES = 64
+
+
+def _is_word(ch: str) -> bool:
+    return ch.isalnum()
+
+
+class AhoCorasick:
+    def __init__(self):
+        self._patterns: List[Optional[str]] = []     # pattern id → text, None once removed
+        self._by_text: Dict[str, int] = {}
+        self._tombstones = 0
+        self._reset_trie()
+        self.rebuilds = 0
+
+    def _reset_trie(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._ends: List[List[int]] = [[]]           # pattern ids ending exactly at this node
+        self._fail: List[int] = [0]
+        self._dict: List[int] = [0]                  # nearest fail-chain node that ends a pattern
+        self._stale = False
+
+    def __len__(self) -> int:
+        return len(self._patterns) - self._tombstones
+
+    def __contains__(self, pattern: str) -> bool:
+        return pattern in self._by_text
+
+    @property
+    def nodes(self) -> int:
+        return len(self._goto)
+
+    # --------------------------------------------------------
+    # Changes
+    # --------------------------------------------------------
+    def _insert(self, pattern: str, pid: int):
+        goto, node = self._goto, 0
+        for ch in pattern:
+            nxt = goto[node].get(ch)
+            if nxt is None:
+                nxt = len(goto)
+                goto[node][ch] = nxt
+                goto.append({})
+                self._ends.append([])
+                self._fail.append(0)
+                self._dict.append(0)
+            node = nxt
+        self._ends[node].append(pid)
+
+    def add(self, pattern: str) -> int:
+        """Insert `pattern` (no-op if present); returns its id."""
+        if not pattern:
+            raise ValueError("empty pattern")
+        pid = self._by_text.get(pattern)
+        if pid is not None:
+            return pid
+        pid = len(self._patterns)
+        self._patterns.append(pattern)
+        self._by_text[pattern] = pid
+        self._insert(pattern, pid)
+        self._stale = True
+        return pid
+
+    def remove(self, pattern: str) -> bool:
+        """Tombstone `pattern`; False if it wasn't there."""
+        pid = self._by_text.pop(pattern, None)
+        if pid is None:
+            return False
+        self._patterns[pid] = None
+        self._tombstones += 1
+        if self._tombstones >= COMPACT_MIN_TOMBSTONES and self._tombstones > len(self):
+            self._compact()
+        return True
+
+    def pattern(self, pid: int) -> Optional[str]:
+        return self._patterns[pid]
+
+    def id_of(self, pattern: str) -> Optional[int]:
+        return self._by_text.get(pattern)
+
+    def _compact(self):
+        """Drop tombstoned paths from the trie (ids of live patterns are kept)."""
+        self._reset_trie()
+        for pid, pattern in enumerate(self._patterns):
+            if pattern is not None:
+                self._insert(pattern, pid)
+        self._stale = True
+
+    def _build(self):
+        """Failure + dictionary links, breadth-first (a node's fail target is always shallower)."""
+        goto, fail, dict_link, ends = self._goto, self._fail, self._dict, self._ends
+        queue = deque()
+        for child in goto[0].values():
+            fail[child] = dict_link[child] = 0
+            queue.append(child)
+        while queue:
+            node = queue.popleft()
+            for ch, child in goto[node].items():
+                f = fail[node]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                target = goto[f].get(ch, 0)
+                fail[child] = target
+                dict_link[child] = target if ends[target] else dict_link[target]
+                queue.append(child)
+        self._stale = False
+        self.rebuilds += 1
+
+    # --------------------------------------------------------
+    # Matching
+    # --------------------------------------------------------
+    def iter_matches(self, text: str) -> Iterator[Match]:
+        """Every occurrence of every live pattern, in order of end position."""
+        if self._stale:
+            self._build()
+        goto, fail, dict_link, ends, patterns = self._goto, self._fail, self._dict, self._ends, self._patterns
+        node = 0
+        for i, ch in enumerate(text):
+            nxt = goto[node].get(ch)
+            while nxt is None and node:
+                node = fail[node]
+                nxt = goto[node].get(ch)
+            node = nxt or 0
+            out = node if ends[node] else dict_link[node]
+            while out:
+                for pid in ends[out]:
+                    pattern = patterns[pid]
+                    if pattern is not None:
+                        yield i + 1 - len(pattern), i + 1, pid
+                out = dict_link[out]
+
+    def search(self, text: str, whole_words: bool = True) -> List[Match]:
+        """
+        iter_matches() as a list. With whole_words, a match whose first / last
+        character is alphanumeric must not continue a word in `text`, so "rem"
+        does not match inside "lorem" or "remu".
+        """
+        if not whole_words:
+            return list(self.iter_matches(text))
+        n = len(text)
+        hits = []
+        for start, end, pid in self.iter_matches(text):
+            if start > 0 and _is_word(text[start]) and _is_word(text[start - 1]):
+                continue
+            if end < n and _is_word(text[end - 1]) and _is_word(text[end]):
+                continue
+            hits.append((start, end, pid))
+        return hits
+
+
+# ============================================================
+# 🧪 One pass vs. a substring chain
+# ============================================================
+if __name__ == "__main__":
+    import random
+    import string
+    import time
+
+    rng = random.Random(0)
+
+    def word():
+        return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9)))
+
+    texts = [" ".join(word() for _ in range(rng.randint(2, 6))) + "\n" + " ".join(word() for _ in range(rng.randint(2, 8)))
+             for _ in range(5_000)]
+    for n_patterns in (10, 100, 1_000, 10_000):
+        patterns = {" ".join(word() for _ in range(rng.randint(1, 3))) for _ in range(n_patterns)}
+        # plant some hits
+        patterns |= {rng.choice(texts).split("\n")[0] for _ in range(20)}
+        ac = AhoCorasick()
+        t0 = time.perf_counter()
+        for p in patterns:
+            ac.add(p)
+        ac.search("")
+        build_ms = (time.perf_counter() - t0) * 1000
+
+        t0 = time.perf_counter()
+        ac_hits = sum(bool(ac.search(t, whole_words=False)) for t in texts)
+        ac_us = (time.perf_counter() - t0) / len(texts) * 1e6
+
+        plist = list(patterns)
+        t0 = time.perf_counter()
+        chain_hits = sum(any(p in t for p in plist) for t in texts)
+        chain_us = (time.perf_counter() - t0) / len(texts) * 1e6
+        assert ac_hits == chain_hits, (ac_hits, chain_hits)
+
+        print(f"[🔎] {len(patterns):>6,} patterns ({ac.nodes:,} nodes, built in {build_ms:.1f} ms): "
+              f"one pass {ac_us:6.1f} µs/text vs. `any(p in text)` chain {chain_us:8.1f} µs/text "
+              f"({ac_hits:,} texts matched)")
+
+    # tombstones + compaction keep results identical to a fresh build
+    live = sorted(patterns)
+    cut = len(live) * 2 // 3
+    nodes_before = ac.nodes
+    for p in live[:cut]:
+        ac.remove(p)
+    fresh = AhoCorasick()
+    for p in live[cut:]:
+        fresh.add(p)
+    sample = texts[:500]
+    assert [[ac.pattern(m[2]) for m in ac.search(t)] for t in sample] == \
+           [[fresh.pattern(m[2]) for m in fresh.search(t)] for t in sample]
+    print(f"[🪦] removed {cut:,} patterns → {nodes_before:,} → {ac.nodes:,} nodes after compaction, "
+          f"results match a fresh build")
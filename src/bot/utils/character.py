@@ -0,0 +1,143 @@
+# src/bot/utils/character.py
+"""
+One record type for a character, from parser output to the DM payload.
+
+im_parser returns it, crud's readers build it straight from SQLite rows
+(character_row_factory), the listener builds the merged roll (parse + DB row)
+as one more instance, and dm_payload formats it. It is a NamedTuple: no
+per-instance __dict__, immutable, picklable (reparse worker processes return
+them) and unpackable positionally.
+Kept free of discord / DB imports so every layer can use it.
+"""
+from typing import NamedTuple, Optional
+
+# Column list in field order, for SELECTs read through character_row_factory
+CHARACTER_COLUMNS = "name_display, series_display, kakera_value, claim_rank, like_rank"
+
+
+class Character(NamedTuple):
+    name_display: Optional[str]
+    series_display: Optional[str] = None
+    kakera_value: Optional[int] = None
+    claim_rank: Optional[int] = None
+    like_rank: Optional[int] = None
+    meta_rank: Optional[int] = None
+    series_tier: str = "Unknown"
+
+    @property
+    def has_stats(self) -> bool:
+        """True when kakera or a rank is known — what makes a parse an $im result."""
+        return self.kakera_value is not None or self.claim_rank is not None or self.like_rank is not None
+
+
+EMPTY_CHARACTER = Character(None)
+
+
+def character_row_factory(cursor, row) -> Character:
+    """
+    sqlite3 / aiosqlite row_factory. Columns must be selected in field order
+    (CHARACTER_COLUMNS, optionally followed by meta_rank and series_tier).
+    """
+    return Character(*row)
+
+
+# ============================================================
+# 🧪 Footprint / per-message allocation check
+# ============================================================
+if __name__ == "__main__":
+    import gc
+    import random
+    import sys
+    import time
+    import tracemalloc
+
+    rng = random.Random(0)
+    raw = [(f"Character {i}", f"Series {i % 3000}", rng.randint(30, 3000), rng.randint(1, 90000),
+            rng.randint(1, 90000), rng.randint(1, 90000), rng.choice("SABCD")) for i in range(100_000)]
+
+    class SlottedCharacter:
+        __slots__ = Character._fields
+
+        def __init__(self, *values):
+            for name, value in zip(self.__slots__, values):
+                setattr(self, name, value)
+
+    def table_footprint(label, build):
+        gc.collect()
+        tracemalloc.start()
+        table = [build(r) for r in raw]
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        # the strings / ints are shared with `raw`, so this is the container cost only
+        print(f"{label:<16} 100k rows: {size / 1024 / 1024:6.2f} MiB ({size / len(table):5.0f} B/row)")
+        del table
+
+    keys = Character._fields
+    table_footprint("dict", lambda r: dict(zip(keys, r)))
+    table_footprint("__slots__ class", lambda r: SlottedCharacter(*r))
+    table_footprint("Character", lambda r: Character(*r))
+
+    # --- One roll through the listener's data shaping, before and after ---
+    def to_int(v):
+        try:
+            return int(v) if v else None
+        except (ValueError, TypeError):
+            return None
+
+    def legacy_message(raw_values, db_dict):
+        # parser dict → im check → payload dict → coerced update (the old on_message)
+        name, series = raw_values
+        parsed = {"name": name, "series": series, "kakera_value": None, "claim_rank": None, "like_rank": None}
+        normalized = {"name_display": parsed.get("name"), "series_display": parsed.get("series"),
+                      "kakera_value": parsed.get("kakera_value"), "claim_rank": parsed.get("claim_rank"),
+                      "like_rank": parsed.get("like_rank")}
+        clean_data = {k: v for k, v in normalized.items() if v is not None}
+        payload = {
+            "name_display": clean_data.get("name_display") or "Unknown",
+            "series_display": clean_data.get("series_display") or "Unknown",
+            "kakera_value": parsed.get("kakera_value") or (db_dict or {}).get("kakera_value"),
+            "claim_rank": parsed.get("claim_rank") or (db_dict or {}).get("claim_rank"),
+            "like_rank": parsed.get("like_rank") or (db_dict or {}).get("like_rank"),
+        }
+        claim, like = to_int(payload["claim_rank"]), to_int(payload["like_rank"])
+        payload.update({"kakera_value": to_int(payload["kakera_value"]), "claim_rank": claim, "like_rank": like,
+                        "meta_rank": (claim + like) // 2 if claim and like else claim or like})
+        payload.update({"should_dm": True, "series_tier": (db_dict or {}).get("series_tier") or "Unknown"})
+        return payload
+
+    def record_message(raw_values, db_row):
+        # parser record → has_stats check → one merged record (the listener now)
+        parsed = Character(*raw_values)
+        if parsed.has_stats:
+            return parsed
+        known = db_row or EMPTY_CHARACTER
+        claim = to_int(parsed.claim_rank or known.claim_rank)
+        like = to_int(parsed.like_rank or known.like_rank)
+        return Character(parsed.name_display or "Unknown", parsed.series_display or "Unknown",
+                         to_int(parsed.kakera_value or known.kakera_value), claim, like,
+                         (claim + like) // 2 if claim and like else claim or like, known.series_tier or "Unknown")
+
+    samples = raw[:20_000]
+    legacy_in = [((r[0], r[1]), dict(zip(keys, r))) for r in samples]
+    record_in = [((r[0], r[1]), Character(*r)) for r in samples]
+
+    def per_message(label, fn, inputs):
+        tracemalloc.start()
+        peak = retained = 0
+        for a, b in inputs:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            out = fn(a, b)
+            peak += tracemalloc.get_traced_memory()[1] - base
+            retained += sys.getsizeof(out)  # the container that lives on in the handler
+        tracemalloc.stop()
+        t0 = time.perf_counter()
+        for a, b in inputs:
+            fn(a, b)
+        elapsed = time.perf_counter() - t0
+        # dicts come from CPython's dict freelist, so tracemalloc under-counts the legacy peak
+        print(f"{label:<16} {peak / len(inputs):6.0f} B peak/message | {retained / len(inputs):4.0f} B payload | "
+              f"{elapsed / len(inputs) * 1e6:5.2f} µs/message")
+
+    per_message("dicts (legacy)", legacy_message, legacy_in)
+    per_message("Character", record_message, record_in)
@@ -0,0 +1,33 @@
+# src/bot/utils/checkpoint.py
+import os
+import json
+import logging
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger("mudae-helper.checkpoint")
+
+
+def write_json_atomic(path, data: dict):
+    """Write `data` to a temp file, fsync, then rename over `path`."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_json(path) -> Optional[dict]:
+    """Checkpoint contents, or None if missing / unreadable."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable checkpoint {path}: {e}")
+        return None
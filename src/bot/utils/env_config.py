@@ -1,12 +1,29 @@
 import os
+import asyncio
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
 
 ENV_PATH = ".env"
+PERSIST_DEBOUNCE_SECONDS = 1.0
 
-def read_env():
+logger = logging.getLogger("mudae-helper.env-config")
+
+# .env key → (cog attribute, parser) for settings that can change at runtime
+RUNTIME_SETTINGS = {
+    "KAKERA_THRESHOLD": ("kakera_threshold", int),
+    "META_RANK_THRESHOLD": ("meta_rank_threshold", int),
+    "DM_TIER_THRESHOLD": ("dm_tier_threshold", str.upper),
+    "TOP_SERIES_LIMIT": ("top_series_limit", int),
+    "OWNER_ONLY_DM": ("owner_only_dm", lambda v: v.lower() == "true"),
+}
+
+
+def read_env(path: str = ENV_PATH):
     """Read all key=value pairs from .env into a dict."""
-    if not os.path.exists(ENV_PATH):
+    if not os.path.exists(path):
         return {}
-    with open(ENV_PATH, "r", encoding="utf-8") as f:
+    with open(path, "r", encoding="utf-8") as f:
         lines = [line.strip() for line in f if "=" in line and not line.strip().startswith("#")]
     env = {}
     for line in lines:
@@ -14,11 +31,182 @@ def read_env():
         env[key.strip()] = value.strip()
     return env
 
+
+def _write_env_atomic(path: str, updates: Dict[str, str]):
+    """
+    Merge `updates` into the file at `path` and swap it in atomically.
+    Existing lines (comments, ordering, untouched keys) are preserved.
+    """
+    lines: List[str] = []
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+
+    pending = dict(updates)
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if "=" not in stripped or stripped.startswith("#"):
+            continue
+        key = stripped.split("=", 1)[0].strip()
+        if key in pending:
+            lines[i] = f"{key}={pending.pop(key)}"
+    lines.extend(f"{k}={v}" for k, v in pending.items())
+
+    directory = os.path.dirname(os.path.abspath(path))
+    tmp_path = os.path.join(directory, f".{os.path.basename(path)}.{os.getpid()}.tmp")
+    # .env holds DISCORD_TOKEN: the replacement keeps the old file's mode (0600 for a new one)
+    mode = os.stat(path).st_mode & 0o777 if os.path.exists(path) else 0o600
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+    if hasattr(os, "fchmod"):
+        os.fchmod(fd, mode)  # exact mode, whatever the umask
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+    # Persist the rename itself (no-op on platforms without directory fds)
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+# ============================================================
+# 🗂️ In-memory config store with background persistence
+# ============================================================
+
+class ConfigStore:
+    """
+    Runtime settings kept in memory.
+      - set() updates memory + os.environ and notifies subscribers immediately
+      - .env is written in the background, debounced, via temp file + fsync + rename
+      - writes run in the default executor, never on the event loop
+    """
+
+    def __init__(self, path: str = ENV_PATH, debounce: float = PERSIST_DEBOUNCE_SECONDS):
+        self.path = path
+        self.debounce = debounce
+        self._values: Dict[str, str] = read_env(path)
+        self._dirty: Dict[str, str] = {}
+        self._subscribers: List[Callable[[str, str], None]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        # Serializes file writes (executor thread vs. synchronous fallback)
+        self._write_lock = threading.Lock()
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        return self._values.get(key, os.getenv(key, default))
+
+    def subscribe(self, callback: Callable[[str, str], None]):
+        """callback(key, value) runs synchronously on every set()."""
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[str, str], None]):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def set(self, key: str, value, persist: bool = True) -> str:
+        """persist=False: memory, os.environ and subscribers only; .env is left as it was."""
+        value = str(value)
+        self._values[key] = value
+        os.environ[key] = value
+        if persist:
+            self._dirty[key] = value
+
+        for callback in list(self._subscribers):
+            try:
+                callback(key, value)
+            except Exception as e:
+                logger.error(f"Config subscriber failed for {key}: {e}")
+
+        if persist:
+            self._schedule_persist()
+        return value
+
+    # --------------------------------------------------------
+    # Persistence
+    # --------------------------------------------------------
+    def _schedule_persist(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (CLI / scripts) → persist right away
+            self._persist_now()
+            return
+
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = loop.call_later(self.debounce, self._start_flush)
+
+    def _start_flush(self):
+        self._timer = None
+        if self._flush_task and not self._flush_task.done():
+            # A write is in flight; it re-checks _dirty when it finishes
+            return
+        self._flush_task = asyncio.get_running_loop().create_task(self._flush_pending())
+
+    async def _flush_pending(self):
+        loop = asyncio.get_running_loop()
+        while self._dirty:
+            batch, self._dirty = self._dirty, {}
+            try:
+                await loop.run_in_executor(None, self._write_batch, batch)
+                print(f"[💾] Saved {', '.join(f'{k}={v}' for k, v in batch.items())} to .env")
+            except Exception as e:
+                # Put the batch back (newer values win) so the next flush retries it
+                self._dirty = {**batch, **self._dirty}
+                logger.error(f"Failed to persist .env: {e}")
+                return
+
+    def _write_batch(self, batch: Dict[str, str]):
+        with self._write_lock:
+            _write_env_atomic(self.path, batch)
+
+    def _persist_now(self):
+        batch, self._dirty = self._dirty, {}
+        if batch:
+            self._write_batch(batch)
+            print(f"[💾] Saved {', '.join(f'{k}={v}' for k, v in batch.items())} to .env")
+
+    async def flush(self):
+        """Persist pending changes immediately (e.g. on shutdown)."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._flush_task and not self._flush_task.done():
+            await self._flush_task
+        await self._flush_pending()
+
+    @property
+    def pending(self) -> int:
+        return len(self._dirty)
+
+
+def apply_setting(target, key: str, value: str) -> bool:
+    """Set the matching RUNTIME_SETTINGS attribute on `target` (if it has one)."""
+    spec = RUNTIME_SETTINGS.get(key)
+    if not spec or not hasattr(target, spec[0]):
+        return False
+    attr, parse = spec
+    setattr(target, attr, parse(value))
+    return True
+
+
+_store: Optional[ConfigStore] = None
+
+
+def get_config_store() -> ConfigStore:
+    """Process-wide ConfigStore (created on first use)."""
+    global _store
+    if _store is None:
+        _store = ConfigStore()
+    return _store
+
+
 def write_env(key, value):
-    """Update or add a key=value in .env persistently."""
-    env = read_env()
-    env[key] = str(value)
-    with open(ENV_PATH, "w", encoding="utf-8") as f:
-        for k, v in env.items():
-            f.write(f"{k}={v}\n")
-    print(f"[💾] Saved {key}={value} to .env")
+    """Update or add a key=value; applied in memory now, persisted to .env in the background."""
+    get_config_store().set(key, value)
@@ -0,0 +1,174 @@
+# src/bot/utils/lanes.py
+"""
+Prioritized work lanes for the listener.
+
+Every lane is an asyncio.Queue plus its own worker tasks. The fast lane
+(background=False) runs as soon as a worker is free. Before starting its
+next job, a background-lane worker waits while fast-lane jobs are queued
+waiting for a worker. It does not wait for fast jobs that are already running
+and only awaiting the network. The wait is capped at LANE_MAX_DEFER_MS, so
+background work is delayed under load but never starved. An unclaimed roll therefore never sits behind a
+burst of $im upserts or claimed-roll DMs. DB writes, on a lane with one
+worker, also stop competing with the roll's lookup for SQLite.
+
+Measured per lane:
+  queue time — submit → a worker starts the job
+  latency    — received_at (defaults to submit) → job done; checked against the lane SLO
+Both feed !listener_stats and the /metrics histograms.
+"""
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional
+
+from src.bot.utils.metrics import histogram
+
+logger = logging.getLogger("mudae-helper.lanes")
+
+LANE_MAX_DEFER_MS = float(os.getenv("LANE_MAX_DEFER_MS", 2000))
+LANE_SAMPLES = 2000
+
+QUEUE_SECONDS = histogram("mudae_lane_queue_seconds", "Time a job waited in its lane before a worker started it",
+                          labelnames=("lane",))
+LATENCY_SECONDS = histogram("mudae_lane_latency_seconds", "Message received → lane job finished",
+                            labelnames=("lane",))
+
+
+def _pct_ms(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))] * 1000
+
+
+class Lane:
+    def __init__(self, name: str, workers: int, slo_ms: Optional[float] = None, background: bool = True):
+        self.name = name
+        self.workers = max(1, int(workers))
+        self.slo = slo_ms / 1000 if slo_ms else None
+        self.background = background
+        self.queue: "asyncio.Queue" = asyncio.Queue()
+        self.running = 0
+        self.submitted = self.completed = self.failed = self.slo_misses = 0
+        self.queue_times: deque = deque(maxlen=LANE_SAMPLES)
+        self.latencies: deque = deque(maxlen=LANE_SAMPLES)
+        self.tasks: List[asyncio.Task] = []
+
+    @property
+    def depth(self) -> int:
+        """Jobs queued or running."""
+        return self.queue.qsize() + self.running
+
+    def summary(self) -> str:
+        slo = f", SLO {self.slo * 1000:g} ms missed {self.slo_misses}×" if self.slo else ""
+        return (f"`{self.name}` ({self.workers}w{'' if self.background else ', fast'}) — "
+                f"{self.completed}/{self.submitted} done, depth {self.depth} | "
+                f"queue p50 {_pct_ms(self.queue_times, 50):.1f} / p99 {_pct_ms(self.queue_times, 99):.1f} ms | "
+                f"latency p50 {_pct_ms(self.latencies, 50):.1f} / p99 {_pct_ms(self.latencies, 99):.1f} ms{slo}")
+
+
+class LaneScheduler:
+    def __init__(self, lanes: Iterable[Lane], max_defer_ms: float = LANE_MAX_DEFER_MS):
+        self.lanes: Dict[str, Lane] = {lane.name: lane for lane in lanes}
+        self.max_defer = max_defer_ms / 1000
+        self._fast_idle = asyncio.Event()
+        self._fast_idle.set()
+        self._started = False
+
+    # --------------------------------------------------------
+    # Submitting
+    # --------------------------------------------------------
+    def submit(self, lane_name: str, fn: Callable, *args, received_at: Optional[float] = None) -> asyncio.Future:
+        """Queue fn(*args) (a coroutine function) on a lane; the Future resolves with its result."""
+        lane = self.lanes[lane_name]
+        self._ensure_workers()
+        now = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        lane.queue.put_nowait((now, received_at or now, fn, args, future))
+        lane.submitted += 1
+        if not lane.background:
+            self._fast_idle.clear()
+        return future
+
+    def _ensure_workers(self):
+        if self._started:
+            return
+        self._started = True
+        for lane in self.lanes.values():
+            lane.tasks = [asyncio.create_task(self._worker(lane), name=f"lane-{lane.name}-{i}")
+                          for i in range(lane.workers)]
+
+    def _fast_waiting(self) -> bool:
+        return any(lane.queue.qsize() for lane in self.lanes.values() if not lane.background)
+
+    # --------------------------------------------------------
+    # Workers
+    # --------------------------------------------------------
+    async def _worker(self, lane: Lane):
+        while True:
+            submitted, received, fn, args, future = await lane.queue.get()
+            if not lane.background:
+                if not self._fast_waiting():
+                    self._fast_idle.set()
+            elif self._fast_waiting():
+                try:
+                    await asyncio.wait_for(self._fast_idle.wait(), self.max_defer)
+                except asyncio.TimeoutError:
+                    pass  # deferred long enough — run anyway
+
+            started = time.perf_counter()
+            waited = started - submitted
+            lane.queue_times.append(waited)
+            QUEUE_SECONDS.observe(waited, lane.name)
+            lane.running += 1
+            try:
+                result = await fn(*args)
+            except asyncio.CancelledError:
+                if not future.done():
+                    future.cancel()
+                raise
+            except Exception as e:
+                lane.failed += 1
+                logger.error(f"Lane {lane.name} job {getattr(fn, '__name__', fn)} failed: {e}")
+                if not future.done():
+                    future.set_exception(e)
+                    future.exception()  # mark retrieved: nobody has to await it
+            else:
+                if not future.done():
+                    future.set_result(result)
+            finally:
+                lane.running -= 1
+                lane.queue.task_done()
+                done = time.perf_counter()
+                latency = done - received
+                lane.latencies.append(latency)
+                LATENCY_SECONDS.observe(latency, lane.name)
+                lane.completed += 1
+                if lane.slo is not None and latency > lane.slo:
+                    lane.slo_misses += 1
+
+    # --------------------------------------------------------
+    # Shutdown / reporting
+    # --------------------------------------------------------
+    async def drain(self, timeout: float = 10.0):
+        """Wait for queued work (e.g. $im upserts) to finish, up to `timeout`."""
+        if not self._started:
+            return
+        try:
+            await asyncio.wait_for(asyncio.gather(*(lane.queue.join() for lane in self.lanes.values())), timeout)
+        except asyncio.TimeoutError:
+            left = {name: lane.depth for name, lane in self.lanes.items() if lane.depth}
+            logger.warning(f"Lanes not drained after {timeout:g}s: {left}")
+
+    async def close(self, timeout: float = 10.0):
+        await self.drain(timeout)
+        tasks = [t for lane in self.lanes.values() for t in lane.tasks]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._started = False
+
+    def summary_lines(self) -> List[str]:
+        return [lane.summary() for lane in self.lanes.values()]
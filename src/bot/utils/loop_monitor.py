@@ -0,0 +1,261 @@
+# src/bot/utils/loop_monitor.py
+"""
+Event-loop lag monitor with blocking-call attribution.
+
+A ticker task sleeps LOOP_LAG_INTERVAL seconds at a time. How late it wakes
+up is the loop lag: the time some other callback held the loop. Every lag
+goes into a ring buffer, which gives the p50 / p90 / p99 figures.
+
+Knowing the loop was late is not enough; we also want to know who held it.
+By the time the ticker runs again, the blocking callback has already returned.
+So a daemon watchdog thread checks the ticker's heartbeat. When the heartbeat
+is LOOP_LAG_THRESHOLD_MS overdue, the loop thread is still stuck inside the
+offender. The watchdog then grabs that thread's frame with
+sys._current_frames() and keeps the stack. When the ticker finally runs, it
+pairs the stack with the measured lag and records a stall.
+
+Results are shown by `!loop_lag` and written to logs/loop_lag.json every
+LOOP_LAG_WRITE_SECONDS. Cost: one timer per interval on the loop, plus one
+thread wake-up per half threshold.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import threading
+import traceback
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger("mudae-helper.loop")
+
+LOOP_MONITOR_ENABLED = os.getenv("LOOP_MONITOR", "true").lower() == "true"
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", 0.25))
+LOOP_LAG_THRESHOLD_MS = float(os.getenv("LOOP_LAG_THRESHOLD_MS", 100))
+LOOP_LAG_FILE = Path(os.getenv("LOOP_LAG_FILE", "logs/loop_lag.json"))
+LOOP_LAG_WRITE_SECONDS = 60.0
+LOOP_LAG_SAMPLES = 4800   # 20 min of history at the default interval
+LOOP_LAG_STALLS = 50      # most recent stalls kept with their stacks
+STACK_DEPTH = 12
+
+_PROJECT_ROOT = str(Path(__file__).resolve().parents[3])
+_PROJECT_SRC = os.path.join(_PROJECT_ROOT, "src")
+
+
+@dataclass
+class Stall:
+    ts: float
+    lag_ms: float
+    call_site: Optional[str] = None
+    stack: List[str] = field(default_factory=list)
+
+
+def _format_stack(frame) -> List[str]:
+    """Innermost-last "path:line in func" lines, paths relative to the project."""
+    lines = []
+    for fs in traceback.extract_stack(frame, limit=STACK_DEPTH):
+        path = fs.filename
+        if path.startswith(_PROJECT_ROOT):
+            path = os.path.relpath(path, _PROJECT_ROOT)
+        lines.append(f"{path}:{fs.lineno} in {fs.name}")
+    return lines
+
+
+def _call_site(frame) -> Optional[str]:
+    """Innermost frame in our own code (src/), else the innermost frame at all."""
+    innermost = None
+    while frame is not None:
+        if innermost is None:
+            innermost = frame
+        if frame.f_code.co_filename.startswith(_PROJECT_SRC):
+            break
+        frame = frame.f_back
+    frame = frame or innermost
+    if frame is None:
+        return None
+    path = os.path.relpath(frame.f_code.co_filename, _PROJECT_ROOT) \
+        if frame.f_code.co_filename.startswith(_PROJECT_ROOT) else frame.f_code.co_filename
+    return f"{path}:{frame.f_lineno} in {frame.f_code.co_name}"
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+class LoopLagMonitor:
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL, threshold_ms: float = LOOP_LAG_THRESHOLD_MS,
+                 path: Path = LOOP_LAG_FILE):
+        self.interval = interval
+        self.threshold = threshold_ms / 1000
+        self.path = Path(path)
+        self.lags: deque = deque(maxlen=LOOP_LAG_SAMPLES)
+        self.stalls: deque = deque(maxlen=LOOP_LAG_STALLS)
+        self.stalls_total = 0
+        self.started_at: Optional[float] = None
+
+        self._beat = time.monotonic()
+        self._sample = None            # (beat, call_site, stack) captured by the watchdog
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._write_task: Optional[asyncio.Task] = None
+
+    # --------------------------------------------------------
+    # Lifecycle
+    # --------------------------------------------------------
+    def start(self):
+        """Call from the running loop (setup_hook)."""
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self.started_at = time.time()
+        self._stop.clear()
+        self._beat = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._ticker())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info(f"Loop lag monitor started (every {self.interval:g}s, stall ≥ {self.threshold * 1000:g} ms)")
+
+    async def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._write_task and not self._write_task.done():
+            await self._write_task
+        await asyncio.to_thread(self._write, self.snapshot())
+
+    # --------------------------------------------------------
+    # Loop side
+    # --------------------------------------------------------
+    async def _ticker(self):
+        next_write = time.monotonic() + LOOP_LAG_WRITE_SECONDS
+        while True:
+            beat = self._beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - beat - self.interval)
+            self.lags.append(lag)
+            if lag >= self.threshold:
+                self._record_stall(beat, lag)
+            if now >= next_write:
+                next_write = now + LOOP_LAG_WRITE_SECONDS
+                if self._write_task is None or self._write_task.done():
+                    self._write_task = asyncio.create_task(asyncio.to_thread(self._write, self.snapshot()))
+
+    def _record_stall(self, beat: float, lag: float):
+        sample = self._sample
+        stall = Stall(time.time(), round(lag * 1000, 1))
+        if sample is not None and sample[0] == beat:
+            stall.call_site, stall.stack = sample[1], sample[2]
+        self.stalls.append(stall)
+        self.stalls_total += 1
+        logger.warning(f"Event loop blocked {stall.lag_ms:.0f} ms at {stall.call_site or 'unknown call site'}")
+
+    # --------------------------------------------------------
+    # Watchdog thread
+    # --------------------------------------------------------
+    def _watch(self):
+        poll = max(0.01, self.threshold / 2)
+        sampled_beat = None
+        while not self._stop.wait(poll):
+            beat = self._beat
+            if beat == sampled_beat or time.monotonic() - beat - self.interval < self.threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            # One sample per stall: the loop thread is inside the blocking call right now
+            self._sample = (beat, _call_site(frame), _format_stack(frame))
+            sampled_beat = beat
+            del frame
+
+    # --------------------------------------------------------
+    # Reporting
+    # --------------------------------------------------------
+    def percentiles(self) -> Dict[str, float]:
+        values = sorted(self.lags)
+        return {
+            "p50_ms": round(_percentile(values, 50) * 1000, 2),
+            "p90_ms": round(_percentile(values, 90) * 1000, 2),
+            "p99_ms": round(_percentile(values, 99) * 1000, 2),
+            "max_ms": round((values[-1] if values else 0.0) * 1000, 2),
+        }
+
+    def snapshot(self) -> Dict:
+        return {
+            "updated": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "interval_s": self.interval,
+            "threshold_ms": self.threshold * 1000,
+            "samples": len(self.lags),
+            "window_s": round(len(self.lags) * self.interval),
+            **self.percentiles(),
+            "stalls_total": self.stalls_total,
+            "recent_stalls": [
+                {"ts": datetime.utcfromtimestamp(s.ts).isoformat(timespec="seconds") + "Z",
+                 "lag_ms": s.lag_ms, "call_site": s.call_site, "stack": s.stack}
+                for s in reversed(self.stalls)
+            ],
+        }
+
+    def _write(self, snapshot: Dict):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(snapshot, indent=2, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.error(f"Could not write {self.path}: {e}")
+
+
+_monitor: Optional[LoopLagMonitor] = None
+
+
+def get_loop_monitor() -> Optional[LoopLagMonitor]:
+    """Process-wide monitor, or None when LOOP_MONITOR=false."""
+    global _monitor
+    if not LOOP_MONITOR_ENABLED:
+        return None
+    if _monitor is None:
+        _monitor = LoopLagMonitor()
+    return _monitor
+
+
+# ============================================================
+# 🧪 Demo: block the loop on purpose and see it attributed
+# ============================================================
+if __name__ == "__main__":
+    import tempfile
+
+    def blocking_lookup():
+        time.sleep(0.3)  # stands in for a sync sqlite3 query / file write
+
+    async def demo():
+        out = Path(tempfile.gettempdir()) / "loop_lag_demo.json"
+        monitor = LoopLagMonitor(interval=0.05, threshold_ms=100, path=out)
+        monitor.start()
+        for _ in range(20):
+            await asyncio.sleep(0.05)
+        blocking_lookup()
+        await asyncio.sleep(0.2)
+        await monitor.stop()
+        snap = monitor.snapshot()
+        print({k: snap[k] for k in ("samples", "p50_ms", "p90_ms", "p99_ms", "max_ms", "stalls_total")})
+        for s in snap["recent_stalls"]:
+            print(f"{s['lag_ms']} ms at {s['call_site']}")
+        print(f"written to {out}")
+
+    asyncio.run(demo())
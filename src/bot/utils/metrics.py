@@ -0,0 +1,171 @@
+# src/bot/utils/metrics.py
+"""
+Minimal Prometheus-text metrics: counters, histograms and scrape-time collectors.
+
+The hot path only does a dict increment (Counter.inc) or one bisect plus two
+adds (Histogram.observe). Everything else is computed when /metrics is
+scraped: cumulative buckets, gauges read from live objects (queue depths,
+cache stats) through registered collectors. No prometheus_client dependency.
+
+    PARSE_SECONDS = histogram("mudae_parse_seconds", "Embed parse time")
+    with PARSE_SECONDS.time():
+        ...
+    register_collector(lambda: [gauge("mudae_queue_depth", "...", [({}, q.qsize())])])
+"""
+import time
+import logging
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, NamedTuple, Tuple
+
+logger = logging.getLogger("mudae-helper.metrics")
+
+# Seconds: sub-ms parses up to multi-second DM sends / DB stalls
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Family(NamedTuple):
+    """One collected metric: name, type (counter/gauge), help, [(labels, value)]."""
+    name: str
+    type: str
+    help: str
+    samples: List[Tuple[Dict[str, str], float]]
+
+
+def gauge(name: str, help: str, samples: Iterable[Tuple[Dict[str, str], float]]) -> Family:
+    return Family(name, "gauge", help, list(samples))
+
+
+def counter_family(name: str, help: str, samples: Iterable[Tuple[Dict[str, str], float]]) -> Family:
+    return Family(name, "counter", help, list(samples))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _num(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values: Dict[Tuple, float] = defaultdict(float)
+
+    def inc(self, *labelvalues, amount: float = 1):
+        self._values[labelvalues] += amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(dict(zip(self.labelnames, key)))} {_num(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS,
+                 labelnames: Tuple[str, ...] = ()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [count per bucket (+Inf last), sum]
+        self._series: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, *labelvalues):
+        series = self._series.get(labelvalues)
+        if series is None:
+            series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def time(self, *labelvalues) -> "_Timer":
+        """`with HIST.time(): ...` — observes the block's wall time."""
+        return _Timer(self, labelvalues)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total) in sorted(self._series.items()):
+            base = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_labels({**base, 'le': _num(bound)})} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(base)} {total!r}")
+            lines.append(f"{self.name}_count{_labels(base)} {cumulative}")
+        return lines
+
+
+class _Timer:
+    # A plain class, not @contextmanager: about half the cost per use on the hot path
+    __slots__ = ("hist", "labelvalues", "t0")
+
+    def __init__(self, hist: Histogram, labelvalues: Tuple):
+        self.hist, self.labelvalues = hist, labelvalues
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.observe(time.perf_counter() - self.t0, *self.labelvalues)
+        return False
+
+
+# ============================================================
+# 📒 Registry
+# ============================================================
+_metrics: Dict[str, object] = {}
+_collectors: List[Callable[[], Iterable[Family]]] = []
+
+
+def counter(name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+    """Get-or-create, so a reloaded cog keeps counting into the same series."""
+    if name not in _metrics:
+        _metrics[name] = Counter(name, help, labelnames)
+    return _metrics[name]
+
+
+def histogram(name: str, help: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS,
+              labelnames: Tuple[str, ...] = ()) -> Histogram:
+    if name not in _metrics:
+        _metrics[name] = Histogram(name, help, buckets, labelnames)
+    return _metrics[name]
+
+
+def register_collector(fn: Callable[[], Iterable[Family]]):
+    """fn() is called on every scrape and returns Family objects (gauges, foreign counters)."""
+    if fn not in _collectors:
+        _collectors.append(fn)
+
+
+def unregister_collector(fn: Callable[[], Iterable[Family]]):
+    if fn in _collectors:
+        _collectors.remove(fn)
+
+
+def render_text() -> str:
+    """The whole registry in Prometheus text exposition format 0.0.4."""
+    lines: List[str] = []
+    for metric in _metrics.values():
+        lines.extend(metric.render())
+    for fn in list(_collectors):
+        try:
+            families = list(fn())
+        except Exception as e:
+            logger.warning(f"Metrics collector {getattr(fn, '__name__', fn)} failed: {e}")
+            continue
+        for fam in families:
+            lines.append(f"# HELP {fam.name} {fam.help}")
+            lines.append(f"# TYPE {fam.name} {fam.type}")
+            for labels, value in fam.samples:
+                if value is not None:
+                    lines.append(f"{fam.name}{_labels(labels)} {_num(value)}")
+    return "\n".join(lines) + "\n"
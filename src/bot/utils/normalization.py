@@ -1,8 +1,62 @@
 # src/bot/utils/normalization.py
+import os
 import re
 import unicodedata
+from functools import lru_cache
 from typing import Optional
 
+# Names and series repeat constantly (rolls, $im, $top pages), so results are
+# memoized in a bounded LRU. Set NORMALIZE_CACHE_SIZE=0 to disable.
+NORMALIZE_CACHE_SIZE = int(os.getenv("NORMALIZE_CACHE_SIZE", 8192))
+
+# ------------------------------------------------------------
+# Compiled patterns (module level — no per-call re cache lookup)
+# ------------------------------------------------------------
+_WS_RE = re.compile(r"\s+")
+_SERIES_PUNCT_RE = re.compile(r"[\/\\\(\)\[\]\{\},;\"’‘\*\+\?·••·:]")
+_TRAILING_WO_RE = re.compile(r"(?:\bwo\b|\bを\b)[\s!！]*$")
+_TRAILING_MARKS_RE = re.compile(r"[!！\?？]+$")
+_DASHES = str.maketrans({"—": "-", "–": "-"})
+_NAME_LOOSE_RE = re.compile(r"[\W_]+")
+
+
+def _nfkc(s: str) -> str:
+    # ASCII is already NFKC-normal; skip unicodedata entirely for it
+    if s.isascii():
+        return s
+    return unicodedata.normalize("NFKC", s)
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _normalize_text(s: str) -> str:
+    s = _nfkc(s.strip()).lower()
+    return _WS_RE.sub(" ", s).strip()
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _normalize_series_loose(s: str) -> str:
+    s = _nfkc(s.strip()).lower()
+
+    # Replace punctuation characters that commonly vary with a single space,
+    # but keep colons and some separators inside names (if you prefer to keep colons,
+    # remove ":" from the pattern above).
+    s = _SERIES_PUNCT_RE.sub(" ", s)
+
+    # Normalize various dashes to hyphen
+    if not s.isascii():
+        s = s.translate(_DASHES)
+
+    s = _WS_RE.sub(" ", s).strip()
+
+    # Remove trailing Japanese particle "wo" or "を" optionally followed by punctuation/spaces
+    s = _TRAILING_WO_RE.sub("", s)
+
+    # Remove trailing exclamation/question marks (space handled above)
+    s = _TRAILING_MARKS_RE.sub("", s)
+
+    return s.strip()
+
+
 def normalize_text(text: Optional[str]) -> str:
     """
     Conservative normalization for names (keeps punctuation that may be part of names).
@@ -10,11 +64,7 @@ def normalize_text(text: Optional[str]) -> str:
     """
     if not text:
         return ""
-    s = str(text).strip()
-    s = unicodedata.normalize("NFKC", s)  # normalize Unicode forms
-    s = s.lower()
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
+    return _normalize_text(text if type(text) is str else str(text))
 
 
 def normalize_series_loose(series: Optional[str]) -> str:
@@ -29,26 +79,27 @@ def normalize_series_loose(series: Optional[str]) -> str:
     """
     if not series:
         return "unknown"
+    return _normalize_series_loose(series if type(series) is str else str(series))
 
-    s = str(series).strip()
-    s = unicodedata.normalize("NFKC", s)
-    s = s.lower()
-
-    # Replace punctuation characters that commonly vary with a single space,
-    # but keep colons and some separators inside names (if you prefer to keep colons,
-    # remove ":" from the bracket below).
-    s = re.sub(r"[\/\\\(\)\[\]\{\},;\"’‘\*\+\?·••·:]", " ", s)
 
-    # Normalize various dashes to hyphen
-    s = s.replace("—", "-").replace("–", "-")
+def normalize_name_loose(name: Optional[str]) -> str:
+    """
+    Blocking key for duplicate detection (src/bot/db/dedupe.py), not a DB key:
+    every run of punctuation / symbols / zero-width characters becomes one space,
+    so "Reiko (GnH)", "reiko gnh" and "Reiko GnH!" share a key. Not memoized —
+    the dedupe job sees each name once.
+    """
+    if not name:
+        return ""
+    s = _nfkc(str(name).strip()).lower()
+    return _NAME_LOOSE_RE.sub(" ", s).strip()
 
-    s = re.sub(r"\s+", " ", s).strip()
 
-    # Remove trailing Japanese particle "wo" or "を" optionally followed by punctuation/spaces
-    s = re.sub(r"(?:\bwo\b|\bを\b)[\s!！]*$", "", s)
+def normalization_cache_info():
+    """functools cache stats for (names, series)."""
+    return _normalize_text.cache_info(), _normalize_series_loose.cache_info()
 
-    # Remove trailing exclamation/question marks (space handled above)
-    s = re.sub(r"[!！\?？]+$", "", s)
 
-    s = s.strip()
-    return s
+def clear_normalization_cache():
+    _normalize_text.cache_clear()
+    _normalize_series_loose.cache_clear()
@@ -0,0 +1,205 @@
+# src/bot/utils/profiler.py
+"""
+On-demand profiling of the running bot (used by !profile in the debug cog).
+
+Three modes, each runs for N seconds against the live process and writes its
+raw output to logs/:
+
+  sample  — a thread reads the event-loop thread's stack every
+            PROFILE_SAMPLE_MS via sys._current_frames(). Writes collapsed
+            stacks (profile-*.folded, for flamegraph.pl / speedscope).
+            Low overhead, so it is safe to run in production.
+  cpu     — cProfile on the loop thread (profile-*.pstats, for pstats /
+            snakeviz). Exact call counts, but every call is slowed down.
+  mem     — tracemalloc snapshot diff (profile-*.tracemalloc, plus the top
+            allocation sites by growth).
+
+Only one profile runs at a time.
+"""
+import os
+import sys
+import time
+import pstats
+import asyncio
+import cProfile
+import threading
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", "logs"))
+PROFILE_SAMPLE_MS = float(os.getenv("PROFILE_SAMPLE_MS", 5))
+PROFILE_MAX_SECONDS = 300
+TOP_N = 10
+
+MODES = ("sample", "cpu", "mem")
+ALIASES = {"cprofile": "cpu", "tracemalloc": "mem", "memory": "mem", "sampling": "sample"}
+
+_PROJECT_ROOT = str(Path(__file__).resolve().parents[3])
+_lock = asyncio.Lock()
+
+
+class ProfileResult(NamedTuple):
+    mode: str
+    seconds: float
+    path: Path
+    summary: str           # one line: samples / calls / bytes
+    top: List[str]         # hot functions or allocation sites, hottest first
+
+
+def _short_path(path: str) -> str:
+    if path.startswith(_PROJECT_ROOT):
+        return os.path.relpath(path, _PROJECT_ROOT)
+    # stdlib / site-packages: keep "package/module.py"
+    parts = Path(path).parts
+    return "/".join(parts[-2:]) if len(parts) >= 2 else path
+
+
+def _out_path(mode: str, suffix: str) -> Path:
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+    return PROFILE_DIR / f"profile-{stamp}-{mode}{suffix}"
+
+
+def is_running() -> bool:
+    return _lock.locked()
+
+
+# ============================================================
+# 🔥 Sampling (loop thread stacks → collapsed stacks)
+# ============================================================
+def _is_idle(frame) -> bool:
+    """The loop is waiting in selector.select() — nothing to attribute."""
+    return frame.f_code.co_name in ("select", "poll", "_poll") and "selectors" in frame.f_code.co_filename
+
+
+def _sample_loop(thread_id: int, interval: float, stop: threading.Event, stacks: Counter, counts: Counter):
+    while not stop.wait(interval):
+        frame = sys._current_frames().get(thread_id)
+        if frame is None:
+            continue
+        if _is_idle(frame):
+            counts["idle"] += 1
+            continue
+        counts["busy"] += 1
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        stacks[";".join(reversed(names))] += 1
+        del frame
+
+
+async def _profile_sample(seconds: float) -> ProfileResult:
+    stacks, counts = Counter(), Counter()
+    stop = threading.Event()
+    sampler = threading.Thread(
+        target=_sample_loop, name="profile-sampler", daemon=True,
+        args=(threading.get_ident(), PROFILE_SAMPLE_MS / 1000, stop, stacks, counts),
+    )
+    sampler.start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        stop.set()
+        await asyncio.to_thread(sampler.join)
+
+    path = _out_path("sample", ".folded")
+    lines = [f"{stack} {n}" for stack, n in stacks.most_common()]
+    await asyncio.to_thread(path.write_text, "\n".join(lines) + "\n", encoding="utf-8")
+
+    busy, total = counts["busy"], counts["busy"] + counts["idle"]
+    self_samples, inclusive = Counter(), Counter()
+    for stack, n in stacks.items():
+        frames = stack.split(";")
+        self_samples[frames[-1]] += n
+        for f in set(frames):
+            inclusive[f] += n
+    top = [
+        f"{n / busy:6.1%} self, {inclusive[fn] / busy:6.1%} total — {fn}"
+        for fn, n in self_samples.most_common(TOP_N)
+    ] if busy else []
+    summary = (f"{total} samples every {PROFILE_SAMPLE_MS:g} ms — loop busy {busy / max(total, 1):.1%}, "
+               f"{len(stacks)} distinct stacks")
+    return ProfileResult("sample", seconds, path, summary, top)
+
+
+# ============================================================
+# ⏱️ cProfile (deterministic, loop thread only)
+# ============================================================
+async def _profile_cpu(seconds: float) -> ProfileResult:
+    prof = cProfile.Profile()
+    prof.enable()   # traces this thread — the event loop — while we sleep
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        prof.disable()
+
+    path = _out_path("cpu", ".pstats")
+    await asyncio.to_thread(prof.dump_stats, str(path))
+
+    stats = pstats.Stats(prof)
+    rows = []
+    for (filename, line, func), (cc, nc, tt, ct, _) in stats.stats.items():
+        if filename == "~" and ("select" in func or "poll" in func):
+            continue  # the loop's idle wait, not work
+        rows.append((tt, ct, nc, f"{func} ({_short_path(filename)}:{line})"))
+    rows.sort(reverse=True)
+    top = [f"{tt * 1000:8.1f} ms self, {ct * 1000:8.1f} ms cum, {nc:>7} calls — {name}"
+           for tt, ct, nc, name in rows[:TOP_N]]
+    summary = f"{stats.total_calls:,} calls, {stats.total_tt:.3f}s CPU traced on the loop thread"
+    return ProfileResult("cpu", seconds, path, summary, top)
+
+
+# ============================================================
+# 🧠 tracemalloc (allocation growth by line)
+# ============================================================
+async def _profile_mem(seconds: float) -> ProfileResult:
+    started_here = not tracemalloc.is_tracing()
+    if started_here:
+        tracemalloc.start(10)
+    try:
+        before = tracemalloc.take_snapshot()
+        await asyncio.sleep(seconds)
+        after = tracemalloc.take_snapshot()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        if started_here:
+            tracemalloc.stop()
+
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    before, after = before.filter_traces(filters), after.filter_traces(filters)
+    path = _out_path("mem", ".tracemalloc")
+    await asyncio.to_thread(after.dump, str(path))
+
+    diff = after.compare_to(before, "lineno")
+    top = []
+    for stat in diff[:TOP_N]:
+        frame = stat.traceback[0]
+        top.append(f"{stat.size_diff / 1024:+9.1f} KiB ({stat.count_diff:+} blocks), "
+                   f"{stat.size / 1024:9.1f} KiB live — {_short_path(frame.filename)}:{frame.lineno}")
+    grown = sum(s.size_diff for s in diff)
+    summary = f"{grown / 1024:+.1f} KiB net over {seconds:g}s, peak traced {peak / 1024 / 1024:.1f} MiB"
+    return ProfileResult("mem", seconds, path, summary, top)
+
+
+async def run_profile(mode: str, seconds: float) -> Optional[ProfileResult]:
+    """Profile the live process for `seconds`. None if another profile is running."""
+    mode = ALIASES.get(mode, mode)
+    if mode not in MODES:
+        raise ValueError(f"unknown profile mode {mode!r}")
+    if _lock.locked():
+        return None
+    seconds = max(1.0, min(float(seconds), PROFILE_MAX_SECONDS))
+    async with _lock:
+        t0 = time.perf_counter()
+        if mode == "sample":
+            result = await _profile_sample(seconds)
+        elif mode == "cpu":
+            result = await _profile_cpu(seconds)
+        else:
+            result = await _profile_mem(seconds)
+        return result._replace(seconds=round(time.perf_counter() - t0, 1))
@@ -0,0 +1,26 @@
+# src/bot/utils/tier_style.py
+"""
+Single presentation table for series tiers (emoji, embed colour, flavor label).
+Kept free of discord imports so DB modules like series_rank can use it too.
+"""
+from typing import NamedTuple, Optional
+
+
+class TierStyle(NamedTuple):
+    emoji: str
+    color: int      # 0xRRGGBB — same values as the discord.Color presets
+    flavor: str
+
+
+TIER_STYLES = {
+    "S": TierStyle("💎", 0xf1c40f, "🌟 **S-TIER Series!** 🌟"),     # gold
+    "A": TierStyle("🌟", 0x9b59b6, "🔥 **A-TIER Series!** 🔥"),     # purple
+    "B": TierStyle("⭐", 0x3498db, "⭐ **B-TIER Series** ⭐"),       # blue
+    "C": TierStyle("✨", 0x1abc9c, "✨ **C-TIER Series** ✨"),       # teal
+    "D": TierStyle("💤", 0x607d8b, "💤 **D-TIER Series** 💤"),       # dark grey
+}
+UNKNOWN_TIER_STYLE = TierStyle("🎯", 0x607d8b, "❔ **Unknown Tier** ❔")
+
+
+def tier_style(tier: Optional[str]) -> TierStyle:
+    return TIER_STYLES.get((tier or "").upper(), UNKNOWN_TIER_STYLE)
@@ -0,0 +1,68 @@
+# src/bot/utils/ttl_cache.py
+"""
+Bounded mapping whose entries expire a fixed `ttl` seconds after they were set.
+
+Every entry shares one ttl, so insertion order is also expiry order: an
+OrderedDict holds (expires_at, value) and expired / overflowing entries are
+always at the front. get / set / purge are O(1) amortized — no timers, no
+scans.
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+_MISSING = object()
+
+
+class TTLCache:
+    def __init__(self, maxsize: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = max(1, int(maxsize))
+        self.ttl = float(ttl)
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None or entry[0] <= self._clock():
+            self.misses += 1
+            return default
+        self.hits += 1
+        return entry[1]
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def set(self, key: Hashable, value: Any = True):
+        """Insert or refresh `key` (a refresh restarts its ttl)."""
+        now = self._clock()
+        if key in self._data:
+            del self._data[key]
+        self._data[key] = (now + self.ttl, value)
+        self._purge(now)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def _purge(self, now: float):
+        data = self._data
+        while data:
+            expires_at = next(iter(data.values()))[0]
+            if expires_at > now and len(data) <= self.maxsize:
+                break
+            data.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self) -> int:
+        self._purge(self._clock())
+        return len(self._data)
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self) -> str:
+        return (f"{len(self)}/{self.maxsize} entries, ttl {self.ttl:g}s, "
+                f"{self.hits} hits / {self.misses} misses, {self.evictions} evicted")
@@ -0,0 +1,131 @@
+"""
+bench_normalization.py — normalize_text / normalize_series_loose throughput.
+
+Compares the original per-call implementation (string-literal regexes, NFKC on
+every input) with the current one (compiled patterns, ASCII fast path, LRU),
+on the real mudae.db corpus and on a large synthetic name stream. Every output
+is checked against the original so the keys stored in the DB cannot drift.
+
+Usage:
+    python src/tools/bench_normalization.py [--synthetic 1000000] [--distinct 60000]
+"""
+import re
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import unicodedata
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from src.bot.config import DB_PATH
+from src.bot.utils import normalization as norm
+
+
+# ------------------------------------------------------------
+# Reference implementation (as it was before compiled patterns)
+# ------------------------------------------------------------
+def legacy_normalize_text(text):
+    if not text:
+        return ""
+    s = str(text).strip()
+    s = unicodedata.normalize("NFKC", s)
+    s = s.lower()
+    s = re.sub(r"\s+", " ", s).strip()
+    return s
+
+
+def legacy_normalize_series_loose(series):
+    if not series:
+        return "unknown"
+    s = str(series).strip()
+    s = unicodedata.normalize("NFKC", s)
+    s = s.lower()
+    s = re.sub(r"[\/\\\(\)\[\]\{\},;\"’‘\*\+\?·••·:]", " ", s)
+    s = s.replace("—", "-").replace("–", "-")
+    s = re.sub(r"\s+", " ", s).strip()
+    s = re.sub(r"(?:\bwo\b|\bを\b)[\s!！]*$", "", s)
+    s = re.sub(r"[!！\?？]+$", "", s)
+    return s.strip()
+
+
+# ------------------------------------------------------------
+# Corpora
+# ------------------------------------------------------------
+def load_db_corpus():
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        rows = conn.execute("SELECT name_display, series_display FROM characters").fetchall()
+    finally:
+        conn.close()
+    return [r[0] or "" for r in rows], [r[1] or "" for r in rows]
+
+
+def synthetic_corpus(total: int, distinct: int, seed: int = 0):
+    """Zipf-ish stream: a few popular names/series dominate, like real rolls."""
+    rng = random.Random(seed)
+    syllables = ["ka", "ri", "to", "mi", "sa", "ne", "yu", "ko", "ha", "ru", "shi", "na"]
+    decorations = ["", "", "", "", " (Alter)", "  ", "！", " wo!", "—Zero", "é", "Ｒｅ：", "・"]
+
+    def make():
+        word = "".join(rng.choice(syllables) for _ in range(rng.randint(2, 5))).title()
+        return word + " " + rng.choice(syllables).title() + rng.choice(decorations)
+
+    pool = [make() for _ in range(distinct)]
+    weights = [1.0 / (i + 1) for i in range(distinct)]
+    return rng.choices(pool, weights=weights, k=total)
+
+
+# ------------------------------------------------------------
+# Timing
+# ------------------------------------------------------------
+def _time(fn, data) -> float:
+    t0 = time.perf_counter()
+    for x in data:
+        fn(x)
+    return time.perf_counter() - t0
+
+
+def bench(label: str, data, legacy, current):
+    mismatches = sum(1 for x in set(data) if legacy(x) != current(x))
+
+    legacy_s = _time(legacy, data)
+    norm.clear_normalization_cache()
+    cold_s = _time(current, data)   # every distinct value misses once
+    warm_s = _time(current, data)   # steady state for a long-running bot
+
+    n = len(data)
+    text_info, series_info = norm.normalization_cache_info()
+    info = text_info if current is norm.normalize_text else series_info
+    print(f"{label:<26} n={n:>9,} distinct={len(set(data)):>7,} mismatches={mismatches} "
+          f"cache hit rate={info.hits / max(1, info.hits + info.misses):.0%}")
+    for name, secs in (("legacy", legacy_s), ("current (cold)", cold_s), ("current (warm)", warm_s)):
+        print(f"    {name:<16} {secs * 1000:9.1f} ms  {n / secs:>12,.0f}/s  x{legacy_s / secs:5.1f}")
+    return mismatches
+
+
+def main(synthetic: int, distinct: int) -> int:
+    names, series = load_db_corpus()
+    stream = synthetic_corpus(synthetic, distinct)
+
+    bad = 0
+    bad += bench("db names (normalize_text)", names, legacy_normalize_text, norm.normalize_text)
+    bad += bench("db series (loose)", series, legacy_normalize_series_loose, norm.normalize_series_loose)
+    bad += bench("synthetic names", stream, legacy_normalize_text, norm.normalize_text)
+    bad += bench("synthetic series (loose)", stream, legacy_normalize_series_loose, norm.normalize_series_loose)
+
+    if bad:
+        print(f"❌ {bad} outputs differ from the reference implementation")
+        return 1
+    print("✅ Outputs identical to the reference implementation")
+    return 0
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--synthetic", type=int, default=1_000_000)
+    ap.add_argument("--distinct", type=int, default=60_000)
+    args = ap.parse_args()
+    sys.exit(main(args.synthetic, args.distinct))
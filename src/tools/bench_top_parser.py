@@ -0,0 +1,102 @@
+"""
+bench_top_parser.py — top-list line parsing throughput (lines/sec).
+
+Replays data/tops_*.txt as Mudae-sized pages through the previous
+process_top_embed parsing loop (three patterns compiled per embed, tried in
+turn, two re.sub per match) and through src.bot.parsers.top_parser, and checks
+both produce the same entries.
+
+Usage:
+    python src/tools/bench_top_parser.py [--repeat 200] [--page-size 15]
+"""
+import re
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from src.bot.parsers.top_parser import parse_top_lines
+
+DATA_DIR = Path(__file__).resolve().parents[2] / "data"
+
+
+# ------------------------------------------------------------
+# Previous implementation (body of process_top_embed)
+# ------------------------------------------------------------
+def legacy_parse_page(joined: str):
+    joined = joined.replace('\u200b', '').replace('\xa0', ' ')
+    lines = [line.strip() for line in joined.splitlines() if line.strip()]
+    patterns = [
+        re.compile(r'^\#?\s*(\d{1,4})\s*[-.)]\s*(.*?)\s*[-–—]\s*(.+)$'),
+        re.compile(r'^\s*(\d{1,4})\.\s*(.*?)\s*[-–—]\s*(.+)$'),
+        re.compile(r'^\s*(\d{1,4})\s*-\s*(.*?)\s*-\s*(.+)$'),
+    ]
+    out = []
+    for line in lines:
+        if len(line) < 6:
+            continue
+        parsed = None
+        for pat in patterns:
+            m = pat.match(line)
+            if m:
+                parsed = (int(m.group(1)), m.group(2).strip(), m.group(3).strip())
+                break
+        if parsed:
+            rank, name, series = parsed
+            name = re.sub(r'<:[^>]+>', '', name).strip()
+            series = re.sub(r'<:[^>]+>', '', series).strip()
+            out.append({"rank": rank, "name_display": name, "series_display": series, "list_type": "claimed"})
+    return out
+
+
+def current_parse_page(joined: str):
+    return parse_top_lines(joined.replace('\u200b', '').replace('\xa0', ' ').splitlines())
+
+
+def load_pages(page_size: int):
+    lines = []
+    for path in sorted(DATA_DIR.glob("tops_*.txt")):
+        lines.extend(path.read_text(encoding="utf-8").splitlines())
+    # A few noisy variants Mudae / copy-paste produce
+    lines += ["1. Asuna — Sword Art Online", "2) Kirito – Sword Art Online",
+              "#3 - <:kakera:469835869059153940> Rem - Re:Zero", "Page 1 / 67", "", "AniList"]
+    pages = ["\n".join(lines[i:i + page_size]) for i in range(0, len(lines), page_size)]
+    return pages, len(lines)
+
+
+def _run(fn, pages, repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for page in pages:
+            fn(page)
+    return time.perf_counter() - t0
+
+
+def main(repeat: int, page_size: int) -> int:
+    pages, n_lines = load_pages(page_size)
+
+    legacy = [(e["rank"], e["name_display"], e["series_display"]) for p in pages for e in legacy_parse_page(p)]
+    current = [e for p in pages for e in current_parse_page(p)]
+    if legacy != current:
+        diff = next(i for i, (a, b) in enumerate(zip(legacy + [None], current + [None])) if a != b)
+        print(f"❌ Parsers disagree at entry {diff}: {legacy[diff:diff + 1]} vs {current[diff:diff + 1]}")
+        return 1
+
+    total = n_lines * repeat
+    legacy_s = _run(legacy_parse_page, pages, repeat)
+    current_s = _run(current_parse_page, pages, repeat)
+    print(f"{len(pages)} pages × {repeat} = {total:,} lines ({len(current)} entries per pass)")
+    print(f"    legacy   {legacy_s * 1000:8.1f} ms  {total / legacy_s:>12,.0f} lines/s")
+    print(f"    current  {current_s * 1000:8.1f} ms  {total / current_s:>12,.0f} lines/s  x{legacy_s / current_s:.1f}")
+    print("✅ Identical entries")
+    return 0
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=200)
+    ap.add_argument("--page-size", type=int, default=15)
+    args = ap.parse_args()
+    sys.exit(main(args.repeat, args.page_size))
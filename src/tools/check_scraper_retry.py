@@ -0,0 +1,78 @@
+"""
+check_scraper_retry.py — proves a page whose DB writes fail is re-requested, not checkpointed.
+
+Works on a throwaway copy of mudae.db. A trigger makes every write of one
+character fail inside SQLite. Then two buffered pages are flushed: page 1 is
+clean and page 2 contains that character. Page 1 must be ingested and
+checkpointed. Page 2 must be reported missing again.
+
+Usage:
+    python src/tools/check_scraper_retry.py
+"""
+import os
+import sys
+import shutil
+import sqlite3
+import asyncio
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(ROOT))
+
+_tmp = Path(tempfile.mkdtemp(prefix="scraper-retry-"))
+os.environ["DB_PATH"] = str(_tmp / "mudae.db")   # before any src.bot import reads it
+shutil.copy(ROOT / "data" / "mudae.db", _tmp / "mudae.db")
+
+from src.bot.db.database import ensure_schema
+from src.bot.db.crud import upsert_character
+from src.bot.scraper import ScrapeSession, TopListScraper
+
+BROKEN = "Retry Check Broken"
+
+
+def _break_character(name_normalized: str):
+    with sqlite3.connect(os.environ["DB_PATH"]) as conn:
+        for op in ("INSERT", "UPDATE"):
+            conn.execute(
+                f"CREATE TRIGGER fail_{op.lower()} BEFORE {op} ON characters "
+                f"WHEN NEW.name_normalized = '{name_normalized}' BEGIN SELECT RAISE(ABORT, 'forced failure'); END"
+            )
+
+
+async def main() -> int:
+    await ensure_schema()
+    _break_character("retry check broken")
+
+    assert await upsert_character("Retry Check Ok", "Some Series", claim_rank=1) is True
+    assert await upsert_character(BROKEN, "Some Series", claim_rank=2) is False
+
+    scraper = TopListScraper()
+    session = ScrapeSession(list_type="claimed", total_pages=2)
+    scraper.sessions["claimed"] = session
+    session.buffer = {
+        1: [(1, "Retry Check Ok", "Some Series")],
+        2: [(2, BROKEN, "Some Series"), (3, "Retry Check Ok Two", "Some Series")],
+    }
+    session.received = 0b110
+    saved = await scraper.flush(session)
+
+    checkpoint = ScrapeSession.load_checkpoint("claimed")
+    ok = (
+        saved == 2
+        and session.ingested == 0b010
+        and session.missing_pages() == [2]
+        and checkpoint is not None and checkpoint.ingested == 0b010
+    )
+    print(f"saved {saved}, ingested pages {bin(session.ingested)}, missing {session.missing_pages()}, "
+          f"checkpointed {bin(checkpoint.ingested) if checkpoint else None}")
+    print("✅ failed page is re-requested" if ok else "❌ failed page was checkpointed as ingested")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    try:
+        code = asyncio.run(main())
+    finally:
+        shutil.rmtree(_tmp, ignore_errors=True)
+    sys.exit(code)
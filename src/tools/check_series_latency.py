@@ -0,0 +1,85 @@
+"""
+check_series_latency.py — proves series.db reads never stall the event loop.
+
+Runs a 1 ms heartbeat while hammering the same calls recommend_popular_series,
+testdm_debug and simulate_debug_roll make, first through the async API and then
+(for contrast) through the old blocking sqlite3 helpers.
+
+Usage:
+    python src/tools/check_series_latency.py [--rounds 300] [--max-lag-ms 20]
+"""
+import sys
+import time
+import random
+import asyncio
+import argparse
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from src.bot.db import series_rank
+from src.bot.recommender.recommendator import recommend_popular_series
+
+
+async def _heartbeat(stop: asyncio.Event, lags: list, interval: float = 0.001):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        t0 = loop.time()
+        await asyncio.sleep(interval)
+        lags.append((loop.time() - t0 - interval) * 1000)
+
+
+async def _measure(label: str, workload) -> float:
+    stop, lags = asyncio.Event(), []
+    hb = asyncio.create_task(_heartbeat(stop, lags))
+    await asyncio.sleep(0.01)
+    t0 = time.perf_counter()
+    await workload()
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    await hb
+    lags.sort()
+    p99 = lags[int(len(lags) * 0.99) - 1] if lags else 0.0
+    worst = lags[-1] if lags else 0.0
+    print(f"{label:<8} {elapsed:6.2f}s | loop lag p99 {p99:6.2f} ms | max {worst:6.2f} ms | {len(lags)} ticks")
+    return worst
+
+
+async def main(rounds: int, max_lag_ms: float) -> int:
+    names = [s["series"] for s in await series_rank.get_top_series_async(limit=500)]
+    if not names:
+        print("⚠️ series.db missing or empty — nothing to measure.")
+        return 0
+    rng = random.Random(0)
+    picks = [rng.choice(names) for _ in range(rounds)]
+
+    async def async_workload():
+        for name in picks:
+            await asyncio.gather(
+                recommend_popular_series(limit=50),
+                series_rank.get_series_info_async(name),
+            )
+
+    async def blocking_workload():
+        for name in picks:
+            series_rank.get_top_series(limit=50)
+            series_rank.get_series_info(name)
+            await asyncio.sleep(0)
+
+    worst = await _measure("async", async_workload)
+    await _measure("blocking", blocking_workload)
+    await series_rank.close_series_conn()
+
+    if worst > max_lag_ms:
+        print(f"❌ Event loop stalled {worst:.2f} ms (> {max_lag_ms} ms) on the async path")
+        return 1
+    print(f"✅ Async path kept loop lag under {max_lag_ms} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rounds", type=int, default=300)
+    ap.add_argument("--max-lag-ms", type=float, default=20.0)
+    args = ap.parse_args()
+    sys.exit(asyncio.run(main(args.rounds, args.max_lag_ms)))
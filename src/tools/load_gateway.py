@@ -0,0 +1,333 @@
+"""
+load_gateway.py — fake-gateway load generator for end-to-end throughput.
+
+Builds discord.Message-shaped objects that carry real discord.Embed instances,
+without a Discord connection. Each message goes through both handlers a
+gateway MESSAGE_CREATE would reach: main.on_message (process_commands) and
+RecommenderListenerV2.on_message. The listener does its real work — parsing,
+mudae.db reads and $im upserts on a temporary copy of the DB, rules and DM
+payloads. DMs go to an in-process sink with an optional simulated REST delay.
+
+The mix is realistic: unclaimed / claimed rolls, $im results, $top pages,
+user commands ($wa, $im <name>) and plain chat. Characters are drawn from the
+DB, so lookups hit and miss like in production.
+
+Load is open-loop: message i is due at start + i / rate, whether or not
+earlier messages have finished. Latency is measured from that due time, so
+queueing shows up in the tail instead of quietly slowing the generator down.
+--rate 0 runs closed-loop instead (--concurrency workers, as fast as
+possible) to find the ceiling.
+
+Usage:
+    python src/tools/load_gateway.py [--rate 200] [--duration 20] [--mix roll=40,im=15,top=5,command=10,chat=30]
+    python src/tools/load_gateway.py --rate 0 --concurrency 32 --duration 15     # max throughput
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import asyncio
+import sqlite3
+import argparse
+import tempfile
+import contextlib
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(ROOT))
+
+DEFAULT_MIX = "roll=40,im=15,top=5,command=10,chat=30"
+MUDAE_ID = 432610292342587392
+OWNER_NAME = "loadtester"
+
+
+# ------------------------------------------------------------
+# Fake gateway objects (attribute-compatible with discord.Message)
+# ------------------------------------------------------------
+class FakeAuthor:
+    def __init__(self, uid: int, name: str, bot: bool):
+        self.id, self.name, self.display_name, self.bot = uid, name, name, bot
+        self.mention = f"<@{uid}>"
+
+
+class FakeChannel:
+    def __init__(self, cid: int, name: str = "mudae-rolls"):
+        self.id, self.name = cid, name
+
+    async def send(self, *args, **kwargs):
+        return None
+
+
+class FakeMessage:
+    __slots__ = ("id", "content", "author", "embeds", "channel", "guild", "mentions", "attachments", "_state",
+                 "kind", "due")
+
+    def __init__(self, mid: int, content: str, author: FakeAuthor, embeds, channel: FakeChannel, kind: str):
+        self.id, self.content, self.author, self.embeds, self.channel = mid, content, author, embeds, channel
+        self.guild, self.mentions, self.attachments = None, [], []
+        self._state = MessageFactory.state  # commands.Context reads message._state
+        self.kind, self.due = kind, 0.0
+
+
+class DMSink:
+    """Stands in for bot.fetch_user(...).send(...): counts DMs, optional REST delay."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.sent = 0
+
+    async def fetch_user(self, uid: int):
+        return self._User(self, uid)
+
+    class _User:
+        def __init__(self, sink: "DMSink", uid: int):
+            self.sink, self.id, self.name = sink, uid, f"owner{uid}"
+
+        async def send(self, *args, **kwargs):
+            if self.sink.delay:
+                await asyncio.sleep(self.sink.delay)
+            self.sink.sent += 1
+
+
+# ------------------------------------------------------------
+# Message mix
+# ------------------------------------------------------------
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        kind, _, weight = part.partition("=")
+        mix[kind.strip()] = float(weight)
+    unknown = set(mix) - {"roll", "im", "top", "command", "chat"}
+    if unknown:
+        raise SystemExit(f"Unknown message kinds in --mix: {', '.join(sorted(unknown))}")
+    return mix
+
+
+def load_characters(db_path: Path, limit: int = 20000) -> List[Tuple[str, str]]:
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute("SELECT name_display, series_display FROM characters "
+                            "WHERE name_display IS NOT NULL ORDER BY RANDOM() LIMIT ?", (limit,)).fetchall()
+    finally:
+        conn.close()
+    return rows or [("Megumin", "Kono Subarashii Sekai ni Shukufuku wo!")]
+
+
+class MessageFactory:
+    state = None  # the bot's ConnectionState, set by run()
+
+    def __init__(self, characters: List[Tuple[str, str]], owner_id: int, seed: int = 0):
+        import discord
+        self.discord = discord
+        self.rng = random.Random(seed)
+        self.characters = characters
+        self.channel = FakeChannel(900000000000000001)
+        self.mudae = FakeAuthor(MUDAE_ID, "Mudae", bot=True)
+        self.owner = FakeAuthor(owner_id, OWNER_NAME, bot=False)
+        self.users = [FakeAuthor(800000000000000000 + i, f"user{i}", bot=False) for i in range(50)]
+        self.next_id = 1_200_000_000_000_000_000
+        top_file = ROOT / "data" / "tops_claimed.txt"
+        self.top_lines = top_file.read_text(encoding="utf-8").splitlines() if top_file.exists() else []
+
+    def _character(self) -> Tuple[str, str]:
+        # 10% never-seen names → DB misses
+        if self.rng.random() < 0.10:
+            return f"Unknown Character {self.rng.randint(1, 10**6)}", f"Unknown Series {self.rng.randint(1, 5000)}"
+        return self.rng.choice(self.characters)
+
+    def _embed(self, author: str, description: str, color: int, footer: Optional[str] = None):
+        embed = self.discord.Embed(description=description, color=color)
+        embed.set_author(name=author)
+        embed.set_image(url="https://mudae.net/uploads/load-test.png")
+        if footer:
+            embed.set_footer(text=footer)
+        return embed
+
+    def make(self, kind: str) -> FakeMessage:
+        self.next_id += 1
+        rng = self.rng
+        if kind == "roll":
+            name, series = self._character()
+            roller = self.owner if rng.random() < 0.3 else rng.choice(self.users)
+            if rng.random() < 0.2:
+                embed = self._embed(name, f"{series}\nBelongs to {rng.choice(self.users).name}", 0xF47FFF,
+                                    footer=f"Belongs to {rng.choice(self.users).name}")
+            else:
+                embed = self._embed(name, f"{series}\nReact with any emoji to claim!", 0xFF9C2C,
+                                    footer=f"Rolled by {roller.name}")
+            return FakeMessage(self.next_id, "", self.mudae, [embed], self.channel, kind)
+        if kind == "im":
+            name, series = self._character()
+            desc = (f"{series}\n**{rng.randint(30, 3000)}**<:kakera:469835869059153940>\n"
+                    f"Claim Rank: #{rng.randint(1, 90000):,}\nLike Rank: #{rng.randint(1, 90000):,}")
+            return FakeMessage(self.next_id, "", self.mudae, [self._embed(name, desc, 0xFF9C2C)], self.channel, kind)
+        if kind == "top":
+            page = rng.randint(1, 67)
+            lines = self.top_lines[(page - 1) * 15:page * 15] or ["#1 - Zero Two - DARLING in the FRANXX"]
+            embed = self._embed("Top claimed characters", "\n".join(lines), 0x2F3136, footer=f"{page} / 67")
+            return FakeMessage(self.next_id, "", self.mudae, [embed], self.channel, kind)
+        if kind == "command":
+            author = self.owner if rng.random() < 0.5 else rng.choice(self.users)
+            content = rng.choice(["$wa", "$wg", "$ha", "$mx", f"$im {self._character()[0]}", "$tu", "$dk"])
+            return FakeMessage(self.next_id, content, author, [], self.channel, kind)
+        content = rng.choice(["lol", "gg", "anyone rolled rem today?", "brb", "nice claim!", "😭", "$$$"])
+        return FakeMessage(self.next_id, content, rng.choice(self.users), [], self.channel, kind)
+
+
+# ------------------------------------------------------------
+# Driver
+# ------------------------------------------------------------
+def _pct(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def _latency_row(label: str, values: List[float]) -> str:
+    ms = [v * 1000 for v in values]
+    return (f"  {label:<8} {len(ms):>7,}  p50 {_pct(ms, 50):7.2f}  p90 {_pct(ms, 90):7.2f}  "
+            f"p99 {_pct(ms, 99):7.2f}  p99.9 {_pct(ms, 99.9):7.2f}  max {max(ms, default=0):7.2f} ms")
+
+
+async def run(args) -> int:
+    from src.bot import main as bot_main
+    from src.bot.config import OWNER_IDS
+    from src.bot.recommender.recommender_listener_v2 import RecommenderListenerV2
+    from src.bot.db.rank_history import get_history_recorder
+    from src.bot.db.series_rank import close_series_conn
+    from src.bot.db.database import close_read_conn
+
+    bot = bot_main.bot
+    owner_id = OWNER_IDS[0] if OWNER_IDS and OWNER_IDS[0] else 1
+    if owner_id not in OWNER_IDS:
+        OWNER_IDS.append(owner_id)  # the listener reads this list at call time
+    # What login() would do, minus Discord: bind the client to this loop (for dispatch)
+    # and give it a user (process_commands needs it for the mention prefix)
+    await bot._async_setup_hook()
+    bot._connection.user = FakeAuthor(999000000000000000, "mudae-helper", bot=True)
+    sink = DMSink(args.dm_latency_ms / 1000)
+    bot.fetch_user = sink.fetch_user
+
+    command_errors = Counter()
+
+    async def on_command_error(ctx, error):  # CommandNotFound for $wa / $im etc.
+        command_errors[type(error).__name__] += 1
+    bot.add_listener(on_command_error, "on_command_error")
+
+    cog = RecommenderListenerV2(bot)
+    await bot.add_cog(cog)
+    cog.owner_only_dm = False  # every qualifying roll DMs, like a busy multi-owner server
+
+    MessageFactory.state = bot._connection
+    factory = MessageFactory(load_characters(Path(os.environ["DB_PATH"])), owner_id, args.seed)
+    mix = parse_mix(args.mix)
+    kinds, weights = list(mix), list(mix.values())
+
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors = Counter()
+    sent = 0
+
+    async def handle(msg: FakeMessage):
+        try:
+            _, job = await asyncio.gather(bot_main.on_message(msg), cog.on_message(msg))
+            if job is not None:  # the roll / $im work was handed to a lane — wait for it
+                await job
+        except Exception as e:
+            errors[f"{msg.kind}: {type(e).__name__}"] += 1
+        latencies[msg.kind].append(time.perf_counter() - msg.due)
+
+    quiet = open(os.devnull, "w") if not args.show_logs else None
+    t0 = time.perf_counter()
+    deadline = t0 + args.duration
+    with contextlib.redirect_stdout(quiet) if quiet else contextlib.nullcontext():
+        if args.rate > 0:
+            interval, tasks = 1.0 / args.rate, set()
+            while True:
+                due = t0 + sent * interval
+                if due >= deadline:
+                    break
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                msg = factory.make(factory.rng.choices(kinds, weights)[0])
+                msg.due = due
+                task = asyncio.create_task(handle(msg))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                sent += 1
+            if tasks:
+                await asyncio.gather(*tasks)
+        else:
+            async def worker():
+                nonlocal sent
+                while time.perf_counter() < deadline:
+                    msg = factory.make(factory.rng.choices(kinds, weights)[0])
+                    msg.due = time.perf_counter()
+                    sent += 1
+                    await handle(msg)
+            await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - t0
+        await cog.lanes.close()
+        await get_history_recorder().flush()
+    if quiet:
+        quiet.close()
+
+    await close_series_conn()
+    await close_read_conn()
+
+    everything = [v for values in latencies.values() for v in values]
+    offered = f"{args.rate:,.0f} msg/s offered" if args.rate > 0 else f"closed loop, {args.concurrency} workers"
+    print(f"[🚦] {sent:,} messages in {elapsed:.1f}s ({offered}) — "
+          f"sustained {len(everything) / elapsed:,.0f} msg/s")
+    print(f"    mix: {', '.join(f'{k} {len(latencies[k]):,}' for k in kinds)} | DMs to sink: {sink.sent:,} "
+          f"(simulated {args.dm_latency_ms:g} ms each) | unknown commands: {sum(command_errors.values()):,}")
+    print("    latency from due time (includes queueing):")
+    print(_latency_row("all", everything))
+    for kind in kinds:
+        print(_latency_row(kind, latencies[kind]))
+    counters = cog.counters
+    print(f"    listener: {counters['mudae_embeds']:,} Mudae embeds, {counters['rolls_evaluated']:,} rolls evaluated, "
+          f"{counters['cooldown_skips']:,} cooldown skips, {counters['im_new'] + counters['im_updated']:,} $im upserts")
+    print("    lanes:")
+    for line in cog.lanes.summary_lines():
+        print(f"      {line.replace('`', '')}")
+    if errors:
+        print("    errors: " + ", ".join(f"{k} ×{n}" for k, n in errors.most_common()))
+    return 1 if errors else 0
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rate", type=float, default=200, help="messages/sec offered (0 = closed loop, max speed)")
+    ap.add_argument("--duration", type=float, default=20, help="seconds of load")
+    ap.add_argument("--concurrency", type=int, default=16, help="workers when --rate 0")
+    ap.add_argument("--mix", default=DEFAULT_MIX, help=f"kind=weight list (default {DEFAULT_MIX})")
+    ap.add_argument("--dm-latency-ms", type=float, default=80, help="simulated Discord REST time per DM")
+    ap.add_argument("--db", default=str(ROOT / "data" / "mudae.db"), help="source DB (a temp copy is used)")
+    ap.add_argument("--in-place", action="store_true", help="write $im upserts to --db itself, not a copy")
+    ap.add_argument("--show-logs", action="store_true", help="keep the bot's print output")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    workdir = None
+    db_path = Path(args.db)
+    if not args.in_place:
+        workdir = tempfile.mkdtemp(prefix="mudae-load-")
+        db_path = Path(shutil.copy2(args.db, Path(workdir) / "mudae.db"))
+    # Before any src.bot import: config / archive / metrics read these at import time
+    os.environ["DB_PATH"] = str(db_path)
+    os.environ.setdefault("EMBED_ARCHIVE", "false")
+    os.environ.setdefault("METRICS_PORT", "0")
+    try:
+        return asyncio.run(run(args))
+    finally:
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+"""
+reparse_embed_archive.py — re-run im_parser over the raw embed archive.
+
+Streams data/embed_archive/*.jsonl.gz in chunks and sends each chunk to a
+ProcessPoolExecutor. Each worker rebuilds the embed with discord.Embed.from_dict
+and runs it through extract_im_update. Only a bounded number of chunks is in
+flight at once.
+
+Only the newest archived $im per character is kept (memory follows the number
+of distinct characters, not the archive size). These rows are written with
+crud.bulk_upsert_dated_im, one transaction per --write-batch rows, as of the
+record's `ts`:
+  - a row updated after `ts` (newer $im, $top scrape) is left alone
+  - times_seen is not incremented (those sightings were counted live)
+  - last_updated, refresh_due_at and rank_history are stamped with `ts`
+so running it twice changes nothing the second time.
+
+--synthetic implies --dry-run: generated records never reach mudae.db.
+
+Usage:
+    python src/tools/reparse_embed_archive.py [--workers N] [--chunk 500] [--dry-run]
+    python src/tools/reparse_embed_archive.py --synthetic 200000   # benchmark only, never writes
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from src.bot.db.embed_archive import ARCHIVE_DIR, iter_archive_lines
+from src.bot.utils.character import Character
+
+
+# ------------------------------------------------------------
+# Worker side (must be importable / picklable)
+# ------------------------------------------------------------
+def _silence_worker_logs():
+    import logging
+    logging.getLogger("mudae-helper.parser.im").setLevel(logging.WARNING)
+
+
+def parse_chunk(lines: List[str]) -> Tuple[List[Tuple[str, float, Character]], int, float]:
+    """Returns ((name_normalized, ts, update) in input order, embeds parsed, CPU seconds used)."""
+    import discord
+    from src.bot.parsers.im_parser import extract_im_update
+    from src.bot.utils.normalization import normalize_text
+
+    t0 = time.process_time()
+    updates, parsed = [], 0
+    for line in lines:
+        try:
+            record = json.loads(line)
+            embed = discord.Embed.from_dict(record["embed"])
+            parsed += 1
+            update = extract_im_update(embed)
+        except Exception:
+            continue
+        if update:
+            name_key = normalize_text(update.name_display)
+            if name_key:
+                updates.append((name_key, float(record.get("ts") or 0), update))
+    return updates, parsed, time.process_time() - t0
+
+
+def _chunks(lines: Iterable[str], size: int) -> Iterator[List[str]]:
+    it = iter(lines)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def synthetic_lines(n: int) -> Iterator[str]:
+    """Archive-shaped $im records for benchmarking without a real archive."""
+    import random
+    rng = random.Random(0)
+    for i in range(n):
+        embed = {
+            "type": "rich",
+            "author": {"name": f"Character {rng.randint(1, 20000)}"},
+            "description": (f"Series {rng.randint(1, 3000)}\n**{rng.randint(30, 3000)}**<:kakera:469835869059153940>\n"
+                            f"Claim Rank: #{rng.randint(1, 60000):,}\nLike Rank: #{rng.randint(1, 60000):,}"),
+            "color": 16751916,
+            "image": {"url": "https://mudae.net/uploads/x.png"},
+        }
+        yield json.dumps({"ts": 0, "message_id": i, "channel_id": 1, "embed": embed})
+
+
+# ------------------------------------------------------------
+# Driver
+# ------------------------------------------------------------
+async def main(workers: int, chunk: int, write_batch: int, dry_run: bool, synthetic: int) -> int:
+    from src.bot.db.crud import bulk_upsert_dated_im
+    from src.bot.db.rank_history import get_history_recorder
+
+    if synthetic and not dry_run:
+        print("[🧪] --synthetic implies --dry-run: generated records are never written to mudae.db")
+        dry_run = True
+    lines = synthetic_lines(synthetic) if synthetic else iter_archive_lines()
+    loop = asyncio.get_running_loop()
+    in_flight_limit = workers * 2
+
+    total_parsed = total_updates = written_new = written_updated = written_stale = 0
+    cpu_seconds = write_seconds = 0.0
+    newest: Dict[str, Tuple[float, Character]] = {}   # name_normalized → newest (ts, update)
+    t0 = time.perf_counter()
+
+    async def write(rows):
+        nonlocal written_new, written_updated, written_stale, write_seconds
+        if dry_run or not rows:
+            return
+        w0 = time.perf_counter()
+        new, updated, stale = await bulk_upsert_dated_im(rows, data_source="im_reparse", count_seen=False)
+        written_new += new
+        written_updated += updated
+        written_stale += stale
+        write_seconds += time.perf_counter() - w0
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_silence_worker_logs) as pool:
+        futures = []
+        source = _chunks(lines, chunk)
+        exhausted = False
+        while futures or not exhausted:
+            while not exhausted and len(futures) < in_flight_limit:
+                try:
+                    futures.append(loop.run_in_executor(pool, parse_chunk, next(source)))
+                except StopIteration:
+                    exhausted = True
+            if not futures:
+                break
+            # Oldest first keeps archive order, so on equal ts the later record wins
+            updates, parsed, cpu = await futures.pop(0)
+            total_parsed += parsed
+            total_updates += len(updates)
+            cpu_seconds += cpu
+            for name_key, ts, update in updates:
+                kept = newest.get(name_key)
+                if kept is None or ts >= kept[0]:
+                    newest[name_key] = (ts, update)
+
+    rows = [(update, ts) for ts, update in newest.values()]
+    for start in range(0, len(rows), write_batch):
+        await write(rows[start:start + write_batch])
+
+    await get_history_recorder().flush()
+    elapsed = time.perf_counter() - t0
+
+    source_name = f"{synthetic:,} synthetic records" if synthetic else str(ARCHIVE_DIR)
+    print(f"[🗃️] Reparsed {total_parsed:,} embeds from {source_name} with {workers} workers in {elapsed:.1f}s")
+    print(f"    {total_parsed / elapsed:,.0f} embeds/s wall · {total_parsed / elapsed / workers:,.0f} embeds/s per core"
+          f" · {total_parsed / max(cpu_seconds, 1e-9):,.0f} embeds per CPU-second")
+    print(f"    {total_updates:,} $im rows, {len(newest):,} characters" + (" (dry run, nothing written)" if dry_run else
+          f" → {written_new:,} new / {written_updated:,} updated / {written_stale:,} older than stored "
+          f"({write_seconds:.1f}s writing)"))
+    return 0
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--chunk", type=int, default=500, help="records per worker task")
+    ap.add_argument("--write-batch", type=int, default=2000, help="rows per DB transaction")
+    ap.add_argument("--dry-run", action="store_true", help="parse only, don't touch mudae.db")
+    ap.add_argument("--synthetic", type=int, default=0,
+                    help="benchmark on N generated records instead of the archive (implies --dry-run)")
+    args = ap.parse_args()
+    sys.exit(asyncio.run(main(args.workers, args.chunk, args.write_batch, args.dry_run, args.synthetic)))